@@ -1,11 +1,14 @@
 # app.py
 import streamlit as st
 import pandas as pd
-import streamlit.components.v1 as components
 
-from ui.sidebar import render_sidebar
-from utils.check_for_change import check_for_change
-from ui.styles import build_html_table, build_body_rows
+from datetime import datetime, timezone
+
+from jobs.crawl_job import launch_crawl
+from jobs.runs import run_store
+from ui.results_view import clear_cache, render_results
+from ui.sidebar import render_metrics_panel, render_sidebar
+from utils.url_utils import normalize_url
 
 
 st.set_page_config(page_title="Veille Automatisée", layout="wide")
@@ -18,15 +21,21 @@ max_depth = params["max_depth"]
 max_pages = params["max_pages"]
 delay = params["delay"]
 respect_robots = params["respect_robots"]
+render_metrics_panel()
+
+# Load Google Sheet (cached: page loads do not refetch it)
+@st.cache_data(ttl=300, show_spinner=False)
+def load_seed_urls(url: str):
+    df = pd.read_csv(url)
+    return df.iloc[:, 0].dropna().astype(str).tolist()
+
 
-# Load Google Sheet
 if not sheet_url:
     st.warning("Merci de fournir l'URL du Google Sheet.")
     st.stop()
 
 try:
-    df_sheet = pd.read_csv(sheet_url)
-    seed_urls = df_sheet.iloc[:, 0].dropna().astype(str).tolist()
+    seed_urls = load_seed_urls(sheet_url)
 except Exception as e:
     st.error(f"Erreur lecture Google Sheet : {e}")
     st.stop()
@@ -37,70 +46,72 @@ if not seed_urls:
 
 st.success(f"{len(seed_urls)} URL(s) détectées.")
 
-# Collect results
-all_resources = []
-for i, seed in enumerate(seed_urls, start=1):
-    with st.spinner(f"📡 Vérification de l'URL {i}/{len(seed_urls)} : {seed}"):
-        changed_resources = check_for_change(
-            seed_url=seed,
-            output_bool=False,
-            max_depth=max_depth,
-            max_pages=max_pages,
-            delay=delay,
-            respect_robots=respect_robots,
-        )
-        print(changed_resources)
-    print(changed_resources)
-
-    if changed_resources:
-        all_resources.extend(changed_resources)
-        for r in changed_resources:
-            st.toast(f"Changement détecté sur {r['url']}")
-
-st.success("✅ Vérification terminée.")
-
-# Headers
-headers = [
-    "Liste des entreprises",
-    "Type de l'article",
-    "Contenu (résumé par IA)",
-    "Dernière date de parution",
-    "Lien de l'article",
-]
-
-## leave it commented on debugging purpose
-# Recent (changed) table
-with st.spinner("🖊️ Formatage du tableau des changements récents..."):
-    groups_recent = []
-    for seed in seed_urls:
-        resources_for_seed = [r for r in all_resources if r.get("seed") == seed]
-        if resources_for_seed:
-            groups_recent.append({
-                "label": resources_for_seed[0].get("company_name", seed),
-                "rows": resources_for_seed
-            })
-
-    if groups_recent:
-        body_html_recent = build_body_rows(groups_recent, blink=True)
-        table_html_recent = build_html_table(headers, body_html_recent, blink=True)
-        st.subheader("🆕 Derniers changements détectés")
-        components.html(table_html_recent, height=600, scrolling=True)
-    else:
-        st.info("Aucun changement récent détecté.")
-
-# Full table
-with st.spinner("🖊️ Construction du tableau complet..."):
-    groups_full = []
-    for seed in seed_urls:
-        resources_for_seed = [r for r in all_resources if r.get("seed") == seed]
-        if not resources_for_seed:
-            resources_for_seed = [{"title": "", "content": "", "last_date": "", "url": ""}]
-        groups_full.append({
-            "label": resources_for_seed[0].get("company_name", seed),
-            "rows": resources_for_seed
+# Crawling runs in a background job (jobs/crawl_job.py); the page only reads stored results
+job = run_store.active()
+col_status, col_button = st.columns([4, 1])
+with col_button:
+    if st.button("🔄 Rafraîchir", disabled=job is not None, help="Lancer une vérification de tous les sites"):
+        job_id = launch_crawl(seed_urls, {
+            "max_depth": max_depth,
+            "max_pages": max_pages,
+            "delay": delay,
+            "respect_robots": respect_robots,
         })
+        if job_id is None:
+            st.toast("Une vérification est déjà en cours.")
+        clear_cache()
+        st.rerun()
+last = run_store.last_finished()
+
+
+# While a job runs, only this fragment reruns (every 2 s): progress bar and the
+# changes found so far, appended as the job reports them (jobs.runs job_events)
+@st.fragment(run_every=2 if job else None)
+def live_progress(job_id):
+    current = run_store.get(job_id)
+    if current is None or current["status"] not in ("queued", "running"):
+        clear_cache()
+        st.rerun()  # job finished: refresh the whole page once
+    seen = st.session_state.setdefault(f"job_{job_id}_events", [])
+    after = seen[-1]["id"] if seen else 0
+    seen.extend(run_store.events(job_id, after))
+
+    done, total = current["seeds_done"], len(current["seeds"])
+    st.progress(done / total if total else 0.0,
+                text=f"📡 Vérification en cours : {done}/{total} site(s)"
+                     + (f" — {current['current_seed']}" if current.get("current_seed") else ""))
+    if seen:
+        st.caption(f"{len(seen)} changement(s) détecté(s) pour l'instant")
+        st.dataframe(
+            pd.DataFrame([{"Entreprise": e["seed"], "Titre": e["title"], "Lien de l'article": e["url"]}
+                          for e in reversed(seen)]),
+            hide_index=True,
+            use_container_width=True,
+            column_config={"Lien de l'article": st.column_config.LinkColumn()},
+        )
 
-    body_html_full = build_body_rows(groups_full, blink=False)
-    table_html_full = build_html_table(headers, body_html_full, blink=False)
-    st.subheader("📚 Tableau complet des ressources")
-    components.html(table_html_full, height=800, scrolling=True)
+
+with col_status:
+    if job:
+        live_progress(job["id"])
+    elif last:
+        finished = datetime.fromtimestamp(last["finished_at"]).strftime("%d/%m/%Y %H:%M")
+        st.caption(f"✅ Dernière vérification terminée le {finished} "
+                   f"({last['changed']} changement(s) détecté(s)).")
+    else:
+        st.caption("Aucune vérification lancée pour l'instant.")
+
+# Stored seeds are normalized by the crawler
+seed_labels = {normalize_url(seed): seed for seed in seed_urls}
+since = datetime.fromtimestamp(last["started_at"], tz=timezone.utc) if last and last.get("started_at") else None
+
+# Recent (changed) articles: stored by the last completed check
+st.subheader("🆕 Derniers changements détectés")
+if since:
+    render_results("recent", seed_labels, since=since)
+else:
+    st.info("Aucun changement récent détecté.")
+
+# Every stored article, page by page
+st.subheader("📚 Tableau complet des ressources")
+render_results("full", seed_labels)
@@ -0,0 +1,167 @@
+# bench/fixture_site.py
+"""
+Synthetic corporate site for the benchmark: a home page, paginated news listings,
+press releases (HTML, with a shared header/footer template) and PDF reports of
+several sizes, written to a directory and served on 127.0.0.1 by a threaded
+http.server. The server counts the requests it answers.
+"""
+
+import os
+import random
+import threading
+from functools import partial
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional
+
+_TOPICS = [
+    "chiffre d'affaires", "résultat net", "dividende", "acquisition", "partenariat",
+    "nomination", "émission obligataire", "investissement immobilier", "perspectives",
+]
+_WORDS = (
+    "le groupe annonce une progression de son activité sur le semestre avec une marge "
+    "opérationnelle en hausse portée par la croissance des ventes en Europe et une "
+    "discipline financière renforcée le conseil d'administration proposera à l'assemblée "
+    "générale un dividende et confirme ses objectifs pour l'exercice en cours"
+).split()
+
+_TEMPLATE = """<!doctype html>
+<html lang="fr"><head><meta charset="utf-8"><title>{title}</title></head>
+<body>
+<header><nav><a href="/">Accueil</a> <a href="/news/page-1.html">Actualités</a>
+<a href="/investisseurs.html">Investisseurs</a></nav></header>
+<main>{body}</main>
+<footer><p>© Groupe Exemple SA — Mentions légales — Politique de cookies</p></footer>
+</body></html>
+"""
+
+
+def _paragraphs(rng: random.Random, n: int) -> List[str]:
+    return [" ".join(rng.choice(_WORDS) for _ in range(rng.randint(40, 90))).capitalize() + "."
+            for _ in range(n)]
+
+
+def _pdf(pages: List[str]) -> bytes:
+    """Minimal PDF (one Helvetica text stream per page) that PDF readers can parse."""
+    objects: List[bytes] = []
+    n_pages = len(pages)
+    page_ids = [4 + 2 * i for i in range(n_pages)]
+    objects.append(b"<< /Type /Catalog /Pages 2 0 R >>")
+    kids = " ".join(f"{i} 0 R" for i in page_ids).encode()
+    objects.append(b"<< /Type /Pages /Kids [" + kids + b"] /Count " + str(n_pages).encode() + b" >>")
+    objects.append(b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>")
+    for i, text in enumerate(pages):
+        lines, line = [], []
+        for word in text.split():
+            line.append(word)
+            if len(line) == 12:
+                lines.append(" ".join(line))
+                line = []
+        if line:
+            lines.append(" ".join(line))
+        ops = ["BT /F1 10 Tf 14 TL 50 790 Td"]
+        for ln in lines[:50]:
+            esc = ln.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+            ops.append(f"({esc}) Tj T*")
+        ops.append("ET")
+        stream = "\n".join(ops).encode("cp1252", errors="replace")
+        objects.append(
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] "
+            f"/Resources << /Font << /F1 3 0 R >> >> /Contents {page_ids[i] + 1} 0 R >>".encode()
+        )
+        objects.append(b"<< /Length " + str(len(stream)).encode() + b" >>\nstream\n" + stream + b"\nendstream")
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for num, obj in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += f"{num} 0 obj\n".encode() + obj + b"\nendobj\n"
+    xref = len(out)
+    out += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode()
+    out += b"".join(f"{o:010d} 00000 n \n".encode() for o in offsets)
+    out += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode()
+    return bytes(out)
+
+
+def generate_site(root: str, releases: int = 40, pdfs: int = 6, per_listing: int = 10,
+                  pdf_pages=(2, 20, 120), seed: int = 0) -> Dict[str, int]:
+    """Write the site under `root`; returns what was generated."""
+    rng = random.Random(seed)
+    os.makedirs(os.path.join(root, "news"), exist_ok=True)
+    os.makedirs(os.path.join(root, "docs"), exist_ok=True)
+
+    with open(os.path.join(root, "robots.txt"), "w") as f:
+        f.write("User-agent: *\nDisallow: /private/\n")
+
+    items = []
+    for i in range(releases):
+        topic = _TOPICS[i % len(_TOPICS)]
+        title = f"Communiqué {i + 1} : {topic}"
+        date = f"2025-{1 + i % 12:02d}-{1 + i % 28:02d}"
+        paras = "".join(f"<p>{p}</p>" for p in _paragraphs(rng, rng.randint(3, 12)))
+        body = f'<article><h1>{title}</h1><time datetime="{date}">{date}</time>{paras}</article>'
+        with open(os.path.join(root, "news", f"release-{i + 1}.html"), "w") as f:
+            f.write(_TEMPLATE.format(title=title, body=body))
+        items.append(f'<li><a href="/news/release-{i + 1}.html">{title}</a></li>')
+
+    pdf_links = []
+    for i in range(pdfs):
+        n_pages = pdf_pages[i % len(pdf_pages)]
+        pages = [f"Rapport financier {i + 1} page {p + 1}. " + " ".join(_paragraphs(rng, 4))
+                 for p in range(n_pages)]
+        with open(os.path.join(root, "docs", f"report-{i + 1}.pdf"), "wb") as f:
+            f.write(_pdf(pages))
+        pdf_links.append(f'<li><a href="/docs/report-{i + 1}.pdf">Rapport {i + 1} ({n_pages} pages)</a></li>')
+
+    listings = max(1, -(-releases // per_listing))
+    for page in range(listings):
+        chunk = items[page * per_listing:(page + 1) * per_listing]
+        nav = "".join(f'<a href="/news/page-{p + 1}.html">{p + 1}</a> ' for p in range(listings))
+        body = f"<h1>Actualités — page {page + 1}</h1><ul>{''.join(chunk)}</ul><p>{nav}</p>"
+        with open(os.path.join(root, "news", f"page-{page + 1}.html"), "w") as f:
+            f.write(_TEMPLATE.format(title=f"Actualités {page + 1}", body=body))
+
+    investors = f"<h1>Investisseurs</h1><ul>{''.join(pdf_links)}</ul>"
+    with open(os.path.join(root, "investisseurs.html"), "w") as f:
+        f.write(_TEMPLATE.format(title="Investisseurs", body=investors))
+    home = '<h1>Groupe Exemple</h1><p><a href="/news/page-1.html">Toutes les actualités</a></p>' \
+           '<p><a href="/investisseurs.html">Rapports financiers</a></p>'
+    with open(os.path.join(root, "index.html"), "w") as f:
+        f.write(_TEMPLATE.format(title="Groupe Exemple", body=home))
+
+    return {"releases": releases, "pdfs": pdfs, "listings": listings,
+            "pages": releases + pdfs + listings + 2}
+
+
+class _Handler(SimpleHTTPRequestHandler):
+    def do_GET(self):
+        self.server.requests += 1
+        super().do_GET()
+
+    def log_message(self, *args):  # quiet
+        pass
+
+
+class FixtureSite:
+    """Serves `root` on 127.0.0.1 (random port) in a background thread."""
+
+    def __init__(self, root: str, port: int = 0):
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", port), partial(_Handler, directory=root))
+        self.httpd.requests = 0
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.httpd.server_address[1]}/"
+
+    @property
+    def requests(self) -> int:
+        return self.httpd.requests
+
+    def start(self) -> "FixtureSite":
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.httpd.shutdown()
+        self.httpd.server_close()
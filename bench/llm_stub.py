@@ -0,0 +1,163 @@
+# bench/llm_stub.py
+"""
+OpenAI-compatible stub for the benchmark: /v1/chat/completions answers each AI task
+of the pipeline with a fixed reply (relevance "oui", an ISO date, a title, a summary)
+and /v1/embeddings returns deterministic unit vectors, both after a configurable
+latency. Calls, inputs and tokens are counted per task.
+
+    python -m bench.llm_stub --port 8765 --latency 0.2
+    OPENAI_BASE_URL=http://127.0.0.1:8765/v1 OPENAI_API_KEY=stub streamlit run app.py
+"""
+
+import argparse
+import base64
+import hashlib
+import json
+import threading
+import time
+from collections import defaultdict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Optional
+
+import numpy as np
+
+ANSWERS = {
+    "relevance": "oui",
+    "date": "2025-03-14",
+    "title": "Rapport financier annuel 2024",
+    "summary": "Le groupe publie des résultats en hausse et confirme ses objectifs annuels.",
+    "other": "ok",
+}
+
+
+def count_tokens(text: str) -> int:
+    # Imported on first use: utils.token_budget loads config, which reads VEILLE_CACHE_DIR
+    # once, and run_bench imports this module before pointing the settings at its work dir.
+    from utils.token_budget import count_tokens as count
+    return count(text)
+
+
+def task_of(prompt: str) -> str:
+    """Which pipeline task a chat prompt belongs to (see utils/ai_relevance.py etc.)."""
+    if '"oui" ou "non"' in prompt:
+        return "relevance"
+    if "date de publication" in prompt:
+        return "date"
+    if "titre principal" in prompt:
+        return "title"
+    if "résumé" in prompt:
+        return "summary"
+    return "other"
+
+
+def fake_embedding(text: str, dim: int) -> np.ndarray:
+    rng = np.random.default_rng(int.from_bytes(hashlib.blake2b(text.encode(), digest_size=8).digest(), "little"))
+    v = rng.standard_normal(dim).astype(np.float32)
+    return v / np.linalg.norm(v)
+
+
+class _Handler(BaseHTTPRequestHandler):
+    def log_message(self, *args):  # quiet
+        pass
+
+    def _reply(self, payload: Dict[str, Any]) -> None:
+        body = json.dumps(payload).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        req = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+        stub: "LlmStub" = self.server.stub
+        if self.path.endswith("/chat/completions"):
+            self._reply(stub.chat(req))
+        elif self.path.endswith("/embeddings"):
+            self._reply(stub.embeddings(req))
+        else:
+            self.send_error(404)
+
+
+class LlmStub:
+    def __init__(self, port: int = 0, latency: float = 0.0, embed_latency: Optional[float] = None,
+                 dim: int = 1536):
+        self.latency = latency
+        self.embed_latency = latency if embed_latency is None else embed_latency
+        self.dim = dim
+        self._lock = threading.Lock()
+        self.reset()
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", port), _Handler)
+        self.httpd.stub = self
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.httpd.server_address[1]}/v1"
+
+    def reset(self) -> None:
+        with self._lock:
+            self.stats: Dict[str, Dict[str, int]] = defaultdict(lambda: defaultdict(int))
+
+    def snapshot(self) -> Dict[str, Dict[str, int]]:
+        with self._lock:
+            return {task: dict(c) for task, c in self.stats.items()}
+
+    def _count(self, task: str, **values: int) -> None:
+        with self._lock:
+            self.stats[task]["calls"] += 1
+            for k, v in values.items():
+                self.stats[task][k] += v
+
+    def chat(self, req: Dict[str, Any]) -> Dict[str, Any]:
+        prompt = "\n".join(str(m.get("content", "")) for m in req.get("messages", []))
+        task = task_of(prompt)
+        answer = ANSWERS[task]
+        prompt_tokens, completion_tokens = count_tokens(prompt), count_tokens(answer)
+        self._count(task, prompt_tokens=prompt_tokens, completion_tokens=completion_tokens)
+        time.sleep(self.latency)
+        return {
+            "id": "chatcmpl-stub", "object": "chat.completion", "created": int(time.time()),
+            "model": req.get("model", "stub"),
+            "choices": [{"index": 0, "finish_reason": "stop",
+                         "message": {"role": "assistant", "content": answer}}],
+            "usage": {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens,
+                      "total_tokens": prompt_tokens + completion_tokens},
+        }
+
+    def embeddings(self, req: Dict[str, Any]) -> Dict[str, Any]:
+        inputs = req.get("input", [])
+        inputs = [inputs] if isinstance(inputs, str) else inputs
+        tokens = sum(count_tokens(t) if isinstance(t, str) else len(t) for t in inputs)
+        self._count("embedding", inputs=len(inputs), prompt_tokens=tokens)
+        time.sleep(self.embed_latency)
+        as_b64 = req.get("encoding_format") == "base64"
+        data = []
+        for i, text in enumerate(inputs):
+            vec = fake_embedding(text if isinstance(text, str) else repr(text), self.dim)
+            data.append({"object": "embedding", "index": i,
+                         "embedding": base64.b64encode(vec.tobytes()).decode() if as_b64 else vec.tolist()})
+        return {"object": "list", "data": data, "model": req.get("model", "stub"),
+                "usage": {"prompt_tokens": tokens, "total_tokens": tokens}}
+
+    def start(self) -> "LlmStub":
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self) -> None:
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--port", type=int, default=8765)
+    ap.add_argument("--latency", type=float, default=0.2, help="seconds per chat completion")
+    ap.add_argument("--embed-latency", type=float, default=None, help="seconds per embeddings request")
+    ap.add_argument("--dim", type=int, default=1536)
+    args = ap.parse_args()
+    stub = LlmStub(args.port, args.latency, args.embed_latency, args.dim)
+    print(f"[STUB] OpenAI-compatible stub on {stub.url}")
+    try:
+        stub.httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,181 @@
+# bench/run_bench.py
+"""
+End-to-end benchmark of the crawl and change-detection pipeline, fully local: a
+synthetic corporate site (bench/fixture_site.py), an OpenAI-compatible stub
+(bench/llm_stub.py) and the embedded store (or Postgres with --storage postgres,
+using the configured DATABASE_* settings).
+
+Stages: `crawl` (crawl_site alone), `check-cold` (check_for_change on an empty
+store) and `check-warm` (same site again: fingerprints, conditional GETs). For each:
+pages/s, LLM calls and tokens per page, embedding calls, DB round trips, peak RSS.
+
+    python -m bench.run_bench --releases 40 --pdfs 6 --latency 0.05 --out bench.json
+    python -m bench.run_bench --compare bench.json       # deltas against a previous run
+"""
+
+import argparse
+import json
+import os
+import resource
+import sys
+import tempfile
+import time
+from typing import Any, Dict, Optional
+
+from bench.fixture_site import FixtureSite, generate_site
+from bench.llm_stub import LlmStub
+
+
+def _peak_rss_mb() -> Dict[str, float]:
+    """Peak RSS of this process and of its finished children (PDF workers), in MB."""
+    scale = 1024 * 1024 if sys.platform == "darwin" else 1024  # ru_maxrss: bytes on macOS, KB on Linux
+    return {
+        "self": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / scale,
+        "children": resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / scale,
+    }
+
+
+class _RoundTrips:
+    """Counts statements sent to the store: SQLAlchemy cursor executes or SQLite statements."""
+
+    def __init__(self, storage):
+        self.count = 0
+        if hasattr(storage, "_db"):  # LocalStore
+            storage._db.set_trace_callback(self._hit)
+        else:
+            from sqlalchemy import event
+            from db.engine import get_engine
+            event.listen(get_engine(), "before_cursor_execute", self._hit)
+
+    def _hit(self, *args) -> None:
+        self.count += 1
+
+
+def _llm_delta(before: Dict[str, Dict[str, int]], after: Dict[str, Dict[str, int]]) -> Dict[str, Dict[str, int]]:
+    out = {}
+    for task, counts in after.items():
+        d = {k: v - before.get(task, {}).get(k, 0) for k, v in counts.items()}
+        if any(d.values()):
+            out[task] = d
+    return out
+
+
+def _stage(name: str, fn, site: FixtureSite, stub: LlmStub, trips: Optional[_RoundTrips]) -> Dict[str, Any]:
+    requests0, llm0, trips0 = site.requests, stub.snapshot(), trips.count if trips else 0
+    t0 = time.perf_counter()
+    extra = fn() or {}
+    elapsed = time.perf_counter() - t0
+
+    pages = site.requests - requests0
+    llm = _llm_delta(llm0, stub.snapshot())
+    embed = llm.pop("embedding", {})
+    chat_calls = sum(c.get("calls", 0) for c in llm.values())
+    chat_tokens = sum(c.get("prompt_tokens", 0) + c.get("completion_tokens", 0) for c in llm.values())
+    result = {
+        "seconds": round(elapsed, 3),
+        "http_requests": pages,
+        "pages_per_s": round(pages / elapsed, 2) if elapsed else 0.0,
+        "llm_calls": chat_calls,
+        "llm_calls_per_page": round(chat_calls / pages, 2) if pages else 0.0,
+        "llm_tokens_per_page": round(chat_tokens / pages, 1) if pages else 0.0,
+        "llm_by_task": llm,
+        "embedding_requests": embed.get("calls", 0),
+        "embedding_inputs": embed.get("inputs", 0),
+        "db_round_trips": (trips.count - trips0) if trips else None,
+        "peak_rss_mb": _peak_rss_mb(),
+        **extra,
+    }
+    print(f"[BENCH] {name:11s} {elapsed:7.2f}s  {result['pages_per_s']:6.2f} pages/s  "
+          f"llm={chat_calls} ({result['llm_tokens_per_page']} tok/page)  "
+          f"embed={result['embedding_requests']}/{result['embedding_inputs']}  "
+          f"db={result['db_round_trips']}  rss={result['peak_rss_mb']['self']:.0f}MB")
+    return result
+
+
+def _compare(current: Dict[str, Any], previous: Dict[str, Any]) -> None:
+    keys = ("seconds", "pages_per_s", "llm_calls", "llm_tokens_per_page", "embedding_requests", "db_round_trips")
+    for stage, cur in current["stages"].items():
+        prev = previous.get("stages", {}).get(stage)
+        if not prev:
+            continue
+        deltas = []
+        for k in keys:
+            a, b = prev.get(k), cur.get(k)
+            if isinstance(a, (int, float)) and isinstance(b, (int, float)) and a:
+                deltas.append(f"{k} {b - a:+.2f} ({(b - a) / a:+.0%})")
+        print(f"[COMPARE] {stage:11s} " + ", ".join(deltas))
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--releases", type=int, default=40, help="HTML press releases")
+    ap.add_argument("--pdfs", type=int, default=6, help="PDF reports (2, 20 and 120 pages in turn)")
+    ap.add_argument("--max-pages", type=int, default=100)
+    ap.add_argument("--max-depth", type=int, default=3)
+    ap.add_argument("--latency", type=float, default=0.05, help="stub seconds per chat completion")
+    ap.add_argument("--embed-latency", type=float, default=None, help="stub seconds per embeddings request")
+    ap.add_argument("--storage", choices=("local", "postgres"), default="local")
+    ap.add_argument("--out", help="write the results as JSON")
+    ap.add_argument("--compare", help="previous JSON results to compare with")
+    args = ap.parse_args()
+
+    work = tempfile.mkdtemp(prefix="veille-bench-")
+    cache_dir = os.path.join(work, "cache")
+    # Settings are read at import time: point everything at the work dir before any
+    # project module (config) is imported, or the bench writes into the real .cache
+    os.environ.update({
+        "VEILLE_CACHE_DIR": cache_dir,
+        "OPENAI_API_KEY": "bench",
+        "EMBED_PROVIDER": "openai",
+        "STORAGE_BACKEND": args.storage,
+        "LOCAL_STORE_DIR": os.path.join(work, "store"),
+    })
+    if "config" in sys.modules:
+        raise SystemExit("[BENCH] config was imported before the bench settings were applied")
+    site_dir = os.path.join(work, "site")
+    generated = generate_site(site_dir, releases=args.releases, pdfs=args.pdfs)
+    site = FixtureSite(site_dir).start()
+    stub = LlmStub(latency=args.latency, embed_latency=args.embed_latency,
+                   dim=int(os.getenv("EMBEDDING_DIM", "1536"))).start()
+    os.environ["OPENAI_BASE_URL"] = stub.url
+
+    from crawler.crawler import crawl_site
+    from db.backends import get_storage
+    from utils.check_for_change import check_for_change
+
+    storage = get_storage()
+    trips = _RoundTrips(storage)
+    crawl_args = dict(max_depth=args.max_depth, max_pages=args.max_pages, delay=0.0, respect_robots=True)
+    print(f"[BENCH] site {site.url} ({generated['pages']} pages), stub {stub.url}, storage={args.storage}")
+
+    stages: Dict[str, Any] = {}
+
+    def run_check():
+        counts: Dict[str, int] = {}
+        changed = check_for_change(site.url, output_bool=False, stats=counts, **crawl_args)
+        return {"changed": len(changed), "crawl_counts": counts}
+
+    stages["crawl"] = _stage("crawl", lambda: {"results": len(crawl_site(site.url, **crawl_args))},
+                             site, stub, None)
+    stages["check-cold"] = _stage("check-cold", run_check, site, stub, trips)
+    stages["check-warm"] = _stage("check-warm", run_check, site, stub, trips)
+
+    results = {
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "params": {**vars(args), "site": generated},
+        "stages": stages,
+    }
+    site.stop()
+    stub.stop()
+
+    if args.compare:
+        with open(args.compare) as f:
+            _compare(results, json.load(f))
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"[BENCH] results written to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
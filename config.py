@@ -1,4 +1,79 @@
+import os
+
 HEADERS = {"User-Agent": "VeilleBot/0.1 (+mailto:missah@ohatra.com)"}
 DEFAULT_TIMEOUT = 10
-CHUNK_SIZE = 1000
-CHUNK_OVERLAP = 120
\ No newline at end of file
+
+# Token budgets per AI task (see utils/token_budget.py). Each value can be
+# overridden with a secret/env variable named TOKEN_BUDGET_<TASK>_<KEY>,
+# e.g. TOKEN_BUDGET_SUMMARY_PROMPT=1500.
+#   chunk / overlap : chunk size and overlap, in tokens
+#   prompt          : max tokens of document text placed in one prompt
+#   max_chunks      : max number of chunks sent to the task (0 = no limit)
+TOKENIZER_ENCODING = os.getenv("TOKENIZER_ENCODING", "o200k_base")
+TOKEN_BUDGETS = {
+    "relevance": {"chunk": 256, "overlap": 32, "prompt": 1500, "max_chunks": 0},
+    "summary":   {"chunk": 256, "overlap": 32, "prompt": 1200, "max_chunks": 0},
+    "date":      {"chunk": 512, "overlap": 48, "prompt": 512,  "max_chunks": 3},
+    "title":     {"chunk": 512, "overlap": 0,  "prompt": 2000, "max_chunks": 0},
+    "embedding": {"chunk": 450, "overlap": 50, "prompt": 8000, "max_chunks": 0},
+}
+
+# Local state (learned templates, caches) persisted between runs
+CACHE_DIR = os.getenv("VEILLE_CACHE_DIR", ".cache")
+
+# Site boilerplate detection: a text block is treated as template once it has been
+# seen on at least BOILERPLATE_MIN_PAGES pages and on BOILERPLATE_MIN_RATIO of the
+# pages observed for the domain.
+BOILERPLATE_MIN_PAGES = int(os.getenv("BOILERPLATE_MIN_PAGES", "3"))
+BOILERPLATE_MIN_RATIO = float(os.getenv("BOILERPLATE_MIN_RATIO", "0.5"))
+
+# Keep a zlib-compressed copy of the raw HTML/PDF bytes with each stored article
+STORE_RAW_BODY = os.getenv("STORE_RAW_BODY", "false").lower() in {"1", "true", "yes", "on"}
+
+# Near-duplicate detection before embedding (utils/near_dup.py): MinHash over word
+# shingles, LSH banding for candidates. Texts whose estimated Jaccard similarity is at
+# least NEAR_DUP_THRESHOLD are resolved without an embedding; others are embedded.
+NEAR_DUP_ENABLED = os.getenv("NEAR_DUP", "on").lower() not in {"0", "off", "false", "no"}
+NEAR_DUP_THRESHOLD = float(os.getenv("NEAR_DUP_THRESHOLD", "0.9"))
+NEAR_DUP_SHINGLE = int(os.getenv("NEAR_DUP_SHINGLE", "5"))          # words per shingle
+NEAR_DUP_PERMUTATIONS = int(os.getenv("NEAR_DUP_PERMUTATIONS", "128"))
+NEAR_DUP_BANDS = int(os.getenv("NEAR_DUP_BANDS", "32"))              # must divide PERMUTATIONS
+
+# Revisit scheduler (jobs/scheduler.py): per-seed intervals and page budgets adapt to how
+# often a seed actually changes, within [MIN, MAX]; WORKERS seeds are crawled at once and
+# at most PAGES_PER_HOUR pages are budgeted across all seeds.
+SCHEDULER_MIN_INTERVAL_H = float(os.getenv("SCHEDULER_MIN_INTERVAL_H", "1"))
+SCHEDULER_MAX_INTERVAL_H = float(os.getenv("SCHEDULER_MAX_INTERVAL_H", "168"))
+SCHEDULER_DEFAULT_INTERVAL_H = float(os.getenv("SCHEDULER_DEFAULT_INTERVAL_H", "24"))
+SCHEDULER_MIN_PAGES = int(os.getenv("SCHEDULER_MIN_PAGES", "5"))
+SCHEDULER_MAX_PAGES = int(os.getenv("SCHEDULER_MAX_PAGES", "100"))
+SCHEDULER_DEFAULT_PAGES = int(os.getenv("SCHEDULER_DEFAULT_PAGES", "25"))
+SCHEDULER_WORKERS = int(os.getenv("SCHEDULER_WORKERS", "3"))
+SCHEDULER_PAGES_PER_HOUR = int(os.getenv("SCHEDULER_PAGES_PER_HOUR", "1000"))
+
+# Dashboard results view (ui/results_view.py): rows per page, read from the store
+RESULTS_PAGE_SIZE = int(os.getenv("RESULTS_PAGE_SIZE", "50"))
+
+# PDF text extraction (utils/pdf_extract.py) runs in PDF_WORKERS worker processes. Each
+# document gets PDF_TIMEOUT seconds overall and each worker PDF_MEMORY_MB of address
+# space (0 = no limit); a worker that exceeds them is killed. Documents longer than
+# PDF_PAGES_PER_TASK pages are split into page ranges extracted in parallel.
+# PDF_BUDGETS caps the pages and characters read per stage: "content" is the stored
+# text (also hashed and summarized), the other stages get a prefix of it.
+# Override with PDF_BUDGET_<STAGE>_<KEY>, e.g. PDF_BUDGET_CONTENT_PAGES=500.
+PDF_WORKERS = int(os.getenv("PDF_WORKERS", "2"))
+PDF_TIMEOUT = float(os.getenv("PDF_TIMEOUT", "60"))
+PDF_MEMORY_MB = int(os.getenv("PDF_MEMORY_MB", "1024"))
+PDF_PAGES_PER_TASK = int(os.getenv("PDF_PAGES_PER_TASK", "40"))
+PDF_BUDGETS = {
+    stage: {
+        key: int(os.getenv(f"PDF_BUDGET_{stage.upper()}_{key.upper()}", str(default)))
+        for key, default in budget.items()
+    }
+    for stage, budget in {
+        "content":   {"pages": 300, "chars": 1_000_000},
+        "relevance": {"pages": 40,  "chars": 120_000},
+        "date":      {"pages": 3,   "chars": 20_000},
+        "title":     {"pages": 3,   "chars": 20_000},
+    }.items()
+}
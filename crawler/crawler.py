@@ -1,20 +1,65 @@
 # crawler/crawler.py
 
 import time, requests
-from typing import List, Dict, Tuple
+from typing import Callable, List, Dict, Optional, Tuple
 from collections import deque
-from config import HEADERS, DEFAULT_TIMEOUT
+from config import HEADERS, DEFAULT_TIMEOUT, STORE_RAW_BODY
 from utils.url_utils import normalize_url, same_domain, is_pdf_url
 from utils.robots_utils import allowed_by_robots
-from utils.parsing import extract_text_and_links, extract_pdf_text
+from utils.parsing import extract_blocks_and_links
+from utils.pdf_extract import PdfExtractionError, pdf_extractor, stage_text
+from utils.boilerplate import template_learner
 from utils.ai_relevance import check_relevance_with_ai
 from utils.date_utils import get_date_from_headers, get_date_from_html, get_date_from_text_ai
 from utils.summarizer import summarize_content
-from utils.pdf_title_utils import get_title_from_pdf_bytes
+from utils.pdf_title_utils import get_title_from_text
+from utils.hash_utils import compute_content_fingerprint
+from utils.fingerprints import FingerprintStore, response_validators
+from utils.metrics import metrics
+from utils.tracing import tracer
+from urllib.parse import urlparse
 import requests
 
+
+def _unchanged(fingerprints: Optional[FingerprintStore], url: str, content_hash: str) -> bool:
+    """Fingerprint lookup, counted as a cache hit / miss."""
+    if not fingerprints:
+        return False
+    hit = fingerprints.is_unchanged(url, content_hash)
+    metrics.inc("cache_requests_total", cache="fingerprint", result="hit" if hit else "miss")
+    return hit
+
+def _notify(on_resource: Optional[Callable[[Dict], None]], resource: Dict) -> None:
+    """Progress callback; a failing callback must not drop the resource from the results."""
+    if not on_resource:
+        return
+    try:
+        on_resource(resource)
+    except Exception as e:
+        print(f"[ERROR][ON_RESOURCE] {resource.get('url')} | {e}")
+
 def crawl_site(seed_url: str, max_depth: int = 1, max_pages: int = 25,
-               delay: float = 0.5, respect_robots: bool = True) -> List[Dict]:
+               delay: float = 0.5, respect_robots: bool = True,
+               skip_url: Optional[Callable[[str], bool]] = None,
+               fingerprints: Optional[FingerprintStore] = None,
+               stats: Optional[Dict[str, int]] = None,
+               on_resource: Optional[Callable[[Dict], None]] = None) -> List[Dict]:
+    """
+    Breadth-first crawl from seed_url. `skip_url(url)` is checked before fetching
+    any page below the seed (e.g. known duplicate URLs), so skipped URLs cost
+    no download, LLM call or embedding.
+
+    With `fingerprints`, PDFs are fetched with conditional GETs and resources whose
+    extracted text is unchanged since the last run are left out of the results
+    without any LLM call (HTML pages are still parsed for links). Irrelevant pages
+    are recorded right away; returned resources carry "content_hash" and
+    "validators" so the caller records them once they are stored.
+    `stats` receives the counts: fetched, not_modified, unchanged, irrelevant, changed.
+    `on_resource(resource)` is called for each result as soon as it is found.
+    """
+    counts = stats if stats is not None else {}
+    for key in ("fetched", "not_modified", "unchanged", "irrelevant", "changed"):
+        counts.setdefault(key, 0)
 
     seed = normalize_url(seed_url)
     results, visited = [], set()
@@ -37,137 +82,231 @@ def crawl_site(seed_url: str, max_depth: int = 1, max_pages: int = 25,
             continue
         visited.add(url)
 
-        if respect_robots and not allowed_by_robots(url):
-            continue
+        with tracer.span("resource", url=url, depth=depth) as root:
+            if respect_robots:
+                with tracer.span("robots"):
+                    allowed = allowed_by_robots(url)
+                if not allowed:
+                    root.set(skipped="robots")
+                    continue
 
-        if delay > 0:
-            time.sleep(delay)
+            if skip_url and depth > 0:
+                try:
+                    if skip_url(url):
+                        print(f"[CRAWLER] Known alias, skipped: {url}")
+                        continue
+                except Exception as e:
+                    print(f"[ERROR][SKIP CHECK] {url} | {e}")
 
-        try:
-            resp = requests.get(url, headers=HEADERS, timeout=DEFAULT_TIMEOUT, stream=True)
-            if not resp.ok:
-                continue
+            if delay > 0:
+                with tracer.span("delay"):
+                    time.sleep(delay)
 
-            content_type = resp.headers.get("Content-Type", "").lower()
-            print(f"[DEBUG] URL = {url}, Content-Type = {content_type}")
+            try:
+                headers = HEADERS
+                if fingerprints and is_pdf_url(url, ""):
+                    # Documents do not carry links: a 304 means nothing to do at all
+                    headers = {**HEADERS, **fingerprints.conditional_headers(url)}
+                host = urlparse(url).netloc
+                t0 = time.perf_counter()
+                with tracer.span("fetch", host=host) as fetch_span:
+                    resp = requests.get(url, headers=headers, timeout=DEFAULT_TIMEOUT, stream=True)
+                    fetch_span.set(status=resp.status_code)
+                    # the body is read here, inside the timed fetch
+                    body = resp.content if resp.ok and resp.status_code != 304 else b""
+                    fetch_span.set(bytes=len(body))
+                metrics.observe("fetch_seconds", time.perf_counter() - t0, host=host)
+                if resp.status_code == 304:
+                    metrics.inc("cache_requests_total", cache="fingerprint", result="hit")
+                    root.set(outcome="not_modified")
+                    fingerprints.touch(url)
+                    counts["not_modified"] += 1
+                    pages_processed += 1
+                    continue
+                if not resp.ok:
+                    continue
+                metrics.inc("fetch_bytes_total", len(body), host=host)
+                counts["fetched"] += 1
 
-            # ------------------- PDF -------------------
-            if is_pdf_url(url, content_type):
-                print(f"[DEBUG] PDF détecté : {url}")
+                content_type = resp.headers.get("Content-Type", "").lower()
+                print(f"[DEBUG] URL = {url}, Content-Type = {content_type}")
 
-                pdf_bytes = resp.content
-                pdf_text = extract_pdf_text(pdf_bytes)
+                # ------------------- PDF -------------------
+                if is_pdf_url(url, content_type):
+                    print(f"[DEBUG] PDF détecté : {url}")
 
-                # --- AI date extraction ---
-                last_date = get_date_from_headers(resp)  # fallback
-                ai_date = get_date_from_text_ai(pdf_text)
-                if ai_date != "Non trouvé":
-                    last_date = ai_date
+                    pdf_bytes = body
+                    # Worker processes with page budget, timeout and memory limit (utils/pdf_extract.py)
+                    try:
+                        with metrics.timer("parse_seconds", kind="pdf"), tracer.span("parse", kind="pdf"):
+                            pdf_pages, pdf_meta_title = pdf_extractor.extract_document(pdf_bytes)
+                    except PdfExtractionError as e:
+                        print(f"[PDF] {url} skipped: {e}")
+                        pages_processed += 1
+                        continue
+                    pdf_text = stage_text(pdf_pages, "content")
 
-                purpose = """
-                Collecter toutes les informations pertinentes sur l'entreprise, incluant :
-                - Les rapports financiers et résultats (bilans, comptes annuels, chiffres clés),
-                - Les communiqués de presse officiels,
-                - Les actualités importantes concernant l'entreprise (nouveaux partenariats, fusions, acquisitions, changements dans la direction, etc.).
-                Répondre uniquement si le texte est pertinent pour ces critères.
-                """
+                    content_hash = compute_content_fingerprint(pdf_text)
+                    if _unchanged(fingerprints, url, content_hash):
+                        fingerprints.record(url, content_hash, **response_validators(resp))
+                        counts["unchanged"] += 1
+                        root.set(outcome="unchanged")
+                        pages_processed += 1
+                        continue
 
-                is_relevant = check_relevance_with_ai(pdf_text, purpose=purpose)
+                    # --- AI date extraction ---
+                    last_date = get_date_from_headers(resp)  # fallback
+                    with tracer.span("date"):
+                        ai_date = get_date_from_text_ai(stage_text(pdf_pages, "date"))
+                    if ai_date != "Non trouvé":
+                        last_date = ai_date
 
+                    purpose = """
+                    Collecter toutes les informations pertinentes sur l'entreprise, incluant :
+                    - Les rapports financiers et résultats (bilans, comptes annuels, chiffres clés),
+                    - Les communiqués de presse officiels,
+                    - Les actualités importantes concernant l'entreprise (nouveaux partenariats, fusions, acquisitions, changements dans la direction, etc.).
+                    Répondre uniquement si le texte est pertinent pour ces critères.
+                    """
 
-                # ... inside your loop, before building the results dict:
-                try:
-                    resp = requests.get(url, timeout=20)
-                    resp.raise_for_status()
-                    pdf_bytes = resp.content
-                    pdf_title = get_title_from_pdf_bytes(pdf_bytes, max_pages=3)
-                except Exception:
-                    pdf_title = "PDF Document"  # fallback
-
-                # Now use the detected title (with a safe fallback)
-                title_value = pdf_title if pdf_title and pdf_title != "Non trouvé" else "PDF Document"
-
-                if is_relevant:
-                    results.append({
-                        "seed": seed,
-                        "url": url,
-                        "title": title_value,
-                        "content": pdf_text,
-                        "matched_keywords": "AI-Relevant",
-                        "snippet": pdf_text[:1500],
-                        "last_date": last_date,
-                        "summary": summarize_content(pdf_text) if pdf_text else "",
-                        "pdf_source": {
-                            "pdf_url": url,
-                            "parent_urls": parent_urls
-                        }
-                    })
-                pages_processed += 1
-
-
-                # if is_relevant:
-                #     results.append({
-                #         "seed": seed,
-                #         "url": url,
-                #         "title": "PDF Document",
-                #         "content": pdf_text,
-                #         "matched_keywords": "AI-Relevant",
-                #         "snippet": pdf_text[:1500],
-                #         "last_date": last_date,
-                #         "summary": summarize_content(pdf_text) if pdf_text else "",
-                #         "pdf_source": {
-                #             "pdf_url": url,
-                #             "parent_urls": parent_urls
-                #         }
-                #     })
-                # pages_processed += 1
-
-            # ------------------- HTML -------------------
-            elif "html" in content_type:
-                text, links, title = extract_text_and_links(resp.text, resp.url)
-
-                # --- AI date extraction ---
-                last_date = get_date_from_html(resp.text, resp)  # fallback
-                ai_date = get_date_from_text_ai(text)
-                if ai_date != "Non trouvé":
-                    last_date = ai_date
-
-                purpose = """
-                Collecter toutes les informations pertinentes sur l'entreprise, incluant :
-                - Les rapports financiers et résultats (bilans, comptes annuels, chiffres clés),
-                - Les communiqués de presse officiels,
-                - Les actualités importantes concernant l'entreprise (nouveaux partenariats, fusions, acquisitions, changements dans la direction, etc.).
-                Répondre uniquement si le texte est pertinent pour ces critères.
-                """
-
-                is_relevant = check_relevance_with_ai(text, purpose=purpose)
-
-                if is_relevant:
-                    results.append({
-                        "seed": seed,
-                        "url": url,
-                        "title": title,
-                        "content": text,
-                        "matched_keywords": "AI-Relevant",
-                        "snippet": text[:1500],
-                        "last_date": last_date,
-                        "summary": summarize_content(text) if text else "",
-                        "pdf_source": {
-                            "pdf_url": "",           # Not a PDF itself
-                            "parent_urls": [url]     # This page can be n-1 for PDFs
-                        }
-                    })
-                pages_processed += 1
-
-                # Discover new links
-                if depth < max_depth:
-                    for link in links:
-                        if same_domain(link, seed) and link not in visited:
-                            q.append((link, depth+1, parent_urls + [url]))
-
-        except Exception as e:
-            print(f"[ERROR][REQUEST] {url} | {e}")
-            continue
+                    with tracer.span("relevance") as rel_span:
+                        is_relevant = check_relevance_with_ai(stage_text(pdf_pages, "relevance"), purpose=purpose)
+                        rel_span.set(relevant=bool(is_relevant))
+
+
+                    if is_relevant:
+                        # Title from the pages and metadata the workers already extracted
+                        # (the PDF is not parsed again in this thread)
+                        try:
+                            with tracer.span("title"):
+                                pdf_title = get_title_from_text(stage_text(pdf_pages, "title"), pdf_meta_title)
+                        except Exception:
+                            pdf_title = "PDF Document"  # fallback
+                        title_value = pdf_title if pdf_title and pdf_title != "Non trouvé" else "PDF Document"
+
+                        with tracer.span("summary"):
+                            summary = summarize_content(pdf_text) if pdf_text else ""
+                        results.append({
+                            "seed": seed,
+                            "url": url,
+                            "title": title_value,
+                            "content": pdf_text,
+                            "matched_keywords": "AI-Relevant",
+                            "snippet": pdf_text[:1500],
+                            "last_date": last_date,
+                            "summary": summary,
+                            "raw_body": pdf_bytes if STORE_RAW_BODY else None,
+                            "content_hash": content_hash,
+                            "validators": response_validators(resp),
+                            "pdf_source": {
+                                "pdf_url": url,
+                                "parent_urls": parent_urls
+                            }
+                        })
+                        counts["changed"] += 1
+                        root.set(outcome="changed")
+                        _notify(on_resource, results[-1])
+                    else:
+                        counts["irrelevant"] += 1
+                        root.set(outcome="irrelevant")
+                        if fingerprints:
+                            fingerprints.record(url, content_hash, **response_validators(resp))
+                    pages_processed += 1
+
+
+                    # if is_relevant:
+                    #     results.append({
+                    #         "seed": seed,
+                    #         "url": url,
+                    #         "title": "PDF Document",
+                    #         "content": pdf_text,
+                    #         "matched_keywords": "AI-Relevant",
+                    #         "snippet": pdf_text[:1500],
+                    #         "last_date": last_date,
+                    #         "summary": summarize_content(pdf_text) if pdf_text else "",
+                    #         "pdf_source": {
+                    #             "pdf_url": url,
+                    #             "parent_urls": parent_urls
+                    #         }
+                    #     })
+                    # pages_processed += 1
+
+                # ------------------- HTML -------------------
+                elif "html" in content_type:
+                    with metrics.timer("parse_seconds", kind="html"), tracer.span("parse", kind="html"):
+                        blocks, links, title = extract_blocks_and_links(resp.text, resp.url)
+                        # Strip site template (menus, banners, footers) before the AI stages
+                        text = template_learner.clean_page(seed, url, blocks)
+
+                    # Fingerprint of the whole page text: independent of what the learner strips
+                    content_hash = compute_content_fingerprint(" ".join(blocks))
+                    if _unchanged(fingerprints, url, content_hash):
+                        fingerprints.record(url, content_hash, **response_validators(resp))
+                        counts["unchanged"] += 1
+                        root.set(outcome="unchanged")
+                        is_relevant = None  # unchanged: no AI stage
+                    else:
+                        # --- AI date extraction ---
+                        last_date = get_date_from_html(resp.text, resp)  # fallback
+                        with tracer.span("date"):
+                            ai_date = get_date_from_text_ai(text)
+                        if ai_date != "Non trouvé":
+                            last_date = ai_date
+
+                        purpose = """
+                        Collecter toutes les informations pertinentes sur l'entreprise, incluant :
+                        - Les rapports financiers et résultats (bilans, comptes annuels, chiffres clés),
+                        - Les communiqués de presse officiels,
+                        - Les actualités importantes concernant l'entreprise (nouveaux partenariats, fusions, acquisitions, changements dans la direction, etc.).
+                        Répondre uniquement si le texte est pertinent pour ces critères.
+                        """
+
+                        with tracer.span("relevance") as rel_span:
+                            is_relevant = check_relevance_with_ai(text, purpose=purpose)
+                            rel_span.set(relevant=bool(is_relevant))
+
+                    if is_relevant:
+                        with tracer.span("summary"):
+                            summary = summarize_content(text) if text else ""
+                        results.append({
+                            "seed": seed,
+                            "url": url,
+                            "title": title,
+                            "content": text,
+                            "matched_keywords": "AI-Relevant",
+                            "snippet": text[:1500],
+                            "last_date": last_date,
+                            "summary": summary,
+                            "raw_body": resp.content if STORE_RAW_BODY else None,
+                            "content_hash": content_hash,
+                            "validators": response_validators(resp),
+                            "pdf_source": {
+                                "pdf_url": "",           # Not a PDF itself
+                                "parent_urls": [url]     # This page can be n-1 for PDFs
+                            }
+                        })
+                        counts["changed"] += 1
+                        root.set(outcome="changed")
+                        _notify(on_resource, results[-1])
+                    elif is_relevant is not None:
+                        counts["irrelevant"] += 1
+                        root.set(outcome="irrelevant")
+                        if fingerprints:
+                            fingerprints.record(url, content_hash, **response_validators(resp))
+                    pages_processed += 1
+
+                    # Discover new links
+                    if depth < max_depth:
+                        for link in links:
+                            if same_domain(link, seed) and link not in visited:
+                                q.append((link, depth+1, parent_urls + [url]))
+
+            except Exception as e:
+                print(f"[ERROR][REQUEST] {url} | {e}")
+                continue
 
-    print(f"[CRAWLER] Finished. Processed {pages_processed} pages. Results found: {len(results)}")
+    template_learner.save()
+    print(template_learner.format_report(seed))
+    print(f"[CRAWLER] Finished. Processed {pages_processed} pages. Results found: {len(results)} "
+          f"(unchanged: {counts['unchanged'] + counts['not_modified']})")
     return results
@@ -0,0 +1,71 @@
+from __future__ import annotations
+from typing import TYPE_CHECKING, Any, Optional, Sequence, Tuple
+
+from . import repository as repo
+from .engine import async_session_scope
+from .models import EmbeddingArticle as Article
+
+if TYPE_CHECKING:
+    from sqlalchemy.ext.asyncio import AsyncSession
+
+# Async counterparts of db/repository.py. Each function runs the sync implementation
+# through AsyncSession.run_sync, so the SQL and the similarity policy stay in one place
+# while the I/O is awaited on the async engine's pool (see db/engine.py).
+# Lazy attributes (e.g. Article.content) cannot be loaded outside run_sync: use get_content.
+
+# --------------------- reads / writes ---------------------
+
+async def get_hash_by_url(session: AsyncSession, url: str) -> Optional[str]:
+    return await session.run_sync(repo.get_hash_by_url, url)
+
+async def upsert_article_by_url(session: AsyncSession, **kwargs) -> Article:
+    return await session.run_sync(lambda s: repo.upsert_article_by_url(s, **kwargs))
+
+async def vector_knn(session: AsyncSession, query_vec: Sequence[float], k: int = 10,
+                     probes: int | None = None) -> list[Article]:
+    return await session.run_sync(repo.vector_knn, query_vec, k, probes)
+
+async def get_content(session: AsyncSession, article_id: Any) -> Optional[str]:
+    return await session.run_sync(repo.get_content, article_id)
+
+# --------------------- similarity policy ---------------------
+
+async def distance_to_url(session: AsyncSession, url: str, vec: Sequence[float]) -> Optional[float]:
+    return await session.run_sync(repo.distance_to_url, url, vec)
+
+async def topk_nearest(session: AsyncSession, vec: Sequence[float], k: int = repo.SEARCH_K) -> list[Tuple[str, float]]:
+    return await session.run_sync(repo.topk_nearest, vec, k)
+
+async def upsert_by_similarity(session: AsyncSession, **kwargs) -> Tuple[str, Optional[float]]:
+    return await session.run_sync(lambda s: repo.upsert_by_similarity(s, **kwargs))
+
+async def upsert_by_similarity_batch(session: AsyncSession, items) -> list[Tuple[str, Optional[float]]]:
+    return await session.run_sync(repo.upsert_by_similarity_batch, items)
+
+async def add_alias_urls(session: AsyncSession, pairs: Sequence[Tuple[str, str]]) -> None:
+    await session.run_sync(repo.add_alias_urls, pairs)
+
+async def canonical_for_alias(session: AsyncSession, url: str) -> Optional[str]:
+    return await session.run_sync(repo.canonical_for_alias, url)
+
+# --------- convenience wrappers with automatic sessions ----------
+
+async def get_hash_by_url_tx(url: str) -> Optional[str]:
+    async with async_session_scope() as s:
+        return await get_hash_by_url(s, url)
+
+async def upsert_article_by_url_tx(**kwargs) -> Article:
+    async with async_session_scope() as s:
+        return await upsert_article_by_url(s, **kwargs)
+
+async def upsert_by_similarity_batch_tx(items) -> list[Tuple[str, Optional[float]]]:
+    async with async_session_scope() as s:
+        return await upsert_by_similarity_batch(s, items)
+
+async def is_known_alias_tx(url: str) -> bool:
+    async with async_session_scope() as s:
+        return await canonical_for_alias(s, url) is not None
+
+async def vector_knn_tx(query_vec: Sequence[float], k: int = 10, probes: int | None = None) -> list[Article]:
+    async with async_session_scope() as s:
+        return await s.run_sync(repo.vector_knn, query_vec, k, probes)
@@ -0,0 +1,109 @@
+from __future__ import annotations
+from typing import Any, Mapping, Optional, Sequence, Tuple
+
+from . import repository as repo
+from .config import get_settings
+from .engine import session_scope
+from utils.metrics import metrics
+
+# Pluggable storage for the change-detection path (utils/check_for_change.py).
+# STORAGE_BACKEND=postgres (default): Supabase/Postgres + pgvector, db/repository.py
+# STORAGE_BACKEND=local              : embedded SQLite + NumPy memmap, db/local_store.py
+# Both expose the same methods, each running in its own transaction.
+
+
+class PostgresStorage:
+    """db/repository.py functions behind the storage interface (one session per call)."""
+
+    def get_hash_by_url(self, url: str) -> Optional[str]:
+        return repo.get_hash_by_url_tx(url)
+
+    def get_content(self, article_id: Any) -> Optional[str]:
+        with session_scope() as s:
+            return repo.get_content(s, article_id)
+
+    def distance_to_url(self, url: str, vec: Sequence[float]) -> Optional[float]:
+        with session_scope() as s:
+            return repo.distance_to_url(s, url, vec)
+
+    def topk_nearest(self, vec: Sequence[float], k: int = repo.SEARCH_K,
+                     seed: Optional[str] = None) -> list[Tuple[str, float]]:
+        with session_scope() as s:
+            return repo.topk_nearest(s, vec, k, seed=seed)
+
+    def search_knn(self, query_vec: Sequence[float], k: int = 10, **filters: Any) -> list[Tuple[Any, float]]:
+        """Filtered KNN: seed, since, until, content_type, sent_to_stakeholders (see repo.knn_filters)."""
+        return repo.search_knn_tx(query_vec, k, **filters)
+
+    def vector_knn(self, query_vec: Sequence[float], k: int = 10, probes: int | None = None) -> list:
+        return repo.vector_knn_tx(query_vec, k, probes)
+
+    def is_known_alias(self, url: str) -> bool:
+        return repo.is_known_alias_tx(url)
+
+    def seed_counts(self, seeds: Sequence[str], **kwargs) -> dict:
+        with session_scope() as s:
+            return repo.seed_counts(s, seeds, **kwargs)
+
+    def browse_articles(self, seeds: Sequence[str], **kwargs) -> list[dict]:
+        """One page of the results view (see repo.browse_articles)."""
+        with session_scope() as s:
+            return repo.browse_articles(s, seeds, **kwargs)
+
+    def get_summary(self, url: str) -> str:
+        with session_scope() as s:
+            return repo.get_summary(s, url)
+
+    def add_alias_urls(self, pairs: Sequence[Tuple[str, str]]) -> None:
+        with session_scope() as s:
+            repo.add_alias_urls(s, pairs)
+
+    def upsert_by_similarity(self, *, resource: Mapping[str, Any], embedding: Sequence[float],
+                             metadata_envelope: dict) -> Tuple[str, Optional[float]]:
+        with session_scope() as s:
+            return repo.upsert_by_similarity(s, resource=resource, embedding=embedding,
+                                             metadata_envelope=metadata_envelope)
+
+    def upsert_by_similarity_batch(
+        self, items: Sequence[Tuple[Mapping[str, Any], Sequence[float], dict]],
+    ) -> list[Tuple[str, Optional[float]]]:
+        with session_scope() as s:
+            return repo.upsert_by_similarity_batch(s, items)
+
+
+class _Timed:
+    """Forwards to a backend, timing each public method call as db_seconds{op=<method>}."""
+
+    def __init__(self, backend):
+        self._backend = backend
+
+    def __getattr__(self, name: str):
+        attr = getattr(self._backend, name)
+        if name.startswith("_") or not callable(attr):
+            return attr
+
+        def timed(*args, **kwargs):
+            with metrics.timer("db_seconds", op=name):
+                return attr(*args, **kwargs)
+        return timed
+
+
+_storage = None
+
+
+def get_storage():
+    """Return the configured storage backend (created once per process)."""
+    global _storage
+    if _storage is None:
+        cfg = get_settings()
+        backend = cfg["storage_backend"]
+        if backend == "local":
+            from .local_store import LocalStore
+            _storage = LocalStore(cfg["local_store_dir"])
+        elif backend == "postgres":
+            _storage = PostgresStorage()
+        else:
+            raise RuntimeError(f"Unknown STORAGE_BACKEND: {backend!r} (expected 'postgres' or 'local')")
+        _storage = _Timed(_storage)
+        print(f"[STORAGE] backend={backend}")
+    return _storage
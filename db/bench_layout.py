@@ -0,0 +1,122 @@
+"""
+Benchmark: KNN and listing latency with the full text stored in the vector table
+("wide", the previous layout) versus in a separate content table ("narrow").
+
+Runs against the configured database in a scratch schema that is dropped at the end:
+
+    python -m db.bench_layout --rows 100000 --queries 50
+"""
+
+from __future__ import annotations
+
+import argparse
+import statistics
+import time
+
+import numpy as np
+from sqlalchemy import text
+
+from .engine import get_engine
+from .models import DIM
+
+SCHEMA = "bench_layout"
+
+
+def _timed(conn, sql: str, params: dict, runs: int) -> list[float]:
+    out = []
+    for _ in range(runs):
+        t0 = time.perf_counter()
+        conn.execute(text(sql), params).fetchall()
+        out.append((time.perf_counter() - t0) * 1000)
+    return out
+
+
+def _summary(ms: list[float]) -> str:
+    ms = sorted(ms)
+    p95 = ms[min(len(ms) - 1, int(len(ms) * 0.95))]
+    return f"p50={statistics.median(ms):7.2f} ms  p95={p95:7.2f} ms"
+
+
+def _load(conn, rows: int, body_chars: int) -> None:
+    """Same synthetic rows in both layouts; vectors and bodies are generated server-side."""
+    conn.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+    conn.execute(text(f"CREATE SCHEMA {SCHEMA}"))
+    conn.execute(text(f"""
+        CREATE TABLE {SCHEMA}.wide (
+            id uuid PRIMARY KEY DEFAULT gen_random_uuid(), title text, content text NOT NULL,
+            embedding vector({DIM}) NOT NULL, url text, metadata jsonb,
+            created_at timestamptz NOT NULL DEFAULT now())
+    """))
+    repeats = max(1, body_chars // 32)
+    conn.execute(text(f"""
+        INSERT INTO {SCHEMA}.wide (title, content, embedding, url, metadata, created_at)
+        SELECT 'Document ' || g, repeat(md5(random()::text), {repeats}),
+               (SELECT array_agg(random())::real[] FROM generate_series(1, {DIM}) WHERE g > 0)::vector,
+               'https://bench.local/doc/' || g, jsonb_build_object('seed', 'https://bench.local/'),
+               now() - make_interval(secs => g)
+        FROM generate_series(1, :rows) AS g
+    """), {"rows": rows})
+    conn.execute(text(f"""
+        CREATE TABLE {SCHEMA}.narrow AS
+        SELECT id, title, embedding, url, metadata, created_at FROM {SCHEMA}.wide
+    """))
+    conn.execute(text(f"ALTER TABLE {SCHEMA}.narrow ADD PRIMARY KEY (id)"))
+    conn.execute(text(f"""
+        CREATE TABLE {SCHEMA}.contents AS SELECT id AS article_id, content FROM {SCHEMA}.wide
+    """))
+    lists = max(1, rows // 1000)
+    for table in ("wide", "narrow"):
+        conn.execute(text(
+            f"CREATE INDEX ON {SCHEMA}.{table} USING ivfflat (embedding vector_cosine_ops) WITH (lists = {lists})"
+        ))
+        conn.execute(text(f"CREATE INDEX ON {SCHEMA}.{table} (created_at DESC)"))
+        conn.execute(text(f"ANALYZE {SCHEMA}.{table}"))
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__)
+    ap.add_argument("--rows", type=int, default=100_000)
+    ap.add_argument("--queries", type=int, default=50)
+    ap.add_argument("--body-chars", type=int, default=20_000, help="content size per row (PDF-like)")
+    ap.add_argument("--keep", action="store_true", help="keep the scratch schema")
+    args = ap.parse_args()
+
+    engine = get_engine()
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        t0 = time.perf_counter()
+        _load(conn, args.rows, args.body_chars)
+        print(f"[BENCH] loaded {args.rows} rows in {time.perf_counter() - t0:.0f}s")
+
+        for table in ("wide", "narrow"):
+            size = conn.execute(text(f"SELECT pg_total_relation_size('{SCHEMA}.{table}')")).scalar()
+            print(f"[BENCH] {table:6s} table size {size / 2**20:,.0f} MB")
+
+        conn.execute(text("SET ivfflat.probes = 10"))
+        q = np.random.default_rng(0).random(DIM, dtype=np.float32)
+        vec = "[" + ",".join(f"{x:.6f}" for x in q) + "]"
+        queries = {
+            # select(Article) in vector_knn_tx: whole row
+            "knn":     "SELECT * FROM {t} ORDER BY embedding <=> CAST(:v AS vector) LIMIT 10",
+            # dashboard listing: most recent rows
+            "listing": "SELECT * FROM {t} ORDER BY created_at DESC LIMIT 50",
+        }
+        for name, sql in queries.items():
+            for table in ("wide", "narrow"):
+                _timed(conn, sql.format(t=f"{SCHEMA}.{table}"), {"v": vec}, 3)  # warm cache
+                ms = _timed(conn, sql.format(t=f"{SCHEMA}.{table}"), {"v": vec}, args.queries)
+                print(f"[BENCH] {name:8s} {table:6s} {_summary(ms)}")
+
+        # Narrow layout, full text fetched lazily for one hit
+        ms = _timed(conn, f"""
+            SELECT c.content FROM (SELECT id FROM {SCHEMA}.narrow
+                                   ORDER BY embedding <=> CAST(:v AS vector) LIMIT 1) AS k
+            JOIN {SCHEMA}.contents AS c ON c.article_id = k.id
+        """, {"v": vec}, args.queries)
+        print(f"[BENCH] knn+body narrow {_summary(ms)}")
+
+        if not args.keep:
+            conn.execute(text(f"DROP SCHEMA {SCHEMA} CASCADE"))
+
+
+if __name__ == "__main__":
+    main()
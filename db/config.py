@@ -1,6 +1,8 @@
 from __future__ import annotations
 import os
-from typing import Any, Dict
+from typing import Any, Dict, Optional
+
+from config import CACHE_DIR
 
 def get_settings() -> Dict[str, Any]:
     try:
@@ -31,4 +33,39 @@ def get_settings() -> Dict[str, Any]:
         "echo": str(get("SQLALCHEMY_ECHO", "false")).lower() in {"1", "true", "yes", "on"},
         "embedding_dim": int(str(get("EMBEDDING_DIM", "1536"))),
         "set_ivfflat_probes": int(str(get("IVFFLAT_PROBES", "10"))),
+        # Vector index (see db/schema.py): "ivfflat" or "hnsw"
+        "vector_index": str(get("VECTOR_INDEX", "ivfflat")).strip().lower(),
+        "ivfflat_lists": int(str(get("IVFFLAT_LISTS", "0"))),          # 0 = sized from row count
+        "ivfflat_stale_ratio": float(str(get("IVFFLAT_STALE_RATIO", "2.0"))),
+        "hnsw_m": int(str(get("HNSW_M", "16"))),
+        "hnsw_ef_construction": int(str(get("HNSW_EF_CONSTRUCTION", "64"))),
+        "hnsw_ef_search": int(str(get("HNSW_EF_SEARCH", "40"))),
+        # Filtered KNN (db/repository.py::search_knn): pgvector >= 0.8 iterative index scans
+        # ("relaxed_order" or "off"), and per-seed partial vector indexes for sources with
+        # at least this many rows (0 = none)
+        "iterative_scan": str(get("VECTOR_ITERATIVE_SCAN", "relaxed_order")).strip().lower(),
+        "seed_index_min_rows": int(str(get("SEED_VECTOR_INDEX_MIN_ROWS", "0"))),
+        # Near-duplicate checks against documents of the same seed only ("seed") or all ("all")
+        "near_dup_scope": str(get("NEAR_DUP_SCOPE", "seed")).strip().lower(),
+        "index_maintenance_work_mem": str(get("INDEX_MAINTENANCE_WORK_MEM", "")).strip(),
+        "auto_schema": str(get("DB_AUTO_SCHEMA", "true")).lower() in {"1", "true", "yes", "on"},
+        # Connection pool (shared by the sync and async engines, each has its own pool)
+        "pool_size": int(str(get("DB_POOL_SIZE", "5"))),
+        "max_overflow": int(str(get("DB_MAX_OVERFLOW", "10"))),
+        "pool_timeout": float(str(get("DB_POOL_TIMEOUT", "30"))),      # seconds to wait for a connection
+        "pool_recycle": int(str(get("DB_POOL_RECYCLE", "1800"))),      # seconds, -1 = never
+        "statement_timeout_ms": int(str(get("DB_STATEMENT_TIMEOUT_MS", "0"))),  # 0 = server default
+        # psycopg server-side prepared statements: prepared after N executions of the same
+        # query; "off" for transaction-mode poolers (PgBouncer / Supabase port 6543)
+        "prepare_threshold": _optional_int(get("DB_PREPARE_THRESHOLD", "5")),
+        # Storage backend (see db/backends.py): "postgres" or "local" (SQLite + NumPy memmap)
+        "storage_backend": str(get("STORAGE_BACKEND", "postgres")).strip().lower(),
+        "local_store_dir": str(get("LOCAL_STORE_DIR", os.path.join(CACHE_DIR, "local_store"))).strip(),
     }
+
+
+def _optional_int(value: Any) -> Optional[int]:
+    s = str(value if value is not None else "").strip().lower()
+    if s in {"", "off", "none", "false", "no"}:
+        return None
+    return int(s)
@@ -0,0 +1,58 @@
+from __future__ import annotations
+
+import re
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Optional
+
+# `last_date` values come from HTTP headers (RFC 1123), <time>/<meta> tags, the LLM
+# (ISO dates) or the "Non trouvé" sentinel; this normalizes them to aware datetimes.
+
+_FRENCH_MONTHS = {
+    "janvier": 1, "février": 2, "fevrier": 2, "mars": 3, "avril": 4, "mai": 5, "juin": 6,
+    "juillet": 7, "août": 8, "aout": 8, "septembre": 9, "octobre": 10, "novembre": 11,
+    "décembre": 12, "decembre": 12,
+}
+_FRENCH_DATE = re.compile(r"^(\d{1,2})(?:er)?\s+([a-zéèûô]+)\s+(\d{4})$", re.I)
+_NUMERIC_DATE = re.compile(r"^(\d{1,2})[/.-](\d{1,2})[/.-](\d{4})$")
+
+
+def parse_publication_date(value: Optional[str]) -> Optional[datetime]:
+    """Parse a stored `last_date` string into a UTC-aware datetime, or None if unknown."""
+    s = str(value or "").strip()
+    if not s or s.lower().startswith("non trouv"):
+        return None
+
+    dt: Optional[datetime] = None
+    try:
+        dt = datetime.fromisoformat(s.replace("Z", "+00:00"))
+    except ValueError:
+        pass
+
+    if dt is None:
+        try:
+            dt = parsedate_to_datetime(s)  # RFC 1123 / HTTP Last-Modified
+        except (TypeError, ValueError):
+            pass
+
+    if dt is None:
+        m = _FRENCH_DATE.match(s)
+        if m and m.group(2).lower() in _FRENCH_MONTHS:
+            try:
+                dt = datetime(int(m.group(3)), _FRENCH_MONTHS[m.group(2).lower()], int(m.group(1)))
+            except ValueError:
+                return None
+
+    if dt is None:
+        m = _NUMERIC_DATE.match(s)  # French order: dd/mm/yyyy
+        if m:
+            try:
+                dt = datetime(int(m.group(3)), int(m.group(2)), int(m.group(1)))
+            except ValueError:
+                return None
+
+    if dt is None:
+        return None
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return dt.astimezone(timezone.utc)
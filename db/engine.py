@@ -2,18 +2,23 @@ from __future__ import annotations
 
 import tempfile
 from urllib.parse import quote_plus
-from contextlib import contextmanager
-from typing import Iterator, Optional
+from contextlib import asynccontextmanager, contextmanager
+from typing import TYPE_CHECKING, AsyncIterator, Iterator, Optional
 
 from sqlalchemy import create_engine, event, text
 from sqlalchemy.engine import Engine
 from sqlalchemy.orm import sessionmaker, Session
-from pgvector.psycopg import register_vector
+from pgvector.psycopg import register_vector, register_vector_async
 
 from .config import get_settings
 
+if TYPE_CHECKING:  # sqlalchemy.ext.asyncio needs greenlet; only imported when the async engine is used
+    from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker
+
 _engine: Optional[Engine] = None
 _SessionLocal: Optional[sessionmaker] = None
+_async_engine: Optional["AsyncEngine"] = None
+_AsyncSessionLocal: Optional["async_sessionmaker"] = None
 
 
 def _build_connect_args(cfg: dict) -> dict:
@@ -57,6 +62,31 @@ def _build_connect_args(cfg: dict) -> dict:
     return connect_args
 
 
+def _session_args(cfg: dict) -> dict:
+    """psycopg session options: statement timeout and prepared-statement caching."""
+    args: dict = {"prepare_threshold": cfg.get("prepare_threshold")}
+    if cfg.get("statement_timeout_ms"):
+        args["options"] = f"-c statement_timeout={int(cfg['statement_timeout_ms'])}"
+    return args
+
+
+def _pool_args(cfg: dict) -> dict:
+    return {
+        "pool_size": cfg["pool_size"],
+        "max_overflow": cfg["max_overflow"],
+        "pool_timeout": cfg["pool_timeout"],
+        "pool_recycle": cfg["pool_recycle"],
+        "pool_pre_ping": True,
+    }
+
+
+def _dsn(cfg: dict) -> str:
+    if not (cfg["host"] and cfg["user"] and cfg["password"]):
+        raise RuntimeError("DB config missing: DATABASE_HOST/USER/PASSWORD")
+    pwd = quote_plus(cfg["password"])
+    return f"postgresql+psycopg://{cfg['user']}:{pwd}@{cfg['host']}:{cfg['port']}/{cfg['name']}"
+
+
 def get_engine() -> Engine:
     """
     Create (or return) a global SQLAlchemy Engine.
@@ -70,26 +100,15 @@ def get_engine() -> Engine:
             _SessionLocal = sessionmaker(bind=_engine, expire_on_commit=False, class_=Session)
         return _engine
 
-    cfg = get_settings()
-    user = cfg["user"]
-    pwd = quote_plus(cfg["password"])
-    host = cfg["host"]
-    port = cfg["port"]
-    db = cfg["name"]
     cfg = get_settings()
     print("DB SSL cfg:", {"sslmode": cfg["sslmode"], "sslroot": cfg["sslroot"], "has_ca": bool(cfg["ca_pem"])})
 
-    if not (host and user and cfg["password"]):
-        raise RuntimeError("DB config missing: DATABASE_HOST/USER/PASSWORD")
-
-    dsn = f"postgresql+psycopg://{user}:{pwd}@{host}:{port}/{db}"
-
     _engine = create_engine(
-        dsn,
-        connect_args=_build_connect_args(cfg),
-        pool_pre_ping=True,
+        _dsn(cfg),
+        connect_args={**_build_connect_args(cfg), **_session_args(cfg)},
         echo=cfg.get("echo", False),
         future=True,
+        **_pool_args(cfg),
     )
 
     @event.listens_for(_engine, "connect")
@@ -102,6 +121,12 @@ def get_engine() -> Engine:
     with _engine.begin() as conn:
         conn.execute(text("CREATE EXTENSION IF NOT EXISTS vector"))
 
+    # Create missing table/indexes; stale or mismatched vector indexes are only
+    # reported here (rebuild with `python -m db.schema`).
+    if cfg.get("auto_schema", True):
+        from .schema import ensure_schema, format_report
+        print(format_report(ensure_schema(_engine, rebuild=False)))
+
     # Initialize the session factory whenever we (re)initialize the engine.
     _SessionLocal = sessionmaker(bind=_engine, expire_on_commit=False, class_=Session)
 
@@ -134,3 +159,62 @@ def session_scope() -> Iterator[Session]:
         raise
     finally:
         session.close()
+
+
+# --------------------- async engine ---------------------
+
+def get_async_engine() -> AsyncEngine:
+    """
+    Create (or return) a global AsyncEngine (psycopg async driver) with the same
+    SSL, pool and session settings as the sync engine. It has its own pool, so
+    concurrent workers can await DB I/O instead of holding threads.
+    Schema setup still goes through the sync engine (once per process).
+    """
+    global _async_engine, _AsyncSessionLocal
+    if _async_engine is not None:
+        return _async_engine
+
+    from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+    cfg = get_settings()
+    if cfg.get("auto_schema", True):
+        get_engine()  # extension + ensure_schema
+
+    _async_engine = create_async_engine(
+        _dsn(cfg),
+        connect_args={**_build_connect_args(cfg), **_session_args(cfg)},
+        echo=cfg.get("echo", False),
+        **_pool_args(cfg),
+    )
+
+    @event.listens_for(_async_engine.sync_engine, "connect")
+    def _on_connect(dbapi_conn, _):  # noqa: F811 - SQLAlchemy handler signature
+        # dbapi_conn adapts a psycopg AsyncConnection; register pgvector on it
+        dbapi_conn.run_async(register_vector_async)
+
+    _AsyncSessionLocal = async_sessionmaker(bind=_async_engine, expire_on_commit=False, class_=AsyncSession)
+    return _async_engine
+
+
+@asynccontextmanager
+async def async_session_scope() -> AsyncIterator[AsyncSession]:
+    """Async counterpart of session_scope (commit on success, rollback on error)."""
+    if _AsyncSessionLocal is None:
+        get_async_engine()
+    session = _AsyncSessionLocal()
+    try:
+        yield session
+        await session.commit()
+    except Exception:
+        await session.rollback()
+        raise
+    finally:
+        await session.close()
+
+
+async def dispose_async_engine() -> None:
+    """Close the async pool (call before the event loop shuts down)."""
+    global _async_engine, _AsyncSessionLocal
+    if _async_engine is not None:
+        await _async_engine.dispose()
+    _async_engine, _AsyncSessionLocal = None, None
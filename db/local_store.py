@@ -0,0 +1,453 @@
+from __future__ import annotations
+
+import json
+import os
+import sqlite3
+import threading
+import uuid
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Any, Mapping, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .models import DIM, compress_body, to_vector
+from .repository import (
+    CHANGE_DISTANCE, DUPLICATE_DISTANCE, SEARCH_K, SEED_SCOPED, canonical_url_of, like_pattern,
+    listing_row, typed_columns,
+)
+
+# Embedded storage backend: rows in SQLite, vectors in a float32 NumPy memmap
+# (one slot per article, unit-normalized so cosine distance is 1 - dot product).
+# Same API and thresholds as the Postgres backend (see db/backends.py); searches
+# are exact, which is fine for single-node volumes (~1e5 rows).
+
+_INITIAL_CAPACITY = 1024
+
+
+@dataclass
+class LocalArticle:
+    """Row returned by LocalStore.vector_knn (mirrors EmbeddingArticle's attributes)."""
+    id: str
+    title: Optional[str]
+    url: Optional[str]
+    source: Optional[str]
+    metadata_: Optional[dict]
+    sent_to_stakeholders: Optional[bool]
+    content_hash: Optional[str]
+    published_at: Optional[datetime]
+    content_type: Optional[str]
+    seed: Optional[str]
+    created_at: Optional[datetime]
+    updated_at: Optional[datetime]
+    embedding: np.ndarray
+    _store: "LocalStore" = field(repr=False, default=None)
+
+    @property
+    def content(self) -> Optional[str]:
+        """Full text, loaded on access like EmbeddingArticle.content."""
+        return self._store.get_content(self.id) if self._store else None
+
+
+class LocalStore:
+    def __init__(self, path: str, dim: int = DIM):
+        self.path = path
+        self.dim = dim
+        os.makedirs(path, exist_ok=True)
+        self._lock = threading.RLock()
+        self._db = sqlite3.connect(os.path.join(path, "articles.sqlite"), check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript("""
+            CREATE TABLE IF NOT EXISTS articles (
+                slot INTEGER PRIMARY KEY,           -- row of the vector memmap
+                id TEXT NOT NULL UNIQUE,
+                url TEXT UNIQUE,
+                title TEXT, source TEXT, metadata TEXT,
+                sent_to_stakeholders INTEGER,
+                content_hash TEXT, published_at TEXT, content_type TEXT, seed TEXT,
+                created_at TEXT NOT NULL,
+                updated_at TEXT                     -- last insert or meaningful update
+            );
+            CREATE TABLE IF NOT EXISTS article_contents (
+                article_id TEXT PRIMARY KEY, content TEXT NOT NULL, raw_body BLOB
+            );
+            CREATE TABLE IF NOT EXISTS url_aliases (
+                alias_url TEXT PRIMARY KEY, article_id TEXT NOT NULL,
+                canonical_url TEXT NOT NULL, created_at TEXT NOT NULL
+            );
+        """)
+        self._add_updated_at()
+        self._count = self._stored_count()
+        self._vectors_path = os.path.join(path, f"vectors.f32x{dim}")
+        self._vectors: Optional[np.memmap] = None
+        self._open_vectors(max(_INITIAL_CAPACITY, self._count))
+        self._undo: dict[int, np.ndarray] = {}  # slot -> committed vector overwritten in this transaction
+
+    def _add_updated_at(self) -> None:
+        """Stores created before updated_at existed: add it, equal to created_at."""
+        columns = {r[1] for r in self._db.execute("PRAGMA table_info(articles)")}
+        if "updated_at" not in columns:
+            self._db.execute("ALTER TABLE articles ADD COLUMN updated_at TEXT")
+            self._db.execute("UPDATE articles SET updated_at = created_at")
+        self._db.execute("CREATE INDEX IF NOT EXISTS articles_seed_updated ON articles (seed, updated_at)")
+        self._db.commit()
+
+    def _stored_count(self) -> int:
+        (count,) = self._db.execute("SELECT COALESCE(MAX(slot) + 1, 0) FROM articles").fetchone()
+        return int(count)
+
+    def _commit(self) -> None:
+        self._db.commit()
+        self._undo.clear()
+
+    def _rollback(self) -> None:
+        # Overwritten slots get their committed vector back; vectors written for new rows
+        # sit past the committed count and are overwritten later
+        self._db.rollback()
+        for slot, vec in self._undo.items():
+            self._vectors[slot] = vec
+        self._undo.clear()
+        self._count = self._stored_count()
+
+    # --------------------- vectors ---------------------
+
+    def _open_vectors(self, capacity: int) -> None:
+        size = capacity * self.dim * 4
+        if self._vectors is not None:
+            self._vectors.flush()
+            self._vectors = None
+        with open(self._vectors_path, "ab") as f:
+            if f.tell() < size:
+                f.truncate(size)
+        rows = os.path.getsize(self._vectors_path) // (self.dim * 4)
+        self._vectors = np.memmap(self._vectors_path, dtype=np.float32, mode="r+", shape=(rows, self.dim))
+
+    def _put_vector(self, slot: int, vec: Any) -> None:
+        if slot >= self._vectors.shape[0]:
+            self._open_vectors(max(slot + 1, self._vectors.shape[0] * 2))
+        if slot < self._count and slot not in self._undo:
+            self._undo[slot] = np.array(self._vectors[slot])
+        self._vectors[slot] = _unit(vec)
+
+    def _distances(self, vec: Any) -> np.ndarray:
+        """Cosine distance of `vec` to every stored vector (by slot)."""
+        return 1.0 - self._vectors[:self._count] @ _unit(vec)
+
+    # --------------------- reads ---------------------
+
+    def get_hash_by_url(self, url: str) -> Optional[str]:
+        with self._lock:
+            row = self._db.execute("SELECT content_hash FROM articles WHERE url = ?", (url,)).fetchone()
+        return row[0] if row else None
+
+    def get_content(self, article_id: Any) -> Optional[str]:
+        with self._lock:
+            row = self._db.execute(
+                "SELECT content FROM article_contents WHERE article_id = ?", (str(article_id),)
+            ).fetchone()
+        return row[0] if row else None
+
+    def distance_to_url(self, url: str, vec: Sequence[float]) -> Optional[float]:
+        with self._lock:
+            row = self._db.execute("SELECT slot FROM articles WHERE url = ?", (url,)).fetchone()
+            if not row:
+                return None
+            return float(1.0 - self._vectors[row[0]] @ _unit(vec))
+
+    def _filtered_slots(self, filters: Mapping[str, Any]) -> Optional[np.ndarray]:
+        """Slots matching knn_filters-style filters, or None when there is no filter."""
+        where, params = [], []
+        for key, op in (("seed", "seed = ?"), ("since", "published_at >= ?"),
+                        ("until", "published_at < ?"), ("content_type", "content_type = ?")):
+            value = filters.get(key)
+            if value is not None:
+                where.append(op)
+                params.append(_iso(value) if key in ("since", "until") else value)
+        if filters.get("sent_to_stakeholders") is not None:
+            where.append("COALESCE(sent_to_stakeholders, -1) = ?")
+            params.append(int(filters["sent_to_stakeholders"]))
+        if not where:
+            return None
+        rows = self._db.execute(f"SELECT slot FROM articles WHERE {' AND '.join(where)}", params)
+        return np.fromiter((r[0] for r in rows), dtype=np.int64)
+
+    def _knn_slots(self, vec: Any, k: int, filters: Optional[Mapping[str, Any]] = None) -> list[Tuple[int, float]]:
+        if self._count == 0 or k <= 0:
+            return []
+        slots = self._filtered_slots(filters or {})
+        if slots is None:
+            dist = self._distances(vec)
+            slots = np.arange(len(dist))
+        else:
+            dist = 1.0 - self._vectors[slots] @ _unit(vec)  # filter first: exact search on the subset
+        if not len(dist):
+            return []
+        k = min(k, len(dist))
+        top = np.argpartition(dist, k - 1)[:k]
+        top = top[np.argsort(dist[top])]
+        return [(int(slots[i]), float(dist[i])) for i in top]
+
+    def topk_nearest(self, vec: Sequence[float], k: int = SEARCH_K,
+                     seed: Optional[str] = None) -> list[Tuple[str, float]]:
+        """[(url, distance)] for the k nearest rows by cosine distance (within `seed` if given)."""
+        with self._lock:
+            hits = self._knn_slots(vec, k, {"seed": seed})
+            urls = self._urls_by_slot([s for s, _ in hits])
+        return [(urls[s], d) for s, d in hits if urls.get(s)]
+
+    def search_knn(self, query_vec: Sequence[float], k: int = 10, *, probes: int | None = None,
+                   **filters: Any) -> list[Tuple[LocalArticle, float]]:
+        """Filtered cosine KNN (same filters as db.repository.search_knn); exact."""
+        with self._lock:
+            hits = self._knn_slots(query_vec, k, filters)
+            if not hits:
+                return []
+            slots = [s for s, _ in hits]
+            marks = ",".join("?" * len(slots))
+            rows = {r[0]: r for r in self._db.execute(
+                "SELECT slot, id, title, url, source, metadata, sent_to_stakeholders, content_hash,"
+                f" published_at, content_type, seed, created_at, updated_at FROM articles WHERE slot IN ({marks})",
+                slots,
+            )}
+            return [(self._article(rows[s]), d) for s, d in hits if s in rows]
+
+    def vector_knn(self, query_vec: Sequence[float], k: int = 10, probes: int | None = None) -> list[LocalArticle]:
+        """Cosine KNN returning whole rows (`probes` is accepted for API parity; search is exact)."""
+        return [a for a, _ in self.search_knn(query_vec, k)]
+
+    def _browse_where(self, seeds: Sequence[str], since: Optional[datetime],
+                      query: Optional[str]) -> Tuple[str, list]:
+        where = f"seed IN ({','.join('?' * len(seeds))})"
+        params: list = list(seeds)
+        if since is not None:
+            where += " AND updated_at >= ?"  # inserted or meaningfully updated since
+            params.append(_iso(since))
+        if query:
+            # LIKE is case-insensitive for ASCII, like ILIKE on the Postgres side
+            where += " AND (title LIKE ? ESCAPE '\\' OR url LIKE ? ESCAPE '\\')"
+            params += [like_pattern(query)] * 2
+        return where, params
+
+    def seed_counts(self, seeds: Sequence[str], *, since: Optional[datetime] = None,
+                    query: Optional[str] = None) -> dict[str, int]:
+        """Same as db.repository.seed_counts."""
+        if not seeds:
+            return {}
+        where, params = self._browse_where(seeds, since, query)
+        with self._lock:
+            return dict(self._db.execute(f"SELECT seed, COUNT(*) FROM articles WHERE {where} GROUP BY seed", params))
+
+    def browse_articles(self, seeds: Sequence[str], *, since: Optional[datetime] = None,
+                        query: Optional[str] = None, offset: int = 0, limit: int = 50) -> list[dict]:
+        """Same rows as db.repository.browse_articles."""
+        if not seeds:
+            return []
+        where, params = self._browse_where(seeds, since, query)
+        with self._lock:
+            rows = self._db.execute(f"""
+                SELECT seed, title, url, json_extract(metadata, '$.title'), json_extract(metadata, '$.last_date'),
+                       published_at, created_at, updated_at, content_type
+                FROM articles WHERE {where}
+                ORDER BY seed, published_at IS NULL, published_at DESC, updated_at DESC
+                LIMIT ? OFFSET ?
+            """, params + [limit, offset]).fetchall()
+        return [
+            listing_row(seed=seed, title=title, url=url, metadata={"title": md_title, "last_date": md_date},
+                        published_at=datetime.fromisoformat(pub) if pub else None,
+                        created_at=datetime.fromisoformat(created), content_type=ctype,
+                        updated_at=datetime.fromisoformat(updated) if updated else None)
+            for seed, title, url, md_title, md_date, pub, created, updated, ctype in rows
+        ]
+
+    def get_summary(self, url: str) -> str:
+        with self._lock:
+            row = self._db.execute("SELECT metadata FROM articles WHERE url = ?", (url,)).fetchone()
+        md = json.loads(row[0]) if row and row[0] else None
+        return listing_row(seed=None, title=None, url=url, metadata=md, published_at=None,
+                           created_at=None, content_type=None)["summary"]
+
+    def canonical_for_alias(self, url: str) -> Optional[str]:
+        with self._lock:
+            row = self._db.execute("SELECT canonical_url FROM url_aliases WHERE alias_url = ?", (url,)).fetchone()
+        return row[0] if row else None
+
+    def is_known_alias(self, url: str) -> bool:
+        return self.canonical_for_alias(url) is not None
+
+    def _urls_by_slot(self, slots: list[int]) -> dict[int, str]:
+        if not slots:
+            return {}
+        marks = ",".join("?" * len(slots))
+        return dict(self._db.execute(f"SELECT slot, url FROM articles WHERE slot IN ({marks})", slots))
+
+    def _article(self, r: tuple) -> LocalArticle:
+        slot, id_, title, url, source, md, sent, chash, published, ctype, seed, created, updated = r
+        return LocalArticle(
+            id=id_, title=title, url=url, source=source,
+            metadata_=json.loads(md) if md else None,
+            sent_to_stakeholders=None if sent is None else bool(sent),
+            content_hash=chash,
+            published_at=datetime.fromisoformat(published) if published else None,
+            content_type=ctype, seed=seed,
+            created_at=datetime.fromisoformat(created) if created else None,
+            updated_at=datetime.fromisoformat(updated) if updated else None,
+            embedding=np.array(self._vectors[slot]),
+            _store=self,
+        )
+
+    # --------------------- writes ---------------------
+
+    def _upsert_article(self, *, url: str, title: Optional[str], content: str, embedding: Any,
+                        source: Optional[str], metadata_envelope: dict,
+                        sent_to_stakeholders: Optional[bool] = None,
+                        raw_body: Optional[bytes] = None) -> str:
+        """Insert or update by URL (caller holds the lock and commits); returns the article id."""
+        typed = typed_columns(content, metadata_envelope)
+        now = _now()
+        published = _iso(typed["published_at"]) if typed["published_at"] else None
+        row = self._db.execute("SELECT slot, id FROM articles WHERE url = ?", (url,)).fetchone()
+        if row:
+            slot, article_id = row
+        else:
+            slot, article_id = self._count, str(uuid.uuid4())
+        self._db.execute(
+            """
+            INSERT INTO articles (slot, id, url, title, source, metadata, sent_to_stakeholders,
+                                  content_hash, published_at, content_type, seed, created_at, updated_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT (slot) DO UPDATE SET
+                title = excluded.title, source = excluded.source, metadata = excluded.metadata,
+                sent_to_stakeholders = excluded.sent_to_stakeholders,
+                content_hash = excluded.content_hash, published_at = excluded.published_at,
+                content_type = excluded.content_type, seed = excluded.seed,
+                updated_at = excluded.updated_at
+            """,
+            (slot, article_id, url, title, source, json.dumps(metadata_envelope, default=str),
+             None if sent_to_stakeholders is None else int(sent_to_stakeholders),
+             typed["content_hash"], published, typed["content_type"], typed["seed"], now, now),
+        )
+        self._db.execute(
+            "INSERT OR REPLACE INTO article_contents (article_id, content, raw_body) VALUES (?, ?, ?)",
+            (article_id, content, compress_body(raw_body)),
+        )
+        self._put_vector(slot, embedding)
+        if slot == self._count:
+            self._count += 1
+        return article_id
+
+    def _add_alias(self, canonical_url: str, alias_url: str) -> None:
+        if not canonical_url or not alias_url or canonical_url == alias_url:
+            return
+        row = self._db.execute("SELECT id FROM articles WHERE url = ?", (canonical_url,)).fetchone()
+        if row:
+            self._db.execute(
+                "INSERT OR IGNORE INTO url_aliases (alias_url, article_id, canonical_url, created_at)"
+                " VALUES (?, ?, ?, ?)",
+                (alias_url, row[0], canonical_url, _now()),
+            )
+
+    def add_alias_urls(self, pairs: Sequence[Tuple[str, str]]) -> None:
+        """Record (canonical_url, alias_url) pairs; unknown canonical URLs are ignored."""
+        with self._lock:
+            try:
+                for canonical_url, alias_url in pairs:
+                    self._add_alias(canonical_url, alias_url)
+                self._commit()
+            except Exception:
+                self._rollback()
+                raise
+
+    def _upsert_by_similarity(self, resource: Mapping[str, Any], embedding: Any,
+                              metadata_envelope: dict) -> Tuple[str, Optional[float]]:
+        url = canonical_url_of(resource)
+        if not url:
+            return ("skipped", None)
+        article = dict(
+            url=url,
+            title=resource.get("title"),
+            content=resource["content"],
+            raw_body=resource.get("raw_body"),
+            embedding=embedding,
+            source=resource.get("seed"),
+            metadata_envelope=metadata_envelope,
+            sent_to_stakeholders=False,
+        )
+
+        # 1) Known URL: change detection
+        dist_same = self.distance_to_url(url, embedding)
+        if dist_same is not None:
+            if dist_same >= CHANGE_DISTANCE:
+                self._upsert_article(**article)
+                return ("updated", dist_same)
+            return ("skipped", dist_same)  # duplicate or minor change
+
+        # 2) New URL: near-duplicate check
+        neighbors = self.topk_nearest(embedding, k=SEARCH_K,
+                                      seed=resource.get("seed") if SEED_SCOPED else None)
+        if neighbors and neighbors[0][1] <= DUPLICATE_DISTANCE:
+            best_url, best_dist = neighbors[0]
+            self._add_alias(best_url, url)
+            return ("skipped", best_dist)
+
+        # 3) Not a duplicate
+        self._upsert_article(**article)
+        return ("inserted", None)
+
+    def upsert_by_similarity(self, *, resource: Mapping[str, Any], embedding: Sequence[float],
+                             metadata_envelope: dict) -> Tuple[str, Optional[float]]:
+        """Same thresholds and outcomes as db.repository.upsert_by_similarity."""
+        with self._lock:
+            try:
+                out = self._upsert_by_similarity(resource, embedding, metadata_envelope)
+                self._commit()
+            except Exception:
+                self._rollback()
+                raise
+        self._vectors.flush()
+        return out
+
+    def upsert_by_similarity_batch(
+        self, items: Sequence[Tuple[Mapping[str, Any], Sequence[float], dict]],
+    ) -> list[Tuple[str, Optional[float]]]:
+        """Items applied in order in one transaction (local lookups are cheap, no batching needed)."""
+        results: list[Tuple[str, Optional[float]]] = []
+        seen: set[str] = set()
+        with self._lock:
+            try:
+                for resource, embedding, md in items:
+                    url = canonical_url_of(resource)
+                    if url in seen:  # first occurrence wins, as in the Postgres batch
+                        results.append(("skipped", None))
+                        continue
+                    seen.add(url)
+                    results.append(self._upsert_by_similarity(resource, embedding, md))
+                self._commit()
+            except Exception:
+                self._rollback()
+                raise
+        self._vectors.flush()
+        return results
+
+    def close(self) -> None:
+        with self._lock:
+            if self._vectors is not None:
+                self._vectors.flush()
+            self._db.close()
+
+
+def _unit(vec: Any) -> np.ndarray:
+    v = to_vector(vec)
+    n = float(np.linalg.norm(v))
+    return v / n if n else v
+
+
+def _iso(dt: datetime) -> str:
+    """UTC ISO-8601 text, so stored dates compare correctly as strings."""
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return dt.astimezone(timezone.utc).isoformat()
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
@@ -1,7 +1,11 @@
 from __future__ import annotations
-from sqlalchemy.orm import DeclarativeBase, mapped_column, Mapped
+from sqlalchemy.orm import DeclarativeBase, mapped_column, Mapped, relationship
 from sqlalchemy.dialects.postgresql import UUID, JSONB, TIMESTAMP
-from sqlalchemy import text
+from sqlalchemy import ForeignKey, Index, LargeBinary, cast, text
+import zlib
+from datetime import datetime
+from typing import Any, Sequence
+import numpy as np
 from pgvector.sqlalchemy import Vector
 from .config import get_settings
 
@@ -10,9 +14,48 @@ class Base(DeclarativeBase):
 
 DIM = get_settings()["embedding_dim"]
 
+
+def to_vector(vec: Sequence[float] | np.ndarray) -> np.ndarray:
+    """Contiguous float32 view of an embedding (no copy when it already is one)."""
+    return np.ascontiguousarray(vec, dtype=np.float32)
+
+
+class Float32Vector(Vector):
+    """
+    pgvector column bound as a float32 NumPy array.
+    pgvector.sqlalchemy.Vector serializes every bind to the text form '[x,y,...]';
+    here the array is handed to psycopg as is, so the dumpers installed by
+    register_vector() send it in pgvector's binary format.
+    """
+    cache_ok = True
+
+    def bind_processor(self, dialect: Any):
+        dim = self.dim
+
+        def process(value):
+            if value is None:
+                return None
+            arr = to_vector(value)
+            if dim is not None and arr.shape != (dim,):
+                raise ValueError(f"expected {dim} dimensions, not {arr.shape}")
+            return arr
+        return process
+
+    def bind_expression(self, bindvalue):
+        # Explicit cast so untyped contexts (VALUES lists, arrays) still see a vector
+        return cast(bindvalue, self)
+
 class EmbeddingArticle(Base):
     __tablename__ = "vector_embeddings"
-    __table_args__ = {"schema": "public"}
+    __table_args__ = (
+        # Typed copies of hot metadata fields (backfilled by db/schema.py)
+        Index("vector_embeddings_content_hash_idx", "content_hash"),
+        Index("vector_embeddings_seed_published_idx", "seed", text("published_at DESC")),
+        Index("vector_embeddings_published_idx", "published_at"),
+        Index("vector_embeddings_content_type_idx", "content_type"),
+        Index("vector_embeddings_seed_updated_idx", "seed", "updated_at"),
+        {"schema": "public"},
+    )
 
     id: Mapped[str] = mapped_column(
         UUID(as_uuid=True),
@@ -20,13 +63,70 @@ class EmbeddingArticle(Base):
         server_default=text("gen_random_uuid()"),
     )
     title: Mapped[str | None]
-    content: Mapped[str]                   # NOT NULL
-    embedding: Mapped[list[float]] = mapped_column(Vector(DIM), nullable=False)
+    embedding: Mapped[np.ndarray] = mapped_column(Float32Vector(DIM), nullable=False)
     embedding_dimension: Mapped[int | None] = int(get_settings().get('embedding_dim', 1536))
     source: Mapped[str | None]
     url: Mapped[str | None]
     created_at: Mapped[str] = mapped_column(
         TIMESTAMP(timezone=True), server_default=text("now()"), nullable=False
     )
+    # Last insert or meaningful update (upsert_by_similarity "updated"): "recent changes" view
+    updated_at: Mapped[datetime | None] = mapped_column(
+        TIMESTAMP(timezone=True), server_default=text("now()"), nullable=True
+    )
     sent_to_stakeholders: Mapped[bool | None]
     metadata_: Mapped[dict | None] = mapped_column("metadata", JSONB, nullable=True)
+    content_hash: Mapped[str | None]       # sha256 of content (or metadata.hash)
+    published_at: Mapped[datetime | None] = mapped_column(TIMESTAMP(timezone=True), nullable=True)
+    content_type: Mapped[str | None]       # "html" | "pdf"
+    seed: Mapped[str | None]
+
+    # Full text lives in article_contents (loaded on access only), so KNN scans
+    # and listings only read the narrow columns above.
+    body: Mapped["ArticleContent | None"] = relationship(
+        lazy="select", uselist=False, passive_deletes=True,
+    )
+
+    @property
+    def content(self) -> str | None:
+        return self.body.content if self.body is not None else None
+
+
+class ArticleContent(Base):
+    """Heavy document bodies, one row per article."""
+    __tablename__ = "article_contents"
+    __table_args__ = {"schema": "public"}
+
+    article_id: Mapped[str] = mapped_column(
+        UUID(as_uuid=True),
+        ForeignKey("public.vector_embeddings.id", ondelete="CASCADE"),
+        primary_key=True,
+    )
+    content: Mapped[str]                   # NOT NULL
+    raw_body: Mapped[bytes | None] = mapped_column(LargeBinary, nullable=True)  # zlib-compressed
+
+
+def compress_body(raw: bytes | None) -> bytes | None:
+    return zlib.compress(raw, 6) if raw else None
+
+
+def decompress_body(blob: bytes | None) -> bytes | None:
+    return zlib.decompress(blob) if blob else None
+
+
+class UrlAlias(Base):
+    """URL whose content duplicates a stored article (primary key = indexed lookup)."""
+    __tablename__ = "url_aliases"
+    __table_args__ = {"schema": "public"}
+
+    alias_url: Mapped[str] = mapped_column(primary_key=True)
+    article_id: Mapped[str] = mapped_column(
+        UUID(as_uuid=True),
+        ForeignKey("public.vector_embeddings.id", ondelete="CASCADE"),
+        index=True,
+        nullable=False,
+    )
+    canonical_url: Mapped[str]
+    created_at: Mapped[str] = mapped_column(
+        TIMESTAMP(timezone=True), server_default=text("now()"), nullable=False
+    )
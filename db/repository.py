@@ -1,13 +1,23 @@
 from __future__ import annotations
 from typing import Optional, Sequence, Mapping, Any, Tuple
 
-from sqlalchemy import select, text
+import numpy as np
+from datetime import datetime
+
+from sqlalchemy import Integer, Text, column, func, literal, or_, select, text, true, values
 from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.orm import Session
 
+from utils.hash_utils import compute_page_hash
+
 from .engine import session_scope
-from .models import EmbeddingArticle as Article
+from .models import (
+    DIM, ArticleContent, EmbeddingArticle as Article, Float32Vector, UrlAlias,
+    compress_body, to_vector,
+)
 from .config import get_settings
+from .dates import parse_publication_date
+from .schema import has_seed_index, set_search_params
 
 cfg = get_settings()
 
@@ -15,7 +25,7 @@ cfg = get_settings()
 DUPLICATE_DISTANCE = float(cfg.get("DUPLICATE_DISTANCE", 0.03))  # same/near-same content
 CHANGE_DISTANCE     = float(cfg.get("CHANGE_DISTANCE", 0.12))    # meaningful change for same URL
 SEARCH_K            = int(cfg.get("NEAR_DUP_K", 3))
-PROBES              = int(cfg.get("set_ivfflat_probes", 10))
+SEED_SCOPED         = cfg.get("near_dup_scope") == "seed"   # near-dup checks within one seed
 
 # --------------------- helpers ---------------------
 
@@ -49,13 +59,21 @@ def build_metadata_envelope(*, resource: Mapping[str, Any], hash_str: str | None
 
 # --------------------- reads / writes ---------------------
 
+def typed_columns(content: str, metadata_envelope: Mapping[str, Any]) -> dict:
+    """Typed copies of the hot metadata fields (content_hash, published_at, content_type, seed)."""
+    return dict(
+        content_hash=metadata_envelope.get("hash") or compute_page_hash(content),
+        published_at=parse_publication_date(metadata_envelope.get("last_date")),
+        content_type=metadata_envelope.get("content_type"),
+        seed=metadata_envelope.get("seed"),
+    )
+
+_TYPED_SET = ("content_hash", "published_at", "content_type", "seed")
+
 def get_hash_by_url(session: Session, url: str) -> Optional[str]:
-    row = session.execute(
-        select(Article.metadata_).where(Article.url == url)
+    return session.execute(
+        select(Article.content_hash).where(Article.url == url)
     ).scalar_one_or_none()
-    if not row:
-        return None
-    return (row or {}).get("hash")
 
 def upsert_article_by_url(
     session: Session,
@@ -67,16 +85,17 @@ def upsert_article_by_url(
     source: Optional[str],
     metadata_envelope: dict,
     sent_to_stakeholders: Optional[bool] = None,
+    raw_body: Optional[bytes] = None,
 ) -> Article:
-    """Insert or update by URL (conflicts only if url is NOT NULL)."""
+    """Insert or update by URL (conflicts only if url is NOT NULL); the body goes to article_contents."""
     values = dict(
         title=title,
-        content=content,
-        embedding=list(embedding),
+        embedding=to_vector(embedding),
         source=source,
         url=url,
         metadata_=metadata_envelope,  # ORM attr -> DB column "metadata"
         sent_to_stakeholders=sent_to_stakeholders,
+        **typed_columns(content, metadata_envelope),
     )
 
     # Build the INSERT first...
@@ -88,15 +107,36 @@ def upsert_article_by_url(
         index_where=Article.url.isnot(None),        # required because the index is partial (url IS NOT NULL)
         set_={
             "title": ins.excluded.title,
-            "content": ins.excluded.content,
             "embedding": ins.excluded.embedding,
             "source": ins.excluded.source,
             "metadata": ins.excluded.metadata,                  # <-- column name, not "metadata_"
             "sent_to_stakeholders": ins.excluded.sent_to_stakeholders,
+            "updated_at": func.now(),
+            **{c: ins.excluded[c] for c in _TYPED_SET},
         },
     ).returning(Article)
 
-    return session.scalars(stmt).first()
+    article = session.scalars(stmt).first()
+    upsert_contents(session, [(article.id, content, raw_body)])
+    return article
+
+def upsert_contents(session: Session, rows: Sequence[Tuple[Any, str, Optional[bytes]]]) -> None:
+    """Insert/replace (article_id, content, raw_body) rows in article_contents; raw bodies are compressed."""
+    if not rows:
+        return
+    ins = insert(ArticleContent).values([
+        dict(article_id=i, content=c, raw_body=compress_body(raw)) for i, c, raw in rows
+    ])
+    session.execute(ins.on_conflict_do_update(
+        index_elements=[ArticleContent.article_id],
+        set_={"content": ins.excluded.content, "raw_body": ins.excluded.raw_body},
+    ))
+
+def get_content(session: Session, article_id: Any) -> Optional[str]:
+    """Full text of one article (the vector table does not carry it)."""
+    return session.execute(
+        select(ArticleContent.content).where(ArticleContent.article_id == article_id)
+    ).scalar_one_or_none()
 
 # --------- convenience wrappers with automatic sessions ----------
 
@@ -108,45 +148,196 @@ def upsert_article_by_url_tx(**kwargs) -> Article:
     with session_scope() as s:
         return upsert_article_by_url(s, **kwargs)
 
-def vector_knn_tx(query_vec: Sequence[float], k: int = 10, probes: int | None = None):
-    """Read example: cosine KNN (matches your IVFFlat opclass)."""
+def vector_knn(session: Session, query_vec: Sequence[float], k: int = 10, probes: int | None = None) -> list[Article]:
+    """Read example: cosine KNN (matches the vector_cosine_ops index, see db/schema.py)."""
+    return [a for a, _ in search_knn(session, query_vec, k, probes=probes)]
+
+def vector_knn_tx(query_vec: Sequence[float], k: int = 10, probes: int | None = None) -> list[Article]:
+    with session_scope() as s:
+        return vector_knn(s, query_vec, k, probes)
+
+# --------------------- dashboard listings ---------------------
+
+def listing_row(*, seed, title, url, metadata, published_at, created_at, content_type,
+                updated_at=None) -> dict:
+    """Stored article as the resource dict the dashboard tables expect (see ui/styles.py)."""
+    md = metadata or {}
+    return {
+        "seed": seed,
+        "title": title or md.get("title") or "",
+        "url": url or "",
+        "summary": md.get("summary") or md.get("snippet") or "",
+        "last_date": md.get("last_date") or (published_at.date().isoformat() if published_at else ""),
+        "content_type": content_type,
+        "created_at": created_at,
+        "updated_at": updated_at,
+    }
+
+def like_pattern(query: str) -> str:
+    """`%query%` with the LIKE wildcards of `query` escaped (match with ESCAPE '\\')."""
+    escaped = query.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return f"%{escaped}%"
+
+def _browse_filters(seeds: Sequence[str], since: Optional[datetime], query: Optional[str]) -> list:
+    clauses = [Article.seed.in_(list(seeds))]
+    if since is not None:
+        clauses.append(Article.updated_at >= since)  # inserted or meaningfully updated since
+    if query:
+        pattern = like_pattern(query)  # "_" or "%" typed in the search box match literally
+        clauses.append(or_(Article.title.ilike(pattern, escape="\\"), Article.url.ilike(pattern, escape="\\")))
+    return clauses
+
+def seed_counts(
+    session: Session,
+    seeds: Sequence[str],
+    *,
+    since: Optional[datetime] = None,
+    query: Optional[str] = None,
+) -> dict[str, int]:
+    """Number of matching articles per seed (seeds without any are omitted)."""
+    if not seeds:
+        return {}
+    stmt = (
+        select(Article.seed, func.count())
+        .where(*_browse_filters(seeds, since, query))
+        .group_by(Article.seed)
+    )
+    return {seed: n for seed, n in session.execute(stmt).all()}
+
+def browse_articles(
+    session: Session,
+    seeds: Sequence[str],
+    *,
+    since: Optional[datetime] = None,
+    query: Optional[str] = None,
+    offset: int = 0,
+    limit: int = 50,
+) -> list[dict]:
+    """
+    One page of the results view: articles ordered by seed, then publication date.
+    `query` matches title or URL (case-insensitive). Rows carry no summary (see
+    get_summary), so a page costs the same whatever the size of the corpus.
+    """
+    if not seeds:
+        return []
+    stmt = (
+        select(
+            Article.seed, Article.title, Article.url, Article.published_at, Article.created_at,
+            Article.updated_at, Article.content_type,
+            Article.metadata_["title"].astext.label("md_title"),
+            Article.metadata_["last_date"].astext.label("md_last_date"),
+        )
+        .where(*_browse_filters(seeds, since, query))
+        .order_by(Article.seed, Article.published_at.desc().nulls_last(), Article.updated_at.desc().nulls_last())
+        .offset(offset)
+        .limit(limit)
+    )
+    return [
+        listing_row(seed=r.seed, title=r.title, url=r.url,
+                    metadata={"title": r.md_title, "last_date": r.md_last_date},
+                    published_at=r.published_at, created_at=r.created_at, content_type=r.content_type,
+                    updated_at=r.updated_at)
+        for r in session.execute(stmt).all()
+    ]
+
+def get_summary(session: Session, url: str) -> str:
+    """Summary of one article, loaded when the results view asks for it."""
+    md = session.execute(
+        select(Article.metadata_).where(Article.url == url).limit(1)
+    ).scalar_one_or_none()
+    return listing_row(seed=None, title=None, url=url, metadata=md, published_at=None,
+                       created_at=None, content_type=None)["summary"]
+
+# --------------------- filtered search ---------------------
+
+def seed_filter(session: Session, seed: str):
+    """
+    `seed = ...` clause. When the seed has a partial vector index (db/schema.py) the
+    value is rendered inline: a bound parameter cannot be matched against the index
+    predicate once the statement is prepared (generic plan with seed = $1).
+    """
+    if has_seed_index(session, seed):
+        return Article.seed == literal(seed, Text, literal_execute=True)
+    return Article.seed == seed
+
+
+def knn_filters(
+    *,
+    seed: Optional[str] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    content_type: Optional[str] = None,
+    sent_to_stakeholders: Optional[bool] = None,
+    session: Optional[Session] = None,
+) -> list:
+    """
+    WHERE clauses on the typed columns (None = no filter); `until` is exclusive.
+    With `session`, the seed clause can use a per-seed partial index (seed_filter).
+    """
+    clauses = []
+    if seed is not None:
+        clauses.append(seed_filter(session, seed) if session is not None else Article.seed == seed)
+    if since is not None:
+        clauses.append(Article.published_at >= since)
+    if until is not None:
+        clauses.append(Article.published_at < until)
+    if content_type is not None:
+        clauses.append(Article.content_type == content_type)
+    if sent_to_stakeholders is not None:
+        clauses.append(Article.sent_to_stakeholders.is_(sent_to_stakeholders))
+    return clauses
+
+def search_knn(
+    session: Session,
+    query_vec: Sequence[float],
+    k: int = 10,
+    *,
+    probes: int | None = None,
+    **filters: Any,
+) -> list[Tuple[Article, float]]:
+    """
+    Cosine KNN restricted by knn_filters(**filters): [(article, distance)] nearest first.
+    The filters are applied inside the index scan: iterative scans (pgvector >= 0.8)
+    keep reading the index until k rows match, a per-seed partial index is used for
+    `seed` when one exists (db/schema.py), and selective filters fall back to the
+    B-tree indexes on the typed columns.
+    """
+    clauses = knn_filters(session=session, **filters)
+    set_search_params(session, probes=probes, filtered=bool(clauses))
+    dist = Article.embedding.cosine_distance(to_vector(query_vec)).label("dist")
+    stmt = select(Article, dist).where(*clauses).order_by(dist).limit(k)
+    rows = [(a, float(d)) for a, d in session.execute(stmt).all()]
+    # relaxed_order iterative scans may return slightly out-of-order rows
+    return sorted(rows, key=lambda r: r[1])
+
+def search_knn_tx(query_vec: Sequence[float], k: int = 10, **filters: Any) -> list[Tuple[Article, float]]:
     with session_scope() as s:
-        s.execute(text(f"set local ivfflat.probes = {int(probes or PROBES)}"))
-        dist = Article.embedding.cosine_distance(list(query_vec)).label("dist")
-        stmt = select(Article).order_by(dist).limit(k)
-        return list(s.scalars(stmt))
+        return search_knn(s, query_vec, k, **filters)
 
 # --------------------- similarity policy ---------------------
 
 def distance_to_url(session: Session, url: str, vec: Sequence[float]) -> Optional[float]:
     """Return cosine distance between provided vector and stored row for this URL, or None if missing."""
     stmt = (
-        select(Article.embedding.cosine_distance(list(vec)).label("dist"))
+        select(Article.embedding.cosine_distance(to_vector(vec)).label("dist"))
         .where(Article.url == url)
         .limit(1)
     )
     return session.execute(stmt).scalar_one_or_none()
 
-def topk_nearest(session: Session, vec: Sequence[float], k: int = SEARCH_K) -> list[Tuple[str, float]]:
-    """Return [(url, distance)] for top-k nearest rows by cosine distance."""
-    session.execute(text(f"SET LOCAL ivfflat.probes = {int(PROBES)}"))
-    dist = Article.embedding.cosine_distance(list(vec)).label("dist")
-    stmt = select(Article.url, dist).order_by(dist).limit(k)
+def topk_nearest(session: Session, vec: Sequence[float], k: int = SEARCH_K,
+                 seed: Optional[str] = None) -> list[Tuple[str, float]]:
+    """Return [(url, distance)] for top-k nearest rows by cosine distance (within `seed` if given)."""
+    clauses = knn_filters(seed=seed, session=session)
+    set_search_params(session, filtered=bool(clauses))
+    dist = Article.embedding.cosine_distance(to_vector(vec)).label("dist")
+    stmt = select(Article.url, dist).where(*clauses).order_by(dist).limit(k)
     rows = session.execute(stmt).all()
-    return [(u, float(d)) for (u, d) in rows if u is not None]
+    return sorted(((u, float(d)) for (u, d) in rows if u is not None), key=lambda r: r[1])
 
 def add_alias_url(session: Session, canonical_url: str, alias_url: str) -> None:
-    """Append alias_url into metadata.alias_urls (read-modify-write in Python for simplicity)."""
-    row = session.execute(select(Article).where(Article.url == canonical_url)).scalar_one_or_none()
-    if not row:
-        return
-    md = dict(row.metadata_ or {})
-    aliases = list(md.get("alias_urls") or [])
-    if alias_url and alias_url not in aliases:
-        aliases.append(alias_url)
-        md["alias_urls"] = aliases
-        row.metadata_ = md
-        session.add(row)
+    """Record alias_url as a duplicate of the article stored at canonical_url."""
+    add_alias_urls(session, [(canonical_url, alias_url)])
 
 def upsert_by_similarity(
     session: Session,
@@ -175,6 +366,7 @@ def upsert_by_similarity(
                 url=url,
                 title=resource.get("title"),
                 content=resource["content"],
+                raw_body=resource.get("raw_body"),
                 embedding=embedding,
                 source=resource.get("seed"),
                 metadata_envelope=metadata_envelope,
@@ -185,7 +377,8 @@ def upsert_by_similarity(
             return ("skipped", dist_same)  # minor change
 
     # 2) New URL: near-duplicate check against existing rows
-    neighbors = topk_nearest(session, embedding, k=SEARCH_K)
+    neighbors = topk_nearest(session, embedding, k=SEARCH_K,
+                             seed=resource.get("seed") if SEED_SCOPED else None)
     if neighbors:
         best_url, best_dist = neighbors[0]
         if best_dist <= DUPLICATE_DISTANCE:
@@ -198,9 +391,237 @@ def upsert_by_similarity(
         url=url,
         title=resource.get("title"),
         content=resource["content"],
+        raw_body=resource.get("raw_body"),
         embedding=embedding,
         source=resource.get("seed"),
         metadata_envelope=metadata_envelope,
         sent_to_stakeholders=False,
     )
     return ("inserted", None)
+
+# --------------------- batched similarity policy ---------------------
+
+def add_alias_urls(session: Session, pairs: Sequence[Tuple[str, str]]) -> None:
+    """
+    Record (canonical_url, alias_url) pairs in url_aliases with one atomic
+    INSERT ... SELECT (no row loading, safe under concurrent workers).
+    """
+    pairs = [(c, a) for c, a in pairs if c and a and c != a]
+    if not pairs:
+        return
+    session.execute(
+        text("""
+            INSERT INTO public.url_aliases (alias_url, article_id, canonical_url)
+            SELECT DISTINCT ON (p.alias) p.alias, a.id, a.url
+            FROM unnest(CAST(:canonicals AS text[]), CAST(:aliases AS text[])) AS p(canonical, alias)
+            JOIN public.vector_embeddings AS a ON a.url = p.canonical
+            ON CONFLICT (alias_url) DO NOTHING
+        """),
+        {"canonicals": [c for c, _ in pairs], "aliases": [a for _, a in pairs]},
+    )
+
+
+def canonical_for_alias(session: Session, url: str) -> Optional[str]:
+    """Canonical URL if `url` is a known alias (primary-key lookup), else None."""
+    return session.execute(
+        select(UrlAlias.canonical_url).where(UrlAlias.alias_url == url)
+    ).scalar_one_or_none()
+
+
+def is_known_alias_tx(url: str) -> bool:
+    with session_scope() as s:
+        return canonical_for_alias(s, url) is not None
+
+
+def _query_values(rows: Sequence[Tuple[int, Optional[str], Any, Optional[str]]]):
+    """VALUES (idx, url, vec, seed) relation used to join a batch against the table."""
+    return values(
+        column("idx", Integer), column("url", Text), column("vec", Float32Vector(DIM)), column("seed", Text),
+        name="q",
+    ).data([(i, u, to_vector(v), seed) for i, u, v, seed in rows])
+
+
+def distances_to_urls(session: Session, rows: Sequence[Tuple[int, str, Any]]) -> dict[int, float]:
+    """Batched distance_to_url: {idx: distance} for rows whose url is already stored."""
+    if not rows:
+        return {}
+    q = _query_values([(i, u, v, None) for i, u, v in rows])
+    stmt = (
+        select(q.c.idx, Article.embedding.cosine_distance(q.c.vec).label("dist"))
+        .select_from(q)
+        .join(Article, Article.url == q.c.url)
+    )
+    return {int(i): float(d) for i, d in session.execute(stmt).all()}
+
+
+def _lateral_knn(session: Session, rows: Sequence[Tuple[int, Any, Optional[str]]], k: int,
+                 seed_clause=None) -> list:
+    """(idx, url, distance) rows of a LATERAL KNN per query vector, restricted by seed_clause(q)."""
+    q = _query_values([(i, None, v, seed) for i, v, seed in rows])
+    dist = Article.embedding.cosine_distance(q.c.vec)
+    where = [Article.url.isnot(None)]
+    if seed_clause is not None:
+        where.append(seed_clause(q))
+    nn = select(Article.url.label("url"), dist.label("dist")).where(*where).order_by(dist).limit(k).lateral("nn")
+    return session.execute(select(q.c.idx, nn.c.url, nn.c.dist).select_from(q).join(nn, true())).all()
+
+
+def topk_nearest_many(session: Session, rows: Sequence[Tuple[int, Any, Optional[str]]],
+                      k: int = SEARCH_K) -> dict[int, list[Tuple[str, float]]]:
+    """
+    Batched topk_nearest with a LATERAL KNN per query vector: {idx: [(url, distance)]}.
+    Rows are (idx, vector, seed); a non-null seed restricts that query to the seed's rows.
+    One statement for unseeded rows, one per seed having a partial vector index (seed
+    inlined so the index predicate matches) and one for the other seeded rows.
+    """
+    if not rows:
+        return {}
+    set_search_params(session, filtered=any(seed is not None for _, _, seed in rows))
+    unseeded = [r for r in rows if r[2] is None]
+    indexed: dict[str, list] = {}
+    seeded = []
+    for r in rows:
+        if r[2] is not None:
+            (indexed.setdefault(r[2], []) if has_seed_index(session, r[2]) else seeded).append(r)
+
+    found = _lateral_knn(session, unseeded, k) if unseeded else []
+    for seed, group in indexed.items():
+        found += _lateral_knn(session, group, k, lambda q, seed=seed: seed_filter(session, seed))
+    if seeded:
+        found += _lateral_knn(session, seeded, k, lambda q: Article.seed == q.c.seed)
+
+    out: dict[int, list[Tuple[str, float]]] = {}
+    for i, u, d in sorted(found, key=lambda r: (r[0], r[2])):
+        out.setdefault(int(i), []).append((u, float(d)))
+    return out
+
+
+def _cosine_distance_matrix(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    unit = vectors / np.where(norms == 0, 1.0, norms)
+    return 1.0 - unit @ unit.T
+
+
+def upsert_by_similarity_batch(
+    session: Session,
+    items: Sequence[Tuple[Mapping[str, Any], Sequence[float], dict]],
+) -> list[Tuple[str, Optional[float]]]:
+    """
+    Set-based version of upsert_by_similarity for (resource, embedding, metadata_envelope)
+    items, in the caller's transaction. Same thresholds and outcomes as the per-row
+    policy, with a handful of statements whatever the batch size:
+      1. distances of known URLs to their stored vector (one join),
+      2. in-batch dedup of new URLs (NumPy), then one LATERAL KNN for the rest,
+      3. one multi-row upsert for inserts/updates (plus their article_contents rows),
+         one multi-row INSERT into url_aliases for aliases.
+    Returns [("skipped"|"updated"|"inserted", distance_or_None)] aligned with items.
+    """
+    results: list[Tuple[str, Optional[float]]] = [("skipped", None)] * len(items)
+    if not items:
+        return results
+
+    urls = [canonical_url_of(r) for r, _, _ in items]
+    vecs = np.stack([to_vector(v) for _, v, _ in items])
+
+    # Same URL twice in a batch: keep the first occurrence (one row per URL)
+    first_by_url: dict[str, int] = {}
+    candidates: list[int] = []
+    for i, url in enumerate(urls):
+        if url and url not in first_by_url:
+            first_by_url[url] = i
+            candidates.append(i)
+
+    # 1) Known URLs: change detection against the stored vector
+    dist_same = distances_to_urls(session, [(i, urls[i], vecs[i]) for i in candidates])
+    to_write: list[int] = []
+    new_items: list[int] = []
+    for i in candidates:
+        d = dist_same.get(i)
+        if d is None:
+            new_items.append(i)
+        elif d >= CHANGE_DISTANCE:
+            results[i] = ("updated", d)
+            to_write.append(i)
+        else:
+            results[i] = ("skipped", d)  # duplicate or minor change
+
+    # 2a) New URLs that duplicate an earlier item of this batch (which will be in the table)
+    aliases: list[Tuple[str, str]] = []
+    alias_of: dict[int, int] = {}
+    if new_items:
+        in_table = to_write + new_items  # batch vectors that will be stored before later items
+        dmat = _cosine_distance_matrix(vecs[in_table])
+        pos = {idx: p for p, idx in enumerate(in_table)}
+        kept: list[int] = list(to_write)
+        remaining: list[int] = []
+        for i in new_items:
+            best = None
+            for j in kept:
+                if SEED_SCOPED and items[i][0].get("seed") != items[j][0].get("seed"):
+                    continue
+                d = float(dmat[pos[i], pos[j]])
+                if d <= DUPLICATE_DISTANCE and (best is None or d < best[1]):
+                    best = (j, d)
+            if best is not None:
+                alias_of[i] = best[0]
+                results[i] = ("skipped", best[1])
+            else:
+                remaining.append(i)
+                kept.append(i)
+        new_items = remaining
+
+    # 2b) Remaining new URLs: near-duplicate check against existing rows
+    neighbors = topk_nearest_many(session, [
+        (i, vecs[i], items[i][0].get("seed") if SEED_SCOPED else None) for i in new_items
+    ])
+    for i in new_items:
+        found = neighbors.get(i) or []
+        if found and found[0][1] <= DUPLICATE_DISTANCE:
+            best_url, best_dist = found[0]
+            aliases.append((best_url, urls[i]))
+            results[i] = ("skipped", best_dist)
+        else:
+            results[i] = ("inserted", None)
+            to_write.append(i)
+
+    # An in-batch duplicate points at the row its target ends up attached to
+    canonical_of = {alias: canonical for canonical, alias in aliases}
+    for i, j in alias_of.items():
+        aliases.append((canonical_of.get(urls[j], urls[j]), urls[i]))
+
+    # 3) Writes
+    if to_write:
+        rows = []
+        for i in sorted(to_write):
+            resource, _, md = items[i]
+            rows.append(dict(
+                title=resource.get("title"),
+                embedding=vecs[i],
+                source=resource.get("seed"),
+                url=urls[i],
+                metadata=md,  # table-level insert: DB column names
+                sent_to_stakeholders=False,
+                **typed_columns(resource["content"], md),
+            ))
+        table = Article.__table__
+        ins = insert(table).values(rows)
+        written = session.execute(ins.on_conflict_do_update(
+            index_elements=[table.c.url],
+            index_where=table.c.url.isnot(None),
+            set_={
+                "title": ins.excluded.title,
+                "embedding": ins.excluded.embedding,
+                "source": ins.excluded.source,
+                "metadata": ins.excluded.metadata,
+                "sent_to_stakeholders": ins.excluded.sent_to_stakeholders,
+                "updated_at": func.now(),
+                **{c: ins.excluded[c] for c in _TYPED_SET},
+            },
+        ).returning(table.c.id, table.c.url))
+        ids = dict((u, i) for i, u in written.all())
+        upsert_contents(session, [
+            (ids[urls[i]], items[i][0]["content"], items[i][0].get("raw_body"))
+            for i in sorted(to_write) if urls[i] in ids
+        ])
+    add_alias_urls(session, aliases)
+    return results
@@ -0,0 +1,524 @@
+from __future__ import annotations
+
+import hashlib
+import math
+import time
+from typing import Any, Optional
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.orm import Session
+from sqlalchemy.schema import CreateIndex
+
+from .config import get_settings
+from .dates import parse_publication_date
+from .models import Base, EmbeddingArticle
+
+TABLE = "public.vector_embeddings"
+URL_INDEX = "vector_embeddings_url_key"
+VECTOR_INDEX = "vector_embeddings_embedding_idx"
+SEED_INDEX_PREFIX = "vector_embeddings_embedding_seed_"
+
+_cfg = get_settings()
+
+# --------------------- helpers ---------------------
+
+def recommended_lists(rows: int) -> int:
+    """pgvector guidance for IVFFlat: rows/1000 up to 1M rows, sqrt(rows) above."""
+    if rows <= 1_000_000:
+        return max(1, rows // 1000)
+    return int(math.sqrt(rows))
+
+
+def _index_options(cfg: dict, rows: int) -> tuple[str, str]:
+    """(method, WITH clause) for the configured vector index."""
+    if cfg["vector_index"] == "hnsw":
+        return "hnsw", f"m = {int(cfg['hnsw_m'])}, ef_construction = {int(cfg['hnsw_ef_construction'])}"
+    lists = int(cfg["ivfflat_lists"]) or recommended_lists(rows)
+    return "ivfflat", f"lists = {lists}"
+
+
+def _row_count(conn: Connection) -> int:
+    est = conn.execute(text(
+        "SELECT GREATEST(reltuples, 0)::bigint FROM pg_class WHERE oid = CAST(:t AS regclass)"
+    ), {"t": TABLE}).scalar() or 0
+    if est:
+        return int(est)
+    # Never analyzed (or really empty): exact count is cheap in that case
+    return int(conn.execute(text(f"SELECT count(*) FROM {TABLE}")).scalar() or 0)
+
+
+def _has_url_index(conn: Connection) -> bool:
+    """True if a valid unique index on (url) already exists (whatever its name)."""
+    defs = conn.execute(text("""
+        SELECT pg_get_indexdef(x.indexrelid)
+        FROM pg_index x
+        WHERE x.indrelid = CAST(:t AS regclass) AND x.indisunique AND x.indisvalid
+    """), {"t": TABLE}).scalars().all()
+    return any(d.replace('"', "").rstrip().endswith("(url) WHERE (url IS NOT NULL)") for d in defs)
+
+
+def vector_indexes(conn: Connection) -> list[dict]:
+    """
+    Existing IVFFlat/HNSW indexes on the table with method, options, size and validity.
+    Partial (per-seed) indexes are flagged with partial=True.
+    """
+    rows = conn.execute(text("""
+        SELECT i.relname, am.amname, coalesce(i.reloptions, '{}'), pg_relation_size(i.oid), x.indisvalid,
+               x.indpred IS NOT NULL
+        FROM pg_index x
+        JOIN pg_class i ON i.oid = x.indexrelid
+        JOIN pg_am am ON am.oid = i.relam
+        WHERE x.indrelid = CAST(:t AS regclass) AND am.amname IN ('ivfflat', 'hnsw')
+    """), {"t": TABLE}).all()
+    out = []
+    for name, method, reloptions, size, valid, partial in rows:
+        opts = dict(o.split("=", 1) for o in reloptions)
+        out.append({"name": name, "method": method, "options": opts, "size_bytes": int(size),
+                    "valid": bool(valid), "partial": bool(partial)})
+    return out
+
+
+_iterative_scan: Optional[bool] = None
+
+
+def supports_iterative_scan(session: Session) -> bool:
+    """pgvector >= 0.8 can keep scanning the index until enough rows pass the filters."""
+    global _iterative_scan
+    if _iterative_scan is None:
+        version = session.execute(text(
+            "SELECT extversion FROM pg_extension WHERE extname = 'vector'"
+        )).scalar() or "0"
+        parts = tuple(int(p) for p in version.split(".")[:2] if p.isdigit())
+        _iterative_scan = parts >= (0, 8)
+    return _iterative_scan
+
+
+def set_search_params(session: Session, *, probes: int | None = None,
+                      ef_search: int | None = None, filtered: bool = False) -> None:
+    """
+    SET LOCAL the recall/speed knob of the configured index for this transaction.
+    filtered=True (KNN with a WHERE clause) also enables iterative index scans when
+    available, so filters do not leave fewer than k rows out of the index candidates.
+    """
+    method = _cfg["vector_index"]
+    if method == "hnsw":
+        session.execute(text(f"SET LOCAL hnsw.ef_search = {int(ef_search or _cfg['hnsw_ef_search'])}"))
+    else:
+        session.execute(text(f"SET LOCAL ivfflat.probes = {int(probes or _cfg['set_ivfflat_probes'])}"))
+    mode = _cfg["iterative_scan"]
+    if filtered and mode in {"relaxed_order", "strict_order"} and supports_iterative_scan(session):
+        if method == "ivfflat":
+            mode = "relaxed_order"  # the only mode IVFFlat supports
+        session.execute(text(f"SET LOCAL {method}.iterative_scan = {mode}"))
+
+# --------------------- typed metadata columns ---------------------
+
+_TYPED_COLUMNS = {
+    "content_hash": "text",
+    "published_at": "timestamptz",
+    "content_type": "text",
+    "seed": "text",
+}
+_BACKFILL_BATCH = 1000
+
+
+def add_typed_columns(engine: Engine) -> None:
+    """
+    Add the typed columns promoted from the metadata JSONB, updated_at (existing rows
+    stay NULL until the "updated_at" backfill) and their B-tree indexes (DDL only).
+    """
+    with engine.begin() as conn:
+        for name, sql_type in _TYPED_COLUMNS.items():
+            conn.execute(text(f"ALTER TABLE {TABLE} ADD COLUMN IF NOT EXISTS {name} {sql_type}"))
+        conn.execute(text(f"ALTER TABLE {TABLE} ADD COLUMN IF NOT EXISTS updated_at timestamptz"))
+        conn.execute(text(f"ALTER TABLE {TABLE} ALTER COLUMN updated_at SET DEFAULT now()"))
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        for index in EmbeddingArticle.__table__.indexes:
+            ddl = str(CreateIndex(index, if_not_exists=True).compile(dialect=engine.dialect))
+            conn.execute(text(ddl.replace("CREATE INDEX", "CREATE INDEX CONCURRENTLY", 1)))
+
+
+def backfill_typed_columns(engine: Engine) -> dict[str, int]:
+    """
+    Fill the typed columns of existing rows from the metadata JSONB. Idempotent and
+    resumable: only rows whose columns are still NULL are touched.
+    """
+    counts = {"copied": 0, "dated": 0}
+    with engine.connect() as conn:
+        legacy = _has_content_column(conn)
+    # Bodies not moved by split_content yet are still in the legacy column
+    body = "coalesce(c.content, a.content)" if legacy else "c.content"
+
+    # Plain copies (and the content hash of the body) per keyset batch
+    last_id = None
+    while True:
+        with engine.begin() as conn:
+            ids = conn.execute(text(f"""
+                SELECT id FROM {TABLE}
+                WHERE content_hash IS NULL AND (CAST(:last AS uuid) IS NULL OR id > CAST(:last AS uuid))
+                ORDER BY id LIMIT {_BACKFILL_BATCH}
+            """), {"last": last_id}).scalars().all()
+            if ids:
+                conn.execute(text(f"""
+                    UPDATE {TABLE} AS a SET
+                        content_hash = coalesce(a.metadata->>'hash',
+                                                encode(sha256(convert_to({body}, 'UTF8')), 'hex')),
+                        content_type = coalesce(a.content_type, a.metadata->>'content_type'),
+                        seed = coalesce(a.seed, a.metadata->>'seed', a.source)
+                    FROM {TABLE} AS t LEFT JOIN public.article_contents AS c ON c.article_id = t.id
+                    WHERE a.id = t.id AND a.id = ANY(:ids)
+                """), {"ids": list(ids)})
+        counts["copied"] += len(ids)
+        if len(ids) < _BACKFILL_BATCH:
+            break
+        last_id = str(ids[-1])
+
+    # Publication dates mix RFC 1123, ISO and free text: parsed in Python, keyset-paginated
+    last_id = None
+    while True:
+        with engine.begin() as conn:
+            rows = conn.execute(text(f"""
+                SELECT id, metadata->>'last_date' FROM {TABLE}
+                WHERE published_at IS NULL AND metadata->>'last_date' IS NOT NULL
+                  AND (CAST(:last AS uuid) IS NULL OR id > CAST(:last AS uuid))
+                ORDER BY id LIMIT {_BACKFILL_BATCH}
+            """), {"last": last_id}).all()
+            updates = [{"id": i, "ts": ts} for i, raw in rows
+                       if (ts := parse_publication_date(raw)) is not None]
+            if updates:
+                conn.execute(text(f"UPDATE {TABLE} SET published_at = :ts WHERE id = :id"), updates)
+        counts["dated"] += len(updates)
+        if len(rows) < _BACKFILL_BATCH:
+            break
+        last_id = str(rows[-1][0])
+
+    # Not recorded as applied while a row with a body still has no hash: hash lookups
+    # would miss it for good
+    with engine.connect() as conn:
+        missing = _unhashed_rows(conn)
+    if missing:
+        raise RuntimeError(f"typed_columns: {missing} row(s) with a body still have no content_hash")
+    return counts
+
+
+def _unhashed_rows(conn: Connection) -> int:
+    """Rows with a body (in article_contents or the legacy column) but no content_hash."""
+    legacy = " OR a.content IS NOT NULL" if _has_content_column(conn) else ""
+    return conn.execute(text(f"""
+        SELECT count(*) FROM {TABLE} AS a LEFT JOIN public.article_contents AS c ON c.article_id = a.id
+        WHERE a.content_hash IS NULL AND (c.content IS NOT NULL{legacy})
+    """)).scalar_one()
+
+
+def backfill_updated_at(engine: Engine) -> int:
+    """updated_at = created_at for rows stored before the column existed (keyset batches)."""
+    updated, last_id = 0, None
+    while True:
+        with engine.begin() as conn:
+            ids = conn.execute(text(f"""
+                SELECT id FROM {TABLE}
+                WHERE updated_at IS NULL AND (CAST(:last AS uuid) IS NULL OR id > CAST(:last AS uuid))
+                ORDER BY id LIMIT {_BACKFILL_BATCH}
+            """), {"last": last_id}).scalars().all()
+            if ids:
+                conn.execute(text(f"UPDATE {TABLE} SET updated_at = created_at WHERE id = ANY(:ids)"),
+                             {"ids": list(ids)})
+        updated += len(ids)
+        if len(ids) < _BACKFILL_BATCH:
+            break
+        last_id = str(ids[-1])
+    return updated
+
+
+def _has_content_column(conn: Connection) -> bool:
+    return conn.execute(text("""
+        SELECT 1 FROM information_schema.columns
+        WHERE table_schema = 'public' AND table_name = 'vector_embeddings' AND column_name = 'content'
+    """)).first() is not None
+
+
+def relax_content_column(engine: Engine) -> bool:
+    """
+    Legacy vector_embeddings.content still present: drop its NOT NULL so the current
+    code (which writes bodies to article_contents only) can insert rows before the
+    column is moved. Non-destructive; returns True when the column exists.
+    """
+    with engine.begin() as conn:
+        if not _has_content_column(conn):
+            return False
+        conn.execute(text(f"ALTER TABLE {TABLE} ALTER COLUMN content DROP NOT NULL"))
+    return True
+
+
+def split_content(engine: Engine) -> int:
+    """
+    Move vector_embeddings.content into article_contents (batched, resumable),
+    then drop the column so KNN scans and listings stop reading TOASTed text.
+    Destructive: run it explicitly (python -m db.schema --split-content) once no
+    process running the previous code writes to the table any more.
+    Returns the number of rows copied.
+    """
+    with engine.begin() as conn:
+        if not _has_content_column(conn):
+            return 0
+
+    copied, last_id = 0, None
+    while True:
+        with engine.begin() as conn:
+            ids = conn.execute(text(f"""
+                SELECT id FROM {TABLE}
+                WHERE CAST(:last AS uuid) IS NULL OR id > CAST(:last AS uuid)
+                ORDER BY id LIMIT {_BACKFILL_BATCH}
+            """), {"last": last_id}).scalars().all()
+            if ids:
+                conn.execute(text(f"""
+                    INSERT INTO public.article_contents (article_id, content)
+                    SELECT id, content FROM {TABLE} WHERE id = ANY(:ids) AND content IS NOT NULL
+                    ON CONFLICT (article_id) DO NOTHING
+                """), {"ids": list(ids)})
+        copied += len(ids)
+        if len(ids) < _BACKFILL_BATCH:
+            break
+        last_id = str(ids[-1])
+
+    with engine.begin() as conn:
+        conn.execute(text(f"ALTER TABLE {TABLE} DROP COLUMN content"))
+    return copied
+
+
+def migrate_aliases(engine: Engine) -> int:
+    """Copy legacy metadata.alias_urls entries into url_aliases (idempotent)."""
+    with engine.begin() as conn:
+        return conn.execute(text(f"""
+            INSERT INTO public.url_aliases (alias_url, article_id, canonical_url)
+            SELECT DISTINCT ON (alias) alias, a.id, a.url
+            FROM {TABLE} AS a, jsonb_array_elements_text(a.metadata->'alias_urls') AS alias
+            WHERE a.url IS NOT NULL AND jsonb_typeof(a.metadata->'alias_urls') = 'array'
+            ON CONFLICT (alias_url) DO NOTHING
+        """)).rowcount
+
+# --------------------- data migrations ---------------------
+
+# Backfills run once, explicitly (python -m db.schema --migrate), and are recorded in
+# schema_migrations so that process start-up never rescans the table.
+MIGRATIONS = {
+    "typed_columns": backfill_typed_columns,
+    "aliases": migrate_aliases,
+    "updated_at": backfill_updated_at,
+}
+
+
+def _applied_migrations(conn: Connection) -> set[str]:
+    conn.execute(text("""
+        CREATE TABLE IF NOT EXISTS public.schema_migrations (
+            name text PRIMARY KEY, applied_at timestamptz NOT NULL DEFAULT now()
+        )
+    """))
+    return set(conn.execute(text("SELECT name FROM public.schema_migrations")).scalars().all())
+
+
+def _record_migration(conn: Connection, name: str) -> None:
+    conn.execute(text("""
+        INSERT INTO public.schema_migrations (name) VALUES (:n)
+        ON CONFLICT (name) DO UPDATE SET applied_at = now()
+    """), {"n": name})
+
+
+def pending_migrations(engine: Engine) -> list[str]:
+    """Data migrations not applied yet, plus "split_content" while the legacy column exists."""
+    with engine.begin() as conn:
+        applied = _applied_migrations(conn)
+        if len(applied) < len(MIGRATIONS) and conn.execute(text(f"SELECT 1 FROM {TABLE} LIMIT 1")).first() is None:
+            for name in MIGRATIONS.keys() - applied:  # empty table: nothing to backfill
+                _record_migration(conn, name)
+            applied |= MIGRATIONS.keys()
+        pending = [name for name in MIGRATIONS if name not in applied]
+        if _has_content_column(conn):
+            pending.append("split_content")
+    return pending
+
+
+def run_migrations(engine: Engine, *, force: bool = False) -> dict[str, Any]:
+    """Run the backfills not recorded yet (all of them with force=True) and record them."""
+    with engine.begin() as conn:
+        applied = set() if force else _applied_migrations(conn)
+    results: dict[str, Any] = {}
+    for name, migrate in MIGRATIONS.items():
+        if name in applied:
+            continue
+        results[name] = migrate(engine)
+        with engine.begin() as conn:
+            _record_migration(conn, name)
+    return results
+
+# --------------------- lifecycle ---------------------
+
+def _build_vector_index(conn: Connection, cfg: dict, name: str, rows: int) -> float:
+    """CREATE INDEX CONCURRENTLY (autocommit connection); returns build time in seconds."""
+    method, with_clause = _index_options(cfg, rows)
+    if cfg.get("index_maintenance_work_mem"):
+        conn.execute(text(f"SET maintenance_work_mem = '{cfg['index_maintenance_work_mem']}'"))
+    t0 = time.perf_counter()
+    conn.execute(text(
+        f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {name} ON {TABLE} "
+        f"USING {method} (embedding vector_cosine_ops) WITH ({with_clause})"
+    ))
+    return time.perf_counter() - t0
+
+
+def _seed_index_name(seed: str) -> str:
+    return SEED_INDEX_PREFIX + hashlib.md5(seed.encode("utf-8")).hexdigest()[:12]
+
+
+_SEED_INDEX_TTL = 300  # seconds between refreshes of the per-seed index list
+_seed_indexes: tuple[float, frozenset] = (float("-inf"), frozenset())
+
+
+def has_seed_index(session: Session, seed: str) -> bool:
+    """True when a valid per-seed partial vector index exists for `seed` (names cached)."""
+    global _seed_indexes
+    checked, names = _seed_indexes
+    if time.monotonic() - checked > _SEED_INDEX_TTL:
+        names = frozenset(session.execute(text("""
+            SELECT i.relname FROM pg_index x JOIN pg_class i ON i.oid = x.indexrelid
+            WHERE x.indrelid = CAST(:t AS regclass) AND x.indisvalid AND x.indpred IS NOT NULL
+        """), {"t": TABLE}).scalars().all())
+        _seed_indexes = (time.monotonic(), names)
+    return _seed_index_name(seed) in names
+
+
+def seed_vector_indexes(engine: Engine, cfg: dict) -> list[str]:
+    """
+    Partial vector index per large source (WHERE seed = '<seed>'), so a KNN filtered
+    on one seed searches that seed's rows only. Created for seeds with at least
+    seed_index_min_rows rows; returns the names created by this call.
+    """
+    min_rows = int(cfg.get("seed_index_min_rows") or 0)
+    if min_rows <= 0:
+        return []
+    created = []
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        existing = {i["name"] for i in vector_indexes(conn)}
+        seeds = conn.execute(text(
+            f"SELECT seed, count(*) FROM {TABLE} WHERE seed IS NOT NULL GROUP BY seed HAVING count(*) >= :n"
+        ), {"n": min_rows}).all()
+        for seed, rows in seeds:
+            name = _seed_index_name(seed)
+            if name in existing:
+                continue
+            method, with_clause = _index_options(cfg, int(rows))
+            literal = seed.replace("'", "''")
+            conn.execute(text(
+                f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {name} ON {TABLE} "
+                f"USING {method} (embedding vector_cosine_ops) WITH ({with_clause}) WHERE seed = '{literal}'"
+            ))
+            created.append(name)
+    if created:
+        global _seed_indexes
+        _seed_indexes = (float("-inf"), frozenset())
+    return created
+
+
+def _needs_rebuild(cfg: dict, index: dict, rows: int) -> Optional[str]:
+    """Reason to rebuild the current vector index, or None."""
+    if not index["valid"]:
+        return "invalid (interrupted concurrent build)"
+    if index["method"] != cfg["vector_index"]:
+        return f"method {index['method']} -> {cfg['vector_index']}"
+    if index["method"] == "ivfflat" and not cfg["ivfflat_lists"]:
+        current = int(index["options"].get("lists", 100))
+        wanted = recommended_lists(rows)
+        ratio = max(current, wanted) / max(1, min(current, wanted))
+        if ratio >= cfg["ivfflat_stale_ratio"]:
+            return f"stale lists {current} (recommended {wanted} for {rows} rows)"
+    if index["method"] == "hnsw":
+        if (int(index["options"].get("m", 16)) != cfg["hnsw_m"]
+                or int(index["options"].get("ef_construction", 64)) != cfg["hnsw_ef_construction"]):
+            return "hnsw parameters changed"
+    return None
+
+
+def ensure_schema(engine: Engine, *, rebuild: bool = True) -> dict[str, Any]:
+    """
+    Create/verify the extension, table, typed columns, partial unique URL index and
+    vector index. Only non-destructive DDL: data backfills and the content split are
+    reported as pending (see run_migrations / split_content).
+    With rebuild=True a wrong-method, stale-IVFFlat or invalid vector index is rebuilt
+    concurrently (build new, drop old, rename), so reads keep working meanwhile.
+    Returns a report: method, options, rows, index size, build time, action, pending.
+    """
+    cfg = get_settings()
+    with engine.begin() as conn:
+        conn.execute(text("CREATE EXTENSION IF NOT EXISTS vector"))
+    Base.metadata.create_all(engine)
+    add_typed_columns(engine)
+    relax_content_column(engine)
+
+    report: dict[str, Any] = {"action": "ok", "build_seconds": None, "pending": pending_migrations(engine)}
+    # CONCURRENTLY cannot run inside a transaction block
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        if not _has_url_index(conn):
+            conn.execute(text(
+                f"CREATE UNIQUE INDEX CONCURRENTLY IF NOT EXISTS {URL_INDEX} "
+                f"ON {TABLE} (url) WHERE url IS NOT NULL"
+            ))
+        rows = _row_count(conn)
+        report["rows"] = rows
+        existing = [i for i in vector_indexes(conn) if not i["partial"]]
+
+        if not existing:
+            report["build_seconds"] = _build_vector_index(conn, cfg, VECTOR_INDEX, rows)
+            report["action"] = "created"
+        else:
+            current = next((i for i in existing if i["valid"]), existing[0])
+            reason = _needs_rebuild(cfg, current, rows)
+            if reason and rebuild:
+                tmp = f"{VECTOR_INDEX}_new"
+                conn.execute(text(f"DROP INDEX CONCURRENTLY IF EXISTS public.{tmp}"))
+                report["build_seconds"] = _build_vector_index(conn, cfg, tmp, rows)
+                for idx in existing:
+                    conn.execute(text(f'DROP INDEX CONCURRENTLY IF EXISTS public."{idx["name"]}"'))
+                conn.execute(text(f"ALTER INDEX public.{tmp} RENAME TO {VECTOR_INDEX}"))
+                report["action"] = f"rebuilt: {reason}"
+            elif reason:
+                report["action"] = f"needs rebuild: {reason}"
+
+        final = [i for i in vector_indexes(conn) if i["valid"] and not i["partial"]]
+        if final:
+            report.update({k: final[0][k] for k in ("name", "method", "options", "size_bytes")})
+    report["seed_indexes"] = seed_vector_indexes(engine, cfg)
+    return report
+
+
+def format_report(report: dict[str, Any]) -> str:
+    size_mb = report.get("size_bytes", 0) / (1024 * 1024)
+    built = f", built in {report['build_seconds']:.1f}s" if report.get("build_seconds") is not None else ""
+    return (f"[SCHEMA] {report.get('name')} {report.get('method')} {report.get('options')} "
+            f"rows={report.get('rows')} size={size_mb:.1f} MB{built} ({report['action']})"
+            + (f" +{len(report['seed_indexes'])} seed indexes" if report.get("seed_indexes") else "")
+            + (f"\n[SCHEMA] pending: {', '.join(report['pending'])}"
+               f" (python -m db.schema --migrate / --split-content)" if report.get("pending") else ""))
+
+
+if __name__ == "__main__":
+    # python -m db.schema                  : create/verify indexes and rebuild stale ones
+    # python -m db.schema --migrate        : run the data backfills not applied yet
+    # python -m db.schema --split-content  : move vector_embeddings.content out, then DROP it
+    import argparse
+
+    from .engine import get_engine
+
+    ap = argparse.ArgumentParser(description="Schema, index and data migrations for vector_embeddings")
+    ap.add_argument("--migrate", action="store_true", help="run pending backfills (typed columns, aliases)")
+    ap.add_argument("--force", action="store_true", help="with --migrate: rerun applied backfills too")
+    ap.add_argument("--split-content", action="store_true",
+                    help="copy content to article_contents and drop the column (irreversible)")
+    args = ap.parse_args()
+
+    engine = get_engine()
+    if args.split_content:
+        print(f"[SCHEMA] {split_content(engine)} rows copied to article_contents, content column dropped")
+    if args.migrate:
+        print(f"[SCHEMA] migrations: {run_migrations(engine, force=args.force)}")
+    print(format_report(ensure_schema(engine, rebuild=True)))
@@ -0,0 +1,130 @@
+# jobs/crawl_job.py
+"""
+Background crawl job: runs check_for_change for a list of seeds outside the
+Streamlit script, so reruns and page loads never crawl. Progress is persisted
+in the run store (jobs/runs.py) and results in the vector store.
+
+    python -m jobs.crawl_job --sheet <csv url>      # crawl every seed of a sheet
+    python -m jobs.crawl_job --job <id>             # run a queued job (used by the app)
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+import threading
+import time
+import traceback
+from typing import Any, Callable, Dict, List, Optional
+
+from config import CACHE_DIR
+from jobs.runs import HEARTBEAT_SECONDS, run_store
+from utils.metrics import metrics
+
+DEFAULT_PARAMS = {"max_depth": 1, "max_pages": 25, "delay": 0.5, "respect_robots": True}
+
+LOG_DIR = os.path.join(CACHE_DIR, "jobs")
+_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def launch_crawl(seeds: List[str], params: Dict[str, Any]) -> Optional[int]:
+    """
+    Queue a crawl of `seeds` and start it in a detached process.
+    Returns the job id, or None if a job is already queued or running.
+    """
+    if run_store.active():  # also marks jobs whose process died as failed
+        return None
+    job_id = run_store.create(list(seeds), {**DEFAULT_PARAMS, **params}, exclusive=True)
+    if job_id is None:
+        return None
+    os.makedirs(LOG_DIR, exist_ok=True)
+    with open(os.path.join(LOG_DIR, f"job-{job_id}.log"), "ab") as log:
+        subprocess.Popen(
+            [sys.executable, "-m", "jobs.crawl_job", "--job", str(job_id)],
+            cwd=_ROOT,
+            stdout=log,
+            stderr=subprocess.STDOUT,
+            start_new_session=True,  # survives Streamlit reruns and restarts
+        )
+    print(f"[JOB] launched job {job_id} for {len(seeds)} seed(s)")
+    return job_id
+
+
+def crawl_seed(seed: str, params: Dict[str, Any],
+               on_resource: Optional[Callable[[Dict], None]] = None) -> int:
+    """One check_for_change run; returns the number of changed resources."""
+    from utils.check_for_change import check_for_change
+
+    changed = check_for_change(
+        seed_url=seed,
+        output_bool=False,
+        max_depth=params["max_depth"],
+        max_pages=params["max_pages"],
+        delay=params["delay"],
+        respect_robots=params["respect_robots"],
+        on_resource=on_resource,
+    )
+    return len(changed or [])
+
+
+def run_job(job_id: int) -> None:
+    job = run_store.get(job_id)
+    if job is None:
+        raise SystemExit(f"Unknown job {job_id}")
+    run_store.update(job_id, status="running", pid=os.getpid(), started_at=time.time(), heartbeat_at=time.time())
+    stop = threading.Event()
+
+    def heartbeat() -> None:
+        # lets the app tell a long crawl from a process that died without updating its row
+        while not stop.wait(HEARTBEAT_SECONDS):
+            run_store.update(job_id, heartbeat_at=time.time())
+
+    threading.Thread(target=heartbeat, name="job-heartbeat", daemon=True).start()
+    changed = 0
+    try:
+        for i, seed in enumerate(job["seeds"], start=1):
+            run_store.update(job_id, current_seed=seed)
+            try:
+                changed += crawl_seed(
+                    seed, job["params"],
+                    on_resource=lambda r, seed=seed: run_store.add_event(job_id, seed, r.get("url"), r.get("title")),
+                )
+            except Exception as e:  # one failing site does not stop the job
+                print(f"[JOB] {seed} failed: {e}")
+            run_store.update(job_id, seeds_done=i, changed=changed)
+            metrics.dump()  # read by the app's metrics panel
+        run_store.update(job_id, status="done", finished_at=time.time(), current_seed=None)
+    except BaseException:
+        run_store.update(job_id, status="failed", finished_at=time.time(), error=traceback.format_exc()[-2000:])
+        raise
+    finally:
+        stop.set()
+    print(f"[JOB] job {job_id} done: {changed} changed resource(s)")
+
+
+def seeds_from_sheet(sheet_url: str) -> List[str]:
+    import pandas as pd
+    df = pd.read_csv(sheet_url)
+    return df.iloc[:, 0].dropna().astype(str).tolist()
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--job", type=int, help="id of a queued job")
+    ap.add_argument("--sheet", help="CSV/Google Sheet URL with seeds in the first column")
+    ap.add_argument("--max-depth", type=int, default=DEFAULT_PARAMS["max_depth"])
+    ap.add_argument("--max-pages", type=int, default=DEFAULT_PARAMS["max_pages"])
+    ap.add_argument("--delay", type=float, default=DEFAULT_PARAMS["delay"])
+    ap.add_argument("--ignore-robots", action="store_true")
+    args = ap.parse_args()
+
+    if args.job is not None:
+        run_job(args.job)
+    elif args.sheet:
+        job_id = run_store.create(seeds_from_sheet(args.sheet), {
+            "max_depth": args.max_depth, "max_pages": args.max_pages,
+            "delay": args.delay, "respect_robots": not args.ignore_robots,
+        })
+        run_job(job_id)
+    else:
+        ap.error("--job or --sheet is required")
@@ -0,0 +1,171 @@
+# jobs/runs.py
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+from config import CACHE_DIR
+
+# Persisted state of background crawl jobs (one row per job), shared by the
+# Streamlit app, the job processes and the scheduler.
+RUNS_PATH = os.getenv("CRAWL_RUNS_PATH", os.path.join(CACHE_DIR, "crawl_runs.sqlite"))
+
+ACTIVE = ("queued", "running")
+HEARTBEAT_SECONDS = 15     # how often a running job refreshes heartbeat_at
+HEARTBEAT_TIMEOUT = 120    # a running job silent for longer is considered dead
+
+
+def _pid_alive(pid: Optional[int]) -> bool:
+    if not pid:
+        return False
+    try:
+        # Our own child (launched by this app process): reap it if it exited, otherwise
+        # it stays a zombie that os.kill(pid, 0) still reports as alive.
+        done, _ = os.waitpid(pid, os.WNOHANG)
+        return done == 0
+    except ChildProcessError:
+        pass  # not our child: its parent reaps it
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _job_alive(job: Dict[str, Any]) -> bool:
+    """The job process exists and, if it sends heartbeats, sent one recently."""
+    if not _pid_alive(job["pid"]):
+        return False
+    beat = job.get("heartbeat_at")
+    return beat is None or time.time() - beat <= HEARTBEAT_TIMEOUT
+
+
+class RunStore:
+    def __init__(self, path: str = RUNS_PATH):
+        self.path = path
+        self._local = threading.local()
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)  # explicit transactions
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript("""
+                CREATE TABLE IF NOT EXISTS jobs (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    status TEXT NOT NULL,              -- queued | running | done | failed
+                    seeds TEXT NOT NULL,               -- JSON list
+                    params TEXT NOT NULL,              -- JSON crawl parameters
+                    pid INTEGER,
+                    created_at REAL NOT NULL,
+                    started_at REAL,
+                    finished_at REAL,
+                    seeds_done INTEGER NOT NULL DEFAULT 0,
+                    changed INTEGER NOT NULL DEFAULT 0,
+                    current_seed TEXT,
+                    error TEXT,
+                    heartbeat_at REAL                  -- refreshed by the job process while it runs
+                );
+                -- changed resources as they are found, for live progress in the app
+                CREATE TABLE IF NOT EXISTS job_events (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    job_id INTEGER NOT NULL,
+                    seed TEXT,
+                    url TEXT,
+                    title TEXT,
+                    created_at REAL NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS job_events_job ON job_events(job_id, id);
+            """)
+            columns = {r["name"] for r in conn.execute("PRAGMA table_info(jobs)")}
+            if "heartbeat_at" not in columns:  # run store created before heartbeats
+                conn.execute("ALTER TABLE jobs ADD COLUMN heartbeat_at REAL")
+            self._local.conn = conn
+        return conn
+
+    def _row(self, row: Optional[sqlite3.Row]) -> Optional[Dict[str, Any]]:
+        if row is None:
+            return None
+        job = dict(row)
+        job["seeds"] = json.loads(job["seeds"])
+        job["params"] = json.loads(job["params"])
+        return job
+
+    def create(self, seeds: List[str], params: Dict[str, Any], *, exclusive: bool = False) -> Optional[int]:
+        """Queue a job; with exclusive=True, returns None if another job is queued or running."""
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")  # serializes concurrent "refresh" clicks
+        try:
+            if exclusive and conn.execute(
+                "SELECT 1 FROM jobs WHERE status IN (?, ?) LIMIT 1", ACTIVE
+            ).fetchone():
+                conn.rollback()
+                return None
+            cur = conn.execute(
+                "INSERT INTO jobs (status, seeds, params, created_at) VALUES ('queued', ?, ?, ?)",
+                (json.dumps(seeds), json.dumps(params), time.time()),
+            )
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        return int(cur.lastrowid)
+
+    def get(self, job_id: int) -> Optional[Dict[str, Any]]:
+        return self._row(self._conn().execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone())
+
+    def update(self, job_id: int, **fields: Any) -> None:
+        if not fields:
+            return
+        cols = ", ".join(f"{k} = ?" for k in fields)
+        self._conn().execute(f"UPDATE jobs SET {cols} WHERE id = ?", (*fields.values(), job_id))
+
+    def add_event(self, job_id: int, seed: str, url: Optional[str], title: Optional[str]) -> None:
+        self._conn().execute(
+            "INSERT INTO job_events (job_id, seed, url, title, created_at) VALUES (?, ?, ?, ?, ?)",
+            (job_id, seed, url, title, time.time()),
+        )
+
+    def events(self, job_id: int, after: int = 0) -> List[Dict[str, Any]]:
+        """Events of a job with an id greater than `after` (poll with the last id seen)."""
+        rows = self._conn().execute(
+            "SELECT * FROM job_events WHERE job_id = ? AND id > ? ORDER BY id", (job_id, after)
+        ).fetchall()
+        return [dict(r) for r in rows]
+
+    def active(self) -> Optional[Dict[str, Any]]:
+        """
+        The queued/running job, if any; jobs whose process died (or stopped sending
+        heartbeats) are marked failed.
+        """
+        rows = self._conn().execute(
+            "SELECT * FROM jobs WHERE status IN (?, ?) ORDER BY id DESC", ACTIVE
+        ).fetchall()
+        for row in rows:
+            job = self._row(row)
+            stale_queue = job["status"] == "queued" and time.time() - job["created_at"] > 60
+            if (job["status"] == "running" and not _job_alive(job)) or stale_queue:
+                self.update(job["id"], status="failed", finished_at=time.time(),
+                            error=job["error"] or "process exited unexpectedly")
+                continue
+            return job
+        return None
+
+    def last_finished(self) -> Optional[Dict[str, Any]]:
+        return self._row(self._conn().execute(
+            "SELECT * FROM jobs WHERE status = 'done' ORDER BY finished_at DESC LIMIT 1"
+        ).fetchone())
+
+    def recent(self, limit: int = 10) -> List[Dict[str, Any]]:
+        rows = self._conn().execute("SELECT * FROM jobs ORDER BY id DESC LIMIT ?", (limit,)).fetchall()
+        return [self._row(r) for r in rows]
+
+
+run_store = RunStore()
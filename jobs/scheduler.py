@@ -0,0 +1,263 @@
+# jobs/scheduler.py
+"""
+Adaptive revisit scheduler: a long-running process that crawls each seed when it
+is due, records how often check_for_change finds updates and how long crawls take,
+and derives each seed's revisit interval and page budget from that history.
+
+    python -m jobs.scheduler --sheet "<CSV url>"     # seeds reloaded every cycle
+    python -m jobs.scheduler --seeds https://a.com https://b.com
+    python -m jobs.scheduler --sheet "<CSV url>" --status
+"""
+
+import argparse
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional
+
+from config import (
+    SCHEDULER_DEFAULT_INTERVAL_H, SCHEDULER_DEFAULT_PAGES, SCHEDULER_MAX_INTERVAL_H,
+    SCHEDULER_MAX_PAGES, SCHEDULER_MIN_INTERVAL_H, SCHEDULER_MIN_PAGES,
+    SCHEDULER_PAGES_PER_HOUR, SCHEDULER_WORKERS,
+)
+from jobs.crawl_job import DEFAULT_PARAMS, crawl_seed, seeds_from_sheet
+from jobs.runs import RUNS_PATH
+from utils.metrics import metrics
+from utils.url_utils import normalize_url
+
+_HOUR = 3600.0
+_ALPHA = 0.3          # weight of the latest run in the moving averages
+TARGET_RATE = 0.5     # share of visits that should find updates
+_POLL_SECONDS = 30
+
+
+# --------------------- policy ---------------------
+
+def next_schedule(sched: Dict[str, Any], changed: int, duration: float) -> Dict[str, Any]:
+    """
+    Update a seed's statistics after a crawl and derive its next interval and page budget.
+    The change rate is a moving average of "this run found updates"; the interval is
+    scaled so that about TARGET_RATE of the visits find something (shorter when most
+    visits find changes, longer when few do), by at most x2 per run. The page budget
+    grows while changes are found and shrinks on quiet seeds.
+    """
+    rate = (1 - _ALPHA) * sched["change_rate"] + _ALPHA * (1.0 if changed else 0.0)
+    avg_duration = duration if not sched["runs"] else (1 - _ALPHA) * sched["avg_duration"] + _ALPHA * duration
+
+    factor = min(2.0, max(0.5, TARGET_RATE / max(rate, 1e-3)))
+    interval = min(SCHEDULER_MAX_INTERVAL_H, max(SCHEDULER_MIN_INTERVAL_H, sched["interval_h"] * factor))
+
+    pages = sched["max_pages"] * (1.25 if changed else 0.8)
+    pages = int(min(SCHEDULER_MAX_PAGES, max(SCHEDULER_MIN_PAGES, round(pages))))
+
+    now = time.time()
+    return {
+        **sched,
+        "change_rate": rate,
+        "avg_duration": avg_duration,
+        "interval_h": interval,
+        "max_pages": pages,
+        "runs": sched["runs"] + 1,
+        "changes": sched["changes"] + int(changed > 0),
+        "last_run_at": now,
+        "next_run_at": now + interval * _HOUR,
+    }
+
+
+# --------------------- persistence ---------------------
+
+class ScheduleStore:
+    """Per-seed schedules and crawl history, next to the job state (jobs/runs.py)."""
+
+    def __init__(self, path: str = RUNS_PATH):
+        self.path = path
+        self._local = threading.local()
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript("""
+                CREATE TABLE IF NOT EXISTS seed_schedules (
+                    seed TEXT PRIMARY KEY,
+                    interval_h REAL NOT NULL,
+                    max_pages INTEGER NOT NULL,
+                    next_run_at REAL NOT NULL,
+                    last_run_at REAL,
+                    runs INTEGER NOT NULL DEFAULT 0,
+                    changes INTEGER NOT NULL DEFAULT 0,
+                    change_rate REAL NOT NULL DEFAULT 0.5,  -- starts at TARGET_RATE
+                    avg_duration REAL NOT NULL DEFAULT 0,
+                    last_error TEXT
+                );
+                CREATE TABLE IF NOT EXISTS seed_runs (
+                    seed TEXT NOT NULL,
+                    started_at REAL NOT NULL,
+                    duration REAL NOT NULL,
+                    max_pages INTEGER NOT NULL,
+                    changed INTEGER NOT NULL,
+                    error TEXT
+                );
+                CREATE INDEX IF NOT EXISTS seed_runs_seed ON seed_runs(seed, started_at);
+            """)
+            self._local.conn = conn
+        return conn
+
+    def ensure(self, seeds: List[str]) -> None:
+        """New seeds are due now with the default interval and budget."""
+        conn = self._conn()
+        conn.executemany(
+            "INSERT OR IGNORE INTO seed_schedules (seed, interval_h, max_pages, next_run_at) VALUES (?, ?, ?, ?)",
+            [(s, SCHEDULER_DEFAULT_INTERVAL_H, SCHEDULER_DEFAULT_PAGES, time.time()) for s in seeds],
+        )
+        conn.commit()
+
+    def all(self, seeds: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+        rows = [dict(r) for r in self._conn().execute("SELECT * FROM seed_schedules ORDER BY next_run_at")]
+        return [r for r in rows if seeds is None or r["seed"] in seeds]
+
+    def due(self, seeds: List[str], now: float) -> List[Dict[str, Any]]:
+        """Due seeds, most overdue relative to their interval first."""
+        due = [s for s in self.all(seeds) if s["next_run_at"] <= now]
+        return sorted(due, key=lambda s: (now - s["next_run_at"]) / (s["interval_h"] * _HOUR), reverse=True)
+
+    def record(self, sched: Dict[str, Any], started_at: float, duration: float,
+               changed: int, error: Optional[str]) -> Dict[str, Any]:
+        if error:
+            # Failed crawl: keep the statistics, retry after the current interval
+            updated = {**sched, "last_error": error[-500:], "last_run_at": time.time(),
+                       "next_run_at": time.time() + sched["interval_h"] * _HOUR}
+        else:
+            updated = {**next_schedule(sched, changed, duration), "last_error": None}
+        conn = self._conn()
+        conn.execute(
+            "INSERT INTO seed_runs (seed, started_at, duration, max_pages, changed, error) VALUES (?, ?, ?, ?, ?, ?)",
+            (sched["seed"], started_at, duration, sched["max_pages"], changed, error),
+        )
+        cols = [c for c in updated if c != "seed"]
+        conn.execute(
+            f"UPDATE seed_schedules SET {', '.join(f'{c} = ?' for c in cols)} WHERE seed = ?",
+            (*[updated[c] for c in cols], sched["seed"]),
+        )
+        conn.commit()
+        return updated
+
+
+# --------------------- daemon ---------------------
+
+class Scheduler:
+    def __init__(self, store: ScheduleStore, workers: int = SCHEDULER_WORKERS,
+                 pages_per_hour: int = SCHEDULER_PAGES_PER_HOUR, params: Optional[Dict[str, Any]] = None):
+        self.store = store
+        self.workers = max(1, workers)
+        self.pages_per_hour = pages_per_hour
+        self.params = {**DEFAULT_PARAMS, **(params or {})}
+        self._budget = float(pages_per_hour)  # token bucket of pages, refilled continuously
+        self._refilled_at = time.time()
+        self._running: set = set()
+        self._lock = threading.Lock()
+        self._pool = ThreadPoolExecutor(max_workers=self.workers)
+
+    def _refill(self) -> None:
+        now = time.time()
+        self._budget = min(self.pages_per_hour,
+                           self._budget + (now - self._refilled_at) / _HOUR * self.pages_per_hour)
+        self._refilled_at = now
+
+    def _run(self, sched: Dict[str, Any]) -> None:
+        started = time.time()
+        changed, error = 0, None
+        try:
+            try:
+                changed = crawl_seed(sched["seed"], {**self.params, "max_pages": sched["max_pages"]})
+            except Exception as e:
+                error = repr(e)
+            duration = time.time() - started
+            updated = self.store.record(sched, started, duration, changed, error)
+            metrics.dump()
+            print(f"[SCHEDULER] {sched['seed']} changed={changed} in {duration:.0f}s "
+                  f"-> every {updated['interval_h']:.1f}h, {updated['max_pages']} pages"
+                  + (f" (error: {error})" if error else ""))
+        except Exception as e:
+            print(f"[SCHEDULER] {sched['seed']} could not record the run: {e}")
+        finally:
+            # always free the seed, or a failed record() would keep it unschedulable
+            with self._lock:
+                self._running.discard(sched["seed"])
+
+    def tick(self, seeds: List[str]) -> int:
+        """Start due seeds while workers and page budget allow; returns how many started."""
+        self.store.ensure(seeds)
+        started = 0
+        with self._lock:
+            self._refill()
+            for sched in self.store.due(seeds, time.time()):
+                if len(self._running) >= self.workers:
+                    break
+                if sched["seed"] in self._running:
+                    continue
+                cost = min(sched["max_pages"], self.pages_per_hour)
+                if cost > self._budget:
+                    break  # keep the order: wait for budget rather than favour small seeds
+                self._budget -= cost
+                self._running.add(sched["seed"])
+                self._pool.submit(self._run, sched)
+                started += 1
+        return started
+
+    def run_forever(self, load_seeds) -> None:
+        print(f"[SCHEDULER] started: {self.workers} worker(s), {self.pages_per_hour} pages/hour")
+        seeds: List[str] = []
+        while True:
+            try:
+                seeds = [normalize_url(s) for s in load_seeds()]
+            except Exception as e:
+                print(f"[SCHEDULER] could not load seeds ({e}); keeping {len(seeds)} known seed(s)")
+            self.tick(seeds)
+            time.sleep(_POLL_SECONDS)
+
+
+def format_status(store: ScheduleStore) -> str:
+    lines = [f"{'seed':50s} {'every':>8s} {'pages':>5s} {'rate':>5s} {'runs':>4s} {'avg':>6s}  next"]
+    for s in store.all():
+        nxt = time.strftime("%Y-%m-%d %H:%M", time.localtime(s["next_run_at"]))
+        lines.append(f"{s['seed'][:50]:50s} {s['interval_h']:7.1f}h {s['max_pages']:5d} "
+                     f"{s['change_rate']:5.2f} {s['runs']:4d} {s['avg_duration']:5.0f}s  {nxt}"
+                     + ("  !" if s["last_error"] else ""))
+    return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--sheet", help="CSV/Google Sheet URL with seeds in the first column")
+    ap.add_argument("--seeds", nargs="*", default=[])
+    ap.add_argument("--workers", type=int, default=SCHEDULER_WORKERS)
+    ap.add_argument("--pages-per-hour", type=int, default=SCHEDULER_PAGES_PER_HOUR)
+    ap.add_argument("--max-depth", type=int, default=DEFAULT_PARAMS["max_depth"])
+    ap.add_argument("--delay", type=float, default=DEFAULT_PARAMS["delay"])
+    ap.add_argument("--ignore-robots", action="store_true")
+    ap.add_argument("--status", action="store_true", help="print the schedules and exit")
+    args = ap.parse_args()
+
+    store = ScheduleStore()
+    if args.status:
+        print(format_status(store))
+        raise SystemExit(0)
+    if not (args.sheet or args.seeds):
+        ap.error("--sheet or --seeds is required")
+
+    def load_seeds() -> List[str]:
+        return (seeds_from_sheet(args.sheet) if args.sheet else []) + list(args.seeds)
+
+    metrics.serve()  # METRICS_PORT, on METRICS_HOST
+    Scheduler(
+        store,
+        workers=args.workers,
+        pages_per_hour=args.pages_per_hour,
+        params={"max_depth": args.max_depth, "delay": args.delay, "respect_robots": not args.ignore_robots},
+    ).run_forever(load_seeds)
@@ -0,0 +1,99 @@
+# ui/results_view.py
+import math
+from datetime import datetime
+from typing import Dict, Optional
+
+import pandas as pd
+import streamlit as st
+
+from config import RESULTS_PAGE_SIZE
+from db.backends import get_storage
+
+# Results table read page by page from the store (get_storage().browse_articles):
+# counts per seed come from one GROUP BY, a page is at most RESULTS_PAGE_SIZE rows
+# without summaries, and a summary is fetched only for the rows the user selects.
+# Building and rendering a page costs the same whatever the size of the corpus.
+
+
+@st.cache_data(ttl=60, show_spinner=False)
+def _seed_counts(seeds: tuple, since: Optional[datetime], query: Optional[str]) -> Dict[str, int]:
+    return get_storage().seed_counts(list(seeds), since=since, query=query)
+
+
+@st.cache_data(ttl=60, show_spinner=False)
+def _page(seeds: tuple, since: Optional[datetime], query: Optional[str], offset: int, limit: int):
+    return get_storage().browse_articles(list(seeds), since=since, query=query, offset=offset, limit=limit)
+
+
+@st.cache_data(ttl=600, show_spinner=False)
+def _summary(url: str) -> str:
+    return get_storage().get_summary(url)
+
+
+def clear_cache() -> None:
+    """Forget cached pages and counts (after a crawl stored new articles)."""
+    _seed_counts.clear()
+    _page.clear()
+
+
+def render_results(key: str, seed_labels: Dict[str, str], *, since: Optional[datetime] = None,
+                   page_size: int = RESULTS_PAGE_SIZE) -> int:
+    """
+    Searchable, paginated table of the stored articles of `seed_labels` (stored seed ->
+    company label), grouped by seed; `since` keeps articles stored or meaningfully
+    updated after that time.
+    `key` tells several views on the same page apart. Returns the number of matches.
+    """
+    seeds = tuple(seed_labels)
+    query = st.text_input("🔎 Rechercher (titre ou lien)", key=f"{key}_query").strip() or None
+    counts = _seed_counts(seeds, since, query)
+    total = sum(counts.values())
+    if not total:
+        st.info("Aucun article trouvé." if query else "Aucun article enregistré pour l'instant.")
+        return 0
+
+    pages = math.ceil(total / page_size)
+    page_key = f"{key}_page"
+    if st.session_state.get(page_key, 1) > pages:  # fewer pages after a new search
+        st.session_state[page_key] = 1
+    col_info, col_page = st.columns([4, 1])
+    with col_page:
+        page = st.number_input("Page", min_value=1, max_value=pages, step=1, key=page_key) if pages > 1 else 1
+    with col_info:
+        st.caption(f"{total} article(s) pour {len(counts)} entreprise(s) — page {page}/{pages}")
+
+    rows = _page(seeds, since, query, (page - 1) * page_size, page_size)
+
+    # Rows come ordered by seed: one pass labels the first row of each group
+    records, previous = [], None
+    for r in rows:
+        label = ""
+        if r["seed"] != previous:
+            label = f"{seed_labels.get(r['seed'], r['seed'])} ({counts.get(r['seed'], 0)})"
+            previous = r["seed"]
+        records.append({
+            "Entreprise": label,
+            "Titre": r["title"],
+            "Type": (r["content_type"] or "").upper(),
+            "Dernière date de parution": r["last_date"],
+            "Lien de l'article": r["url"],
+        })
+
+    event = st.dataframe(
+        pd.DataFrame(records),
+        key=f"{key}_table",
+        hide_index=True,
+        use_container_width=True,
+        on_select="rerun",
+        selection_mode="multi-row",
+        column_config={"Lien de l'article": st.column_config.LinkColumn()},
+    )
+
+    selected = event.selection.rows if event else []
+    if selected:
+        st.caption("Contenu (résumé par IA) des articles sélectionnés")
+    for i in selected:
+        r = rows[i]
+        with st.expander(r["title"] or r["url"], expanded=True):
+            st.markdown(_summary(r["url"]) or "_Pas de résumé._")
+    return total
@@ -41,3 +41,43 @@ def render_sidebar(default_download_format="TXT", sheet_url_secret_key="CSV_URL"
         "delay": delay,
         "respect_robots": respect_robots
     }
+
+
+def render_metrics_panel():
+    """Sidebar panel: where run time goes, from the metrics of the app and of the crawl jobs."""
+    import json
+    import pandas as pd
+    from utils.metrics import (
+        counter_value, load_snapshots, metrics, reset_snapshots, summary_rows, to_prometheus,
+    )
+
+    with st.sidebar.expander("📊 Métriques"):
+        metrics.dump()  # include this process
+        snap = load_snapshots()
+        fetches = sum(h[-1] for _, h in snap.get("histograms", {}).get("fetch_seconds", []))
+        llm_calls = sum(h[-1] for _, h in snap.get("histograms", {}).get("llm_seconds", []))
+
+        c1, c2 = st.columns(2)
+        c1.metric("Pages téléchargées", int(fetches))
+        c2.metric("Mo téléchargés", f"{counter_value(snap, 'fetch_bytes_total') / 1e6:.1f}")
+        c1.metric("Appels LLM", int(llm_calls))
+        c2.metric("Tokens LLM", int(counter_value(snap, "llm_tokens_total")))
+        c1.metric("Requêtes d'embedding", int(counter_value(snap, "embedding_requests_total")))
+        for cache in ("embedding", "fingerprint"):
+            hits = counter_value(snap, "cache_requests_total", cache=cache, result="hit")
+            total = hits + counter_value(snap, "cache_requests_total", cache=cache, result="miss")
+            c2.metric(f"Cache {cache}", f"{hits / total:.0%}" if total else "—")
+
+        rows = summary_rows(snap)
+        if rows:
+            st.dataframe(pd.DataFrame(rows), hide_index=True, use_container_width=True)
+        else:
+            st.caption("Aucune mesure pour l'instant.")
+
+        st.download_button("Prometheus", to_prometheus(snap), file_name="metrics.prom", mime="text/plain")
+        st.download_button("JSON", json.dumps(snap, indent=2), file_name="metrics.json",
+                           mime="application/json")
+        if st.button("Réinitialiser les métriques"):
+            metrics.reset()
+            reset_snapshots()
+            st.rerun()
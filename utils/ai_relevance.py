@@ -1,42 +1,28 @@
 # utils/ai_relevance.py
 
 import re
-import streamlit as st
 from typing import List
 
-from langchain_openai import ChatOpenAI, OpenAIEmbeddings
+from utils.llm import chat_model
 from langchain.schema import SystemMessage, HumanMessage
 from langchain_community.vectorstores import FAISS
-from langchain.text_splitter import RecursiveCharacterTextSplitter
 
-from config import CHUNK_SIZE, CHUNK_OVERLAP
+from utils.token_budget import chunk_text, fit_to_budget
+from utils.embeddings import ChunkEmbeddings
 
 # --- LLMs and Embeddings ---
-llm = ChatOpenAI(
-    model="gpt-4o-mini",
-    temperature=0,
-    api_key=st.secrets["OPENAI_API_KEY"],
-)
-
-embeddings = OpenAIEmbeddings(
-    model="text-embedding-3-small",
-    api_key=st.secrets["OPENAI_API_KEY"],
-)
-
-# --- Text splitter ---
-text_splitter = RecursiveCharacterTextSplitter(
-    chunk_size=CHUNK_SIZE,
-    separators=["\n\n", "\n", ".", "!", "?", ",", " "],
-    chunk_overlap=CHUNK_OVERLAP,
-)
+llm = chat_model(model="gpt-4o-mini", temperature=0, task="relevance")
+
+# Shared batched embedding backend (pooled client, batched requests)
+embeddings = ChunkEmbeddings()
 
 # --- Preprocessing ---
 def preprocess_text(text: str):
     """
-    Normalize + split text into chunks.
+    Normalize + split text into token-bounded chunks.
     """
     text = re.sub(r"\s+", " ", text).strip().lower()
-    return text_splitter.split_text(text)
+    return chunk_text(text, "relevance")
 
 # --- Build FAISS retriever ---
 def build_retriever(chunks: List[str]):
@@ -100,7 +86,7 @@ def check_relevance_with_ai(text: str, purpose: str) -> bool:
         Contexte de recherche : {purpose}
 
         Voici les extraits de texte retrouvés :
-        {chr(10).join([d.page_content for d in docs])}
+        {chr(10).join(fit_to_budget([d.page_content for d in docs], "relevance"))}
 
         Question : Ce texte est-il pertinent ?
         Réponds uniquement par "oui" ou "non".
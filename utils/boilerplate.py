@@ -0,0 +1,190 @@
+# utils/boilerplate.py
+
+import hashlib
+import json
+import os
+import re
+import threading
+from collections import OrderedDict
+from typing import Dict, List
+from urllib.parse import urlparse
+
+from config import CACHE_DIR, BOILERPLATE_MIN_PAGES, BOILERPLATE_MIN_RATIO
+from utils.token_budget import count_tokens
+
+TEMPLATES_PATH = os.path.join(CACHE_DIR, "boilerplate_templates.json")
+
+# Block counts cover the most recently observed pages of each domain only, so a
+# template change is learned once enough pages have been seen again
+MAX_URLS_PER_DOMAIN = 500
+
+
+def domain_key(url: str) -> str:
+    """Lower-cased netloc without its 'www.' prefix, used to group pages of one site."""
+    netloc = urlparse(url).netloc.lower()
+    return netloc[4:] if netloc.startswith("www.") else netloc
+
+
+def _fingerprint(block: str) -> str:
+    norm = re.sub(r"\s+", " ", block).strip().lower()
+    return hashlib.sha1(norm.encode("utf-8")).hexdigest()[:16]
+
+
+def _url_key(url: str) -> str:
+    return hashlib.sha1(url.encode("utf-8")).hexdigest()[:12]
+
+
+class TemplateLearner:
+    """
+    Learns, per domain, which text blocks belong to the site template
+    (menus, cookie banners, footers...) by counting on how many of the last
+    MAX_URLS_PER_DOMAIN distinct pages each block fingerprint appears (latest
+    version of each page). Blocks seen on enough pages are stripped before the
+    text is sent to the AI stages.
+    """
+
+    def __init__(self, path: str = TEMPLATES_PATH,
+                 min_pages: int = BOILERPLATE_MIN_PAGES,
+                 min_ratio: float = BOILERPLATE_MIN_RATIO):
+        self.path = path
+        self.min_pages = max(2, min_pages)
+        self.min_ratio = min_ratio
+        self._lock = threading.Lock()
+        self._domains: Dict[str, dict] = {}
+        self._stats: Dict[str, Dict[str, int]] = {}
+        self._dirty = False
+        self.load()
+
+    # --------------------- persistence ---------------------
+
+    def load(self) -> None:
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                raw = json.load(f)
+        except (OSError, ValueError):
+            return
+        if raw.get("version") != 2:
+            return  # version 1 kept lifetime counts without the pages: relearn
+        with self._lock:
+            for domain, urls in (raw.get("domains") or {}).items():
+                state = self._state(domain)
+                for key, fps in urls.items():
+                    self._add_page(state, key, fps)
+
+    def save(self) -> None:
+        with self._lock:
+            if not self._dirty:
+                return
+            payload = {
+                "version": 2,
+                "domains": {d: dict(s["urls"]) for d, s in self._domains.items()},  # oldest first
+            }
+            self._dirty = False
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp = f"{self.path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(payload, f)
+        os.replace(tmp, self.path)
+
+    # --------------------- learning ---------------------
+
+    def _state(self, domain: str) -> dict:
+        # urls: url key -> block fingerprints of its latest version, least recent first
+        return self._domains.setdefault(domain, {"pages": 0, "blocks": {}, "urls": OrderedDict()})
+
+    @staticmethod
+    def _remove_page(state: dict, key: str) -> None:
+        counts = state["blocks"]
+        for fp in state["urls"].pop(key):
+            counts[fp] -= 1
+            if not counts[fp]:
+                del counts[fp]
+
+    def _add_page(self, state: dict, key: str, fps: List[str]) -> None:
+        if key in state["urls"]:
+            self._remove_page(state, key)
+        state["urls"][key] = fps
+        counts = state["blocks"]
+        for fp in fps:
+            counts[fp] = counts.get(fp, 0) + 1
+        while len(state["urls"]) > MAX_URLS_PER_DOMAIN:
+            self._remove_page(state, next(iter(state["urls"])))
+        state["pages"] = len(state["urls"])
+
+    def observe(self, domain: str, url: str, blocks: List[str]) -> None:
+        """Count the page's distinct blocks; a page seen again replaces its previous version."""
+        fps = sorted({_fingerprint(b) for b in blocks})
+        with self._lock:
+            state = self._state(domain)
+            key = _url_key(url)
+            if state["urls"].get(key) == fps:
+                state["urls"].move_to_end(key)
+            else:
+                self._add_page(state, key, fps)
+            self._dirty = True
+
+    def is_template(self, domain: str, block: str) -> bool:
+        state = self._domains.get(domain)
+        if not state or state["pages"] < self.min_pages:
+            return False
+        count = state["blocks"].get(_fingerprint(block), 0)
+        return count >= self.min_pages and count / state["pages"] >= self.min_ratio
+
+    def strip(self, domain: str, blocks: List[str]) -> List[str]:
+        """Return the blocks that are not part of the learned template."""
+        kept = [b for b in blocks if not self.is_template(domain, b)]
+        # A page made only of template blocks (e.g. a bare listing): keep it as is
+        return kept or list(blocks)
+
+    def clean_page(self, seed_url: str, url: str, blocks: List[str]) -> str:
+        """
+        Learn from the page, then return its text without template blocks.
+        Token counts before/after are accumulated for the report.
+        """
+        domain = domain_key(seed_url)
+        self.observe(domain, url, blocks)
+        cleaned = " ".join(self.strip(domain, blocks))
+
+        before = count_tokens(" ".join(blocks))
+        after = count_tokens(cleaned)
+        with self._lock:
+            stats = self._stats.setdefault(domain, {"pages": 0, "tokens_before": 0, "tokens_after": 0})
+            stats["pages"] += 1
+            stats["tokens_before"] += before
+            stats["tokens_after"] += after
+        return cleaned
+
+    # --------------------- reporting ---------------------
+
+    def report(self) -> Dict[str, Dict[str, float]]:
+        """Token reduction per domain for pages cleaned in this process."""
+        out = {}
+        with self._lock:
+            for domain, stats in self._stats.items():
+                before, after = stats["tokens_before"], stats["tokens_after"]
+                out[domain] = {
+                    "pages": stats["pages"],
+                    "tokens_before": before,
+                    "tokens_after": after,
+                    "reduction": (1 - after / before) if before else 0.0,
+                    "template_blocks": sum(
+                        1 for c in self._state(domain)["blocks"].values()
+                        if c >= self.min_pages and c / max(1, self._state(domain)["pages"]) >= self.min_ratio
+                    ),
+                }
+        return out
+
+    def format_report(self, seed_url: str) -> str:
+        domain = domain_key(seed_url)
+        stats = self.report().get(domain)
+        if not stats:
+            return f"[BOILERPLATE] {domain}: no pages cleaned"
+        return (
+            f"[BOILERPLATE] {domain}: {stats['pages']} pages, "
+            f"{stats['tokens_before']} -> {stats['tokens_after']} tokens "
+            f"(-{stats['reduction']:.0%}, {stats['template_blocks']} template blocks)"
+        )
+
+
+# Shared learner for the process (crawler threads and Streamlit reruns)
+template_learner = TemplateLearner()
@@ -0,0 +1,111 @@
+# utils/change_planner.py
+
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from db.repository import build_metadata_envelope, canonical_url_of, SEED_SCOPED
+from utils.hash_utils import compute_content_fingerprint
+from utils.tracing import tracer
+from utils.url_utils import canonicalize_url
+
+# Turns the crawl results of one run into work items: one per unique changed
+# resource, whatever the number of pages it was reached from. A resource found
+# several times (URL variants, PDF linked from several pages) is embedded and
+# upserted once, with the parent pages of every occurrence.
+
+
+def _parent_urls(resource: Dict) -> List[str]:
+    return list((resource.get("pdf_source") or {}).get("parent_urls") or [])
+
+
+def plan_work(resources: Iterable[Dict],
+              is_unchanged: Optional[Callable[[Dict], bool]] = None) -> List[Dict]:
+    """
+    Index resources by canonical URL (utils.url_utils.canonicalize_url) in one pass.
+    The first occurrence of a resource is kept, with the parent URLs of all its
+    occurrences merged in discovery order. Resources without a URL, and those for
+    which `is_unchanged(resource)` is true, are left out. Each returned resource
+    carries "content_hash" (compute_content_fingerprint of its content if missing).
+    """
+    index: Dict[str, Dict] = {}
+    for r in resources:
+        url = canonical_url_of(r)
+        if not url:
+            continue
+        key = canonicalize_url(url)
+        item = index.get(key)
+        if item is None:
+            index[key] = {
+                **r,
+                "pdf_source": {**(r.get("pdf_source") or {}), "parent_urls": _parent_urls(r)},
+            }
+            continue
+        parents = item["pdf_source"]["parent_urls"]
+        parents.extend(p for p in _parent_urls(r) if p not in parents)
+
+    plan = []
+    for item in index.values():
+        item.setdefault("content_hash", compute_content_fingerprint(item.get("content", "")))
+        if is_unchanged and is_unchanged(item):
+            continue
+        plan.append(item)
+    return plan
+
+
+def execute_plan(plan: List[Dict], *, storage, embed: Callable[[str], object],
+                 near_dup=None, fingerprints=None,
+                 stats: Optional[Dict[str, int]] = None) -> List[Tuple[Dict, str]]:
+    """
+    Process planned resources: exact / near-exact duplicates (near_dup index) become
+    aliases without an embedding; the rest are embedded once each and upserted in
+    one storage batch. Fingerprints are recorded once everything is persisted, so a
+    failed run is retried in full next time.
+    Returns (resource, action) per planned resource: inserted / updated / skipped /
+    duplicate / unchanged. `stats` (optional dict) receives this call's near_dup
+    lookup counts (exact, near, embedded).
+    """
+    work: List[Tuple[Dict, object, dict]] = []  # (resource, embedding, metadata envelope)
+    aliases: List[Tuple[str, str]] = []  # (canonical url, alias url) found without embedding
+    outcomes: List[Tuple[Dict, str]] = []
+
+    for r in plan:
+        url_canon = canonical_url_of(r)
+
+        # --- exact / near-exact duplicates are resolved without embedding ---
+        match = near_dup.lookup(
+            url_canon, r["content"], seed=r.get("seed") if SEED_SCOPED else None, stats=stats,
+        ) if near_dup else None
+        if match:
+            kind, other_url, _ = match
+            if kind == "duplicate":
+                aliases.append((other_url, url_canon))
+            outcomes.append((r, kind))  # "unchanged": same text as the stored version
+            continue
+
+        # --- compute embedding (must match your fixed DIM) ---
+        with tracer.span("embed", url=r["url"]):
+            vec = embed(r["content"])
+
+        # --- metadata envelope (always include keys, even if None) ---
+        md = build_metadata_envelope(
+            resource=r,
+            hash_str=r["content_hash"],
+            content_type="pdf" if r.get("pdf_source", {}).get("pdf_url") else "html",
+        )
+        work.append((r, vec, md))
+
+    # --- upsert by similarity policy, all resources in one transaction ---
+    # (one batch for the whole plan, so this is a single span rather than one per resource)
+    if work:
+        with tracer.span("upsert", resources=len(work)):
+            results = storage.upsert_by_similarity_batch(work)
+        for (r, _, _), (action, _) in zip(work, results):
+            outcomes.append((r, action))
+            if near_dup and action in ("inserted", "updated"):
+                near_dup.add(canonical_url_of(r), r["content"], r.get("seed"))
+    if aliases:
+        storage.add_alias_urls(aliases)
+
+    if fingerprints:
+        for r, _ in outcomes:
+            fingerprints.record(r["url"], r["content_hash"], **r.get("validators", {}))
+    return outcomes
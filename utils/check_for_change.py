@@ -1,8 +1,11 @@
-from typing import List, Dict, Union
-from utils.hash_utils import compute_page_hash
+from typing import Callable, List, Dict, Optional, Union
 from crawler.crawler import crawl_site
-from db.repository import get_hash_by_url_tx, upsert_article_by_url_tx, canonical_url_of, build_metadata_envelope, upsert_by_similarity
+from db.backends import get_storage
+from utils.change_planner import execute_plan, plan_work
 from utils.embeddings import embed_text
+from utils.fingerprints import fingerprint_store
+from utils.near_dup import format_report as near_dup_report, near_dup_index
+from utils.tracing import tracer
 
 
 def check_for_change(
@@ -12,70 +15,51 @@ def check_for_change(
     delay: float = 0.5,
     respect_robots: bool = True,
     output_bool: bool = True,
+    stats: Optional[Dict[str, int]] = None,
+    on_resource: Optional[Callable[[Dict], None]] = None,
 ) -> Union[bool, List[Dict]]:
     """
     Pure function: crawl a site, detect changes, return results.
+    A resource is "changed" when its normalized text differs from the fingerprint
+    recorded at the previous run (or it was never seen); unchanged resources are
+    skipped by the crawler before any LLM call, embedding or DB query.
+    `stats` (optional dict) receives the crawl counts (fetched, not_modified,
+    unchanged, irrelevant, changed). `on_resource(resource)` is called by the crawler
+    for each changed relevant resource as soon as it is found (live progress).
     """
 
-    # Step 1: crawl resources
-    resources = crawl_site(seed_url, max_depth, max_pages, delay, respect_robots)
+    # Spans of this run only, in one trace file (TRACING=on), even when the scheduler
+    # checks several seeds in parallel threads
+    with tracer.run(seed_url):
+        storage = get_storage()  # Postgres or local store (STORAGE_BACKEND)
+        stats = stats if stats is not None else {}
 
-    # Step 2: prepare sources from resources
-    sources: Dict[str, Dict[str, str]] = {}
-    for r in resources:
-        pdf_info = r.get("pdf_source", {})
-        for parent_url in pdf_info.get("parent_urls", []):
-            if parent_url not in sources:
-                sources[parent_url] = {"hash": "", "last_date": ""}
+        # Step 1: crawl resources
+        # Known alias URLs (duplicates of stored articles) are not fetched again;
+        # resources whose fingerprint is unchanged are not returned at all
+        resources = crawl_site(seed_url, max_depth, max_pages, delay, respect_robots,
+                               skip_url=storage.is_known_alias,
+                               fingerprints=fingerprint_store, stats=stats, on_resource=on_resource)
 
-    # Step 3: compute hash and detect changes
-    changes_detected = False
-    changed_resources: List[Dict] = []
+        # Step 2: one work item per unique changed resource (duplicates collapsed)
+        plan = plan_work(
+            resources,
+            is_unchanged=lambda r: fingerprint_store.is_unchanged(r["url"], r["content_hash"]),
+        )
+        if len(plan) != len(resources):
+            print(f"[CHANGE] {len(resources)} crawled resources -> {len(plan)} unique changed")
 
-    for parent_url in sources:
-        try:
-            current_hash = compute_page_hash(parent_url)
-        except Exception:
-            current_hash = ""
+        # Step 3: embed and upsert each planned resource once, then record fingerprints
+        near_dup_stats: Dict[str, int] = {}  # this run only (seeds run concurrently in the scheduler)
+        with tracer.span("store", seed=seed_url, resources=len(plan)):
+            execute_plan(plan, storage=storage, embed=embed_text,
+                         near_dup=near_dup_index, fingerprints=fingerprint_store, stats=near_dup_stats)
+        if near_dup_index:
+            print(near_dup_report(near_dup_stats))
 
-        prev_hash = sources[parent_url]["hash"]
-        if prev_hash != current_hash:
+        stats["changed"] = len(plan)
+        print(f"[CHANGE] {seed_url}: changed={stats['changed']} "
+              f"unchanged={stats.get('unchanged', 0) + stats.get('not_modified', 0)} "
+              f"irrelevant={stats.get('irrelevant', 0)}")
 
-            changes_detected = True
-            sources[parent_url]["hash"] = current_hash  # you can delete this later if not used
-
-            for r in resources:
-                if parent_url in r.get("pdf_source", {}).get("parent_urls", []):
-                    sources[parent_url]["last_date"] = r.get("last_date", "")
-
-                    # Decide canonical URL; skip if none
-                    url_canon = canonical_url_of(r)
-                    if not url_canon:
-                        continue
-
-                    # --- compute embedding (must match your fixed DIM) ---
-                    vec = embed_text(r["content"])
-
-                    # --- metadata envelope (always include keys, even if None) ---
-                    md = build_metadata_envelope(
-                        resource=r,
-                        hash_str=None,  # hash no longer used
-                        content_type="pdf" if r.get("pdf_source", {}).get("pdf_url") else "html",
-                    )
-
-                    # --- upsert by similarity policy ---
-                    from db.engine import session_scope
-                    with session_scope() as s:
-                        action, dist = upsert_by_similarity(
-                            s,
-                            resource=r,
-                            embedding=vec,
-                            metadata_envelope=md,
-                        )
-                        # optionally log
-                        # print(f"[UPSERT] {action} url={url_canon} dist={dist}")
-                    if not output_bool:
-                        changed_resources.append(r)
-
-
-    return changes_detected if output_bool else changed_resources
+        return bool(plan) if output_bool else plan
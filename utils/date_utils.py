@@ -3,21 +3,16 @@
 from bs4 import BeautifulSoup
 from datetime import datetime
 import requests
-from langchain.text_splitter import RecursiveCharacterTextSplitter
-from langchain_openai import ChatOpenAI
+from utils.llm import chat_model
 from langchain.schema import HumanMessage
-import streamlit as st
 import re
-from datetime import datetime
+
+from utils.token_budget import chunk_text
 
 # ------------------------------------------------------------------------------
 # LLM initialization for date extraction
 # ------------------------------------------------------------------------------
-llm_date_extractor = ChatOpenAI(
-    model="gpt-4o-mini",
-    temperature=0,
-    api_key=st.secrets["OPENAI_API_KEY"]
-)
+llm_date_extractor = chat_model(model="gpt-4o-mini", temperature=0, task="date")
 
 # ------------------------------------------------------------------------------
 # AI-based date extraction from text (chunk by chunk, French)
@@ -25,13 +20,9 @@ llm_date_extractor = ChatOpenAI(
 def get_date_from_text_ai(full_text: str, max_pages: int = 3) -> str:
     """
     Try to extract publication date using AI from text content in French.
-    Processes chunks one by one and returns the first valid date found.
+    Processes token-bounded chunks one by one and returns the first valid date found.
     """
-    splitter = RecursiveCharacterTextSplitter(
-        chunk_size=2000,
-        chunk_overlap=200
-    )
-    chunks = splitter.split_text(full_text)
+    chunks = chunk_text(full_text, "date")
     relevant_chunks = chunks[:max_pages]
 
     for i, chunk in enumerate(relevant_chunks, start=1):
@@ -0,0 +1,120 @@
+# utils/embedding_cache.py
+
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Iterable, List, Tuple
+
+import numpy as np
+
+from config import CACHE_DIR
+from utils.metrics import metrics
+
+# Content-addressed store of chunk embeddings, keyed by (provider, model, dim, chunk hash).
+# EMBED_CACHE_PATH        : SQLite file (default: CACHE_DIR/embedding_cache.sqlite)
+# EMBED_CACHE_MAX_ENTRIES : least recently used entries are evicted above this size
+# EMBED_CACHE=off         : disable the cache
+CACHE_PATH = os.getenv("EMBED_CACHE_PATH", os.path.join(CACHE_DIR, "embedding_cache.sqlite"))
+MAX_ENTRIES = int(os.getenv("EMBED_CACHE_MAX_ENTRIES", "50000"))
+ENABLED = os.getenv("EMBED_CACHE", "on").lower() not in {"0", "off", "false", "no"}
+
+_EVICT_EVERY = 500  # inserts between two eviction passes
+
+
+def chunk_key(namespace: str, chunk: str) -> str:
+    return hashlib.sha256(f"{namespace}\x00{chunk}".encode("utf-8")).hexdigest()
+
+
+class EmbeddingCache:
+    """
+    SQLite-backed chunk embedding store with LRU eviction.
+    One connection per thread; WAL mode so crawler threads can read while one writes.
+    """
+
+    def __init__(self, path: str = CACHE_PATH, max_entries: int = MAX_ENTRIES):
+        self.path = path
+        self.max_entries = max_entries
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._inserts = 0
+        self.hits = 0
+        self.misses = 0
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS chunks ("
+                " key TEXT PRIMARY KEY, vec BLOB NOT NULL, last_used REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS chunks_last_used ON chunks(last_used)")
+            self._local.conn = conn
+        return conn
+
+    def get_many(self, keys: List[str]) -> Dict[str, np.ndarray]:
+        """Return cached vectors for the given keys (missing keys are absent)."""
+        if not keys:
+            return {}
+        conn = self._conn()
+        found: Dict[str, np.ndarray] = {}
+        unique = list(dict.fromkeys(keys))
+        for i in range(0, len(unique), 500):
+            batch = unique[i:i + 500]
+            marks = ",".join("?" * len(batch))
+            for key, blob in conn.execute(f"SELECT key, vec FROM chunks WHERE key IN ({marks})", batch):
+                found[key] = np.frombuffer(blob, dtype=np.float32)
+        if found:
+            now = time.time()
+            conn.executemany("UPDATE chunks SET last_used = ? WHERE key = ?",
+                             [(now, k) for k in found])
+            conn.commit()
+        hits = sum(1 for k in keys if k in found)
+        with self._lock:
+            self.hits += hits
+            self.misses += len(keys) - hits
+        metrics.inc("cache_requests_total", hits, cache="embedding", result="hit")
+        metrics.inc("cache_requests_total", len(keys) - hits, cache="embedding", result="miss")
+        return found
+
+    def put_many(self, items: Iterable[Tuple[str, np.ndarray]]) -> None:
+        now = time.time()
+        rows = [(k, np.ascontiguousarray(v, dtype=np.float32).tobytes(), now) for k, v in items]
+        if not rows:
+            return
+        conn = self._conn()
+        conn.executemany("INSERT OR REPLACE INTO chunks (key, vec, last_used) VALUES (?, ?, ?)", rows)
+        conn.commit()
+        with self._lock:
+            self._inserts += len(rows)
+            evict = self._inserts >= _EVICT_EVERY
+            if evict:
+                self._inserts = 0
+        if evict:
+            self.evict()
+
+    def evict(self) -> int:
+        """Drop least recently used entries above max_entries; returns the number removed."""
+        conn = self._conn()
+        (count,) = conn.execute("SELECT COUNT(*) FROM chunks").fetchone()
+        excess = count - self.max_entries
+        if excess <= 0:
+            return 0
+        conn.execute(
+            "DELETE FROM chunks WHERE key IN (SELECT key FROM chunks ORDER BY last_used LIMIT ?)",
+            (excess,),
+        )
+        conn.commit()
+        return excess
+
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+
+chunk_cache = EmbeddingCache()
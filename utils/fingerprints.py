@@ -0,0 +1,95 @@
+# utils/fingerprints.py
+
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Optional
+
+from config import CACHE_DIR
+
+# Last seen state of every fetched URL: hash of the normalized extracted text and the
+# HTTP validators (ETag / Last-Modified). Lets a run skip unchanged resources before
+# any LLM call, embedding or DB query, and send conditional GETs for documents.
+FINGERPRINTS_PATH = os.getenv("FINGERPRINTS_PATH", os.path.join(CACHE_DIR, "fingerprints.sqlite"))
+
+
+def response_validators(resp) -> Dict[str, Optional[str]]:
+    return {"etag": resp.headers.get("ETag"), "last_modified": resp.headers.get("Last-Modified")}
+
+
+class FingerprintStore:
+    def __init__(self, path: str = FINGERPRINTS_PATH):
+        self.path = path
+        self._local = threading.local()
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS fingerprints (
+                    url TEXT PRIMARY KEY,
+                    content_hash TEXT NOT NULL,
+                    etag TEXT,
+                    last_modified TEXT,
+                    checked_at REAL NOT NULL,
+                    changed_at REAL NOT NULL
+                )
+            """)
+            self._local.conn = conn
+        return conn
+
+    def get(self, url: str) -> Optional[Dict]:
+        row = self._conn().execute(
+            "SELECT content_hash, etag, last_modified, checked_at, changed_at FROM fingerprints WHERE url = ?",
+            (url,),
+        ).fetchone()
+        if not row:
+            return None
+        return dict(zip(("content_hash", "etag", "last_modified", "checked_at", "changed_at"), row))
+
+    def conditional_headers(self, url: str) -> Dict[str, str]:
+        """If-None-Match / If-Modified-Since from the stored validators (empty if unknown)."""
+        fp = self.get(url)
+        headers: Dict[str, str] = {}
+        if fp and fp["etag"]:
+            headers["If-None-Match"] = fp["etag"]
+        if fp and fp["last_modified"]:
+            headers["If-Modified-Since"] = fp["last_modified"]
+        return headers
+
+    def is_unchanged(self, url: str, content_hash: str) -> bool:
+        fp = self.get(url)
+        return bool(fp and content_hash and fp["content_hash"] == content_hash)
+
+    def touch(self, url: str) -> None:
+        """Record a check that found the resource unchanged (e.g. HTTP 304)."""
+        conn = self._conn()
+        conn.execute("UPDATE fingerprints SET checked_at = ? WHERE url = ?", (time.time(), url))
+        conn.commit()
+
+    def record(self, url: str, content_hash: str, etag: Optional[str] = None,
+               last_modified: Optional[str] = None) -> None:
+        """Store the processed version of `url` (call once its changes are persisted)."""
+        now = time.time()
+        conn = self._conn()
+        conn.execute(
+            """
+            INSERT INTO fingerprints (url, content_hash, etag, last_modified, checked_at, changed_at)
+            VALUES (?, ?, ?, ?, ?, ?)
+            ON CONFLICT (url) DO UPDATE SET
+                changed_at = CASE WHEN content_hash = excluded.content_hash
+                                  THEN changed_at ELSE excluded.changed_at END,
+                content_hash = excluded.content_hash, etag = excluded.etag,
+                last_modified = excluded.last_modified, checked_at = excluded.checked_at
+            """,
+            (url, content_hash, etag, last_modified, now, now),
+        )
+        conn.commit()
+
+
+fingerprint_store = FingerprintStore()
@@ -18,3 +18,12 @@ def compute_page_hash(html_content: str) -> str:
     content_bytes = html_content.encode("utf-8")
     hash_object = hashlib.sha256(content_bytes)
     return hash_object.hexdigest()
+
+
+def compute_content_fingerprint(text: str) -> str:
+    """
+    SHA-256 of the extracted text with whitespace collapsed, so re-rendering or
+    re-wrapping an unchanged page (or PDF) gives the same fingerprint.
+    """
+    normalized = " ".join((text or "").split())
+    return compute_page_hash(normalized)
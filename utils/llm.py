@@ -0,0 +1,66 @@
+# utils/llm.py
+
+import os
+import time
+from typing import Optional
+
+from utils.metrics import metrics
+
+# OpenAI settings shared by the chat models and the embedding client. Environment
+# variables win over Streamlit secrets, so jobs, the scheduler and the benchmark
+# (bench/run_bench.py, which points OPENAI_BASE_URL at a local stub) run without
+# a secrets file.
+
+
+def _setting(name: str) -> Optional[str]:
+    value = os.getenv(name)
+    if value:
+        return value
+    try:
+        import streamlit as st  # only used to read secrets
+        return st.secrets.get(name)
+    except Exception:
+        return None
+
+
+def get_api_key() -> Optional[str]:
+    return _setting("OPENAI_API_KEY")
+
+
+def get_base_url() -> Optional[str]:
+    """OpenAI-compatible endpoint (None = api.openai.com)."""
+    return _setting("OPENAI_BASE_URL")
+
+
+def _metrics_callback(task: str):
+    """LangChain callback recording llm_seconds / llm_tokens_total / llm_errors_total for `task`."""
+    from langchain_core.callbacks import BaseCallbackHandler
+
+    class MetricsCallback(BaseCallbackHandler):
+        def __init__(self):
+            self._started = {}
+
+        def on_chat_model_start(self, serialized, messages, *, run_id, **kwargs):
+            self._started[run_id] = time.perf_counter()
+
+        def on_llm_end(self, response, *, run_id, **kwargs):
+            t0 = self._started.pop(run_id, None)
+            if t0 is not None:
+                metrics.observe("llm_seconds", time.perf_counter() - t0, task=task)
+            usage = (response.llm_output or {}).get("token_usage") or {}
+            metrics.inc("llm_tokens_total", usage.get("prompt_tokens") or 0, task=task, kind="prompt")
+            metrics.inc("llm_tokens_total", usage.get("completion_tokens") or 0, task=task, kind="completion")
+
+        def on_llm_error(self, error, *, run_id, **kwargs):
+            self._started.pop(run_id, None)
+            metrics.inc("llm_errors_total", task=task)
+
+    return MetricsCallback()
+
+
+def chat_model(model: str = "gpt-4o-mini", temperature: float = 0, task: str = "other", **kwargs):
+    """ChatOpenAI configured from get_api_key() / get_base_url(); calls are measured under `task`."""
+    from langchain_openai import ChatOpenAI
+
+    return ChatOpenAI(model=model, temperature=temperature, api_key=get_api_key(),
+                      base_url=get_base_url(), callbacks=[_metrics_callback(task)], **kwargs)
@@ -0,0 +1,274 @@
+# utils/metrics.py
+"""
+In-process metrics for the crawl and AI pipeline: counters and latency histograms
+with labels, exported as Prometheus text or a JSON snapshot.
+
+Crawls run in job / scheduler processes, so each process dumps its snapshot to
+METRICS_DIR/<start time>-<pid>.json (after each seed and at exit); the Streamlit
+sidebar merges those files, and files not updated for METRICS_RETENTION_H hours are
+deleted. With METRICS_PORT set, a process also serves /metrics (Prometheus) and
+/metrics.json on that port, on METRICS_HOST (localhost by default).
+
+    python -m utils.metrics             # merged snapshot of all processes, Prometheus text
+"""
+
+import atexit
+import glob
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from config import CACHE_DIR
+
+ENABLED = os.getenv("METRICS", "on").lower() not in {"0", "off", "false", "no"}
+METRICS_DIR = os.getenv("METRICS_DIR", os.path.join(CACHE_DIR, "metrics"))
+METRICS_PORT = int(os.getenv("METRICS_PORT", "0"))
+METRICS_HOST = os.getenv("METRICS_HOST", "127.0.0.1")
+METRICS_RETENTION_H = float(os.getenv("METRICS_RETENTION_H", "168"))
+# Start time in the snapshot name: a later process reusing the pid gets its own file
+_SNAPSHOT_NAME = f"{int(time.time())}-{os.getpid()}.json"
+PREFIX = "veille_"
+
+# Seconds; the last bucket is +Inf
+BUCKETS: Tuple[float, ...] = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, float("inf"))
+
+HELP = {
+    "fetch_seconds": "HTTP fetch time by host",
+    "fetch_bytes_total": "Bytes downloaded by host",
+    "parse_seconds": "Text extraction time by kind (html, pdf)",
+    "llm_seconds": "LLM call latency by task",
+    "llm_tokens_total": "LLM tokens by task and kind (prompt, completion)",
+    "llm_errors_total": "Failed LLM calls by task",
+    "embedding_seconds": "Embedding request latency",
+    "embedding_requests_total": "Embedding API requests",
+    "embedding_inputs_total": "Chunks sent to the embedding API",
+    "db_seconds": "Storage operation latency by operation",
+    "cache_requests_total": "Cache lookups by cache and result (hit, miss)",
+}
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+def _key(labels: Dict[str, Any]) -> Labels:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+class Metrics:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters: Dict[str, Dict[Labels, float]] = {}
+        self._histograms: Dict[str, Dict[Labels, List[float]]] = {}  # bucket counts + [sum, count]
+
+    def inc(self, name: str, value: float = 1, **labels: Any) -> None:
+        if not ENABLED:
+            return
+        key = _key(labels)
+        with self._lock:
+            series = self._counters.setdefault(name, {})
+            series[key] = series.get(key, 0) + value
+
+    def observe(self, name: str, seconds: float, **labels: Any) -> None:
+        if not ENABLED:
+            return
+        key = _key(labels)
+        with self._lock:
+            h = self._histograms.setdefault(name, {}).get(key)
+            if h is None:
+                h = self._histograms[name][key] = [0.0] * (len(BUCKETS) + 2)
+            for i, bound in enumerate(BUCKETS):
+                if seconds <= bound:
+                    h[i] += 1
+                    break
+            h[-2] += seconds
+            h[-1] += 1
+
+    @contextmanager
+    def timer(self, name: str, **labels: Any):
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - t0, **labels)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+
+    # --- export ---
+
+    def snapshot(self) -> Dict[str, Any]:
+        """JSON-friendly copy: {"counters": {name: [[labels, value]]}, "histograms": {name: [[labels, buckets]]}}."""
+        with self._lock:
+            return {
+                "counters": {n: [[dict(k), v] for k, v in s.items()] for n, s in self._counters.items()},
+                "histograms": {n: [[dict(k), list(h)] for k, h in s.items()] for n, s in self._histograms.items()},
+            }
+
+    def dump(self, directory: str = METRICS_DIR) -> None:
+        """Write this process' snapshot to directory/<start time>-<pid>.json (atomic replace)."""
+        if not ENABLED:
+            return
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, _SNAPSHOT_NAME)
+        with open(path + ".tmp", "w") as f:
+            json.dump({"pid": os.getpid(), "updated_at": time.time(), **self.snapshot()}, f)
+        os.replace(path + ".tmp", path)
+
+    def serve(self, port: int = METRICS_PORT, host: str = METRICS_HOST) -> Optional[ThreadingHTTPServer]:
+        """
+        Serve /metrics (Prometheus text) and /metrics.json from a background thread.
+        Binds localhost unless METRICS_HOST says otherwise (e.g. 0.0.0.0 for a remote scraper).
+        """
+        if not (ENABLED and port):
+            return None
+        registry = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                snap = registry.snapshot()
+                if self.path.startswith("/metrics.json"):
+                    body, ctype = json.dumps(snap).encode(), "application/json"
+                elif self.path.startswith("/metrics"):
+                    body, ctype = to_prometheus(snap).encode(), "text/plain; version=0.0.4"
+                else:
+                    self.send_error(404)
+                    return
+                self.send_response(200)
+                self.send_header("Content-Type", ctype)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+        httpd = ThreadingHTTPServer((host, port), Handler)
+        threading.Thread(target=httpd.serve_forever, daemon=True).start()
+        print(f"[METRICS] serving /metrics on {host}:{port}")
+        return httpd
+
+
+def merge(snapshots: Iterable[Dict[str, Any]]) -> Dict[str, Any]:
+    """Sum counters and histogram buckets of several snapshots (one per process)."""
+    counters: Dict[str, Dict[Labels, float]] = {}
+    histograms: Dict[str, Dict[Labels, List[float]]] = {}
+    for snap in snapshots:
+        for name, series in snap.get("counters", {}).items():
+            for labels, value in series:
+                k = _key(labels)
+                counters.setdefault(name, {})[k] = counters.get(name, {}).get(k, 0) + value
+        for name, series in snap.get("histograms", {}).items():
+            for labels, h in series:
+                k = _key(labels)
+                acc = histograms.setdefault(name, {}).setdefault(k, [0.0] * len(h))
+                for i, v in enumerate(h):
+                    acc[i] += v
+    return {
+        "counters": {n: [[dict(k), v] for k, v in s.items()] for n, s in counters.items()},
+        "histograms": {n: [[dict(k), h] for k, h in s.items()] for n, s in histograms.items()},
+    }
+
+
+def load_snapshots(directory: str = METRICS_DIR, retention_h: float = METRICS_RETENTION_H) -> Dict[str, Any]:
+    """
+    Merged snapshot of every process that dumped its metrics to `directory`; files not
+    updated for `retention_h` hours (processes long gone) are deleted instead.
+    """
+    snaps = []
+    cutoff = time.time() - retention_h * 3600
+    for path in glob.glob(os.path.join(directory, "*.json")):
+        try:
+            if retention_h > 0 and os.path.getmtime(path) < cutoff:
+                os.remove(path)
+                continue
+            with open(path) as f:
+                snaps.append(json.load(f))
+        except (OSError, ValueError):
+            continue
+    return merge(snaps)
+
+
+def reset_snapshots(directory: str = METRICS_DIR) -> None:
+    for path in glob.glob(os.path.join(directory, "*.json")):
+        os.remove(path)
+
+
+def _labels_text(labels: Dict[str, Any], **extra: str) -> str:
+    items = sorted(labels.items()) + list(extra.items())
+    parts = []
+    for k, v in items:
+        value = str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+        parts.append(f'{k}="{value}"')
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def to_prometheus(snap: Dict[str, Any]) -> str:
+    """Prometheus text exposition format (0.0.4)."""
+    lines: List[str] = []
+    for name, series in sorted(snap.get("counters", {}).items()):
+        full = PREFIX + name
+        lines += [f"# HELP {full} {HELP.get(name, name)}", f"# TYPE {full} counter"]
+        lines += [f"{full}{_labels_text(labels)} {value:g}" for labels, value in series]
+    for name, series in sorted(snap.get("histograms", {}).items()):
+        full = PREFIX + name
+        lines += [f"# HELP {full} {HELP.get(name, name)}", f"# TYPE {full} histogram"]
+        for labels, h in series:
+            cumulative = 0.0
+            for bound, n in zip(BUCKETS, h):
+                cumulative += n
+                le = "+Inf" if bound == float("inf") else f"{bound:g}"
+                lines.append(f"{full}_bucket{_labels_text(labels, le=le)} {cumulative:g}")
+            lines.append(f"{full}_sum{_labels_text(labels)} {h[-2]:g}")
+            lines.append(f"{full}_count{_labels_text(labels)} {h[-1]:g}")
+    return "\n".join(lines) + "\n"
+
+
+def quantile(h: List[float], q: float) -> float:
+    """Upper bound of the bucket holding quantile q of a histogram."""
+    total = h[-1]
+    if not total:
+        return 0.0
+    seen = 0.0
+    for bound, n in zip(BUCKETS, h):
+        seen += n
+        if seen >= q * total:
+            return bound
+    return BUCKETS[-1]
+
+
+def summary_rows(snap: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """One row per histogram series: count, total, mean and p95 (for the sidebar panel)."""
+    rows = []
+    for name, series in sorted(snap.get("histograms", {}).items()):
+        for labels, h in series:
+            count, total = h[-1], h[-2]
+            rows.append({
+                "métrique": name.replace("_seconds", ""),
+                "étiquettes": ", ".join(f"{k}={v}" for k, v in sorted(labels.items())),
+                "appels": int(count),
+                "total (s)": round(total, 2),
+                "moyenne (ms)": round(1000 * total / count, 1) if count else 0.0,
+                "p95 (s) ≤": quantile(h, 0.95),
+            })
+    return sorted(rows, key=lambda r: r["total (s)"], reverse=True)
+
+
+def counter_value(snap: Dict[str, Any], name: str, **labels: Any) -> float:
+    """Sum of the series of counter `name` whose labels include `labels`."""
+    want = {k: str(v) for k, v in labels.items()}
+    return sum(v for lbl, v in snap.get("counters", {}).get(name, [])
+               if all(lbl.get(k) == v for k, v in want.items()))
+
+
+metrics = Metrics()
+if ENABLED:
+    atexit.register(metrics.dump)
+
+
+if __name__ == "__main__":
+    print(to_prometheus(load_snapshots()), end="")
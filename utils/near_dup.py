@@ -0,0 +1,211 @@
+# utils/near_dup.py
+
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+import unicodedata
+from typing import Dict, List, Optional, Set, Tuple
+
+import numpy as np
+
+from config import (
+    CACHE_DIR, NEAR_DUP_BANDS, NEAR_DUP_ENABLED, NEAR_DUP_PERMUTATIONS,
+    NEAR_DUP_SHINGLE, NEAR_DUP_THRESHOLD,
+)
+
+# Near-duplicate index of stored documents: normalized-text hash for exact copies,
+# MinHash signatures with LSH banding for near-exact ones (same press release on
+# several URLs, PDF mirror of an HTML page...). Persisted in SQLite between runs.
+# It mirrors what is in the vector store: entries are added after an insert/update,
+# so delete the file when the database is reset.
+INDEX_PATH = os.getenv("NEAR_DUP_PATH", os.path.join(CACHE_DIR, "near_dup.sqlite"))
+
+_MERSENNE = np.uint64((1 << 61) - 1)
+_WORD = re.compile(r"\w+")
+
+# Shingles hashed per step of MinHasher.signature (bounds its memory to
+# permutations x SHINGLE_BATCH uint64 values)
+SHINGLE_BATCH = 2048
+
+# Each item resolved without an embedding also saves the vector store's
+# distance-to-URL and nearest-neighbour lookups.
+DB_LOOKUPS_PER_ITEM = 2
+
+
+def normalize(text: str) -> str:
+    """Case-folded words without accents or punctuation, single spaces."""
+    text = unicodedata.normalize("NFKD", text or "").casefold()
+    text = "".join(c for c in text if not unicodedata.combining(c))
+    return " ".join(_WORD.findall(text))
+
+
+def _h64(s: str) -> int:
+    return int.from_bytes(hashlib.blake2b(s.encode("utf-8"), digest_size=8).digest(), "little")
+
+
+class MinHasher:
+    def __init__(self, permutations: int = NEAR_DUP_PERMUTATIONS, shingle: int = NEAR_DUP_SHINGLE,
+                 seed: int = 1):
+        rng = np.random.default_rng(seed)
+        self.shingle = max(1, shingle)
+        self.a = rng.integers(1, (1 << 61) - 1, permutations, dtype=np.uint64)
+        self.b = rng.integers(0, (1 << 61) - 1, permutations, dtype=np.uint64)
+
+    def shingles(self, norm_text: str) -> Set[int]:
+        words = norm_text.split()
+        if len(words) <= self.shingle:
+            return {_h64(" ".join(words))}
+        return {_h64(" ".join(words[i:i + self.shingle])) for i in range(len(words) - self.shingle + 1)}
+
+    def signature(self, norm_text: str, batch: int = SHINGLE_BATCH) -> np.ndarray:
+        x = np.fromiter(self.shingles(norm_text), dtype=np.uint64) % _MERSENNE
+        # Running minimum over batches of shingles: a permutations x batch matrix at a
+        # time instead of one over every shingle (hundreds of MB for a long PDF)
+        sig = np.full(len(self.a), np.iinfo(np.uint64).max, dtype=np.uint64)
+        for start in range(0, len(x), max(1, batch)):
+            # (a*x + b) mod p for every permutation; uint64 products wrap, which keeps the
+            # hash family well-mixed (exact modular arithmetic is not needed here)
+            hashed = (np.outer(self.a, x[start:start + batch]) + self.b[:, None]) % _MERSENNE
+            np.minimum(sig, hashed.min(axis=1), out=sig)
+        return sig
+
+
+def jaccard_estimate(sig_a: np.ndarray, sig_b: np.ndarray) -> float:
+    return float(np.mean(sig_a == sig_b))
+
+
+class NearDupIndex:
+    """
+    lookup(url, text) classifies a document before it is embedded:
+      ("unchanged", url, sim)  same URL, same or near-same text as stored
+      ("duplicate", other, sim) another stored URL has the same or near-same text
+      None                      ambiguous / new: embed and let the vector policy decide
+    """
+
+    def __init__(self, path: str = INDEX_PATH, threshold: float = NEAR_DUP_THRESHOLD,
+                 permutations: int = NEAR_DUP_PERMUTATIONS, bands: int = NEAR_DUP_BANDS):
+        if permutations % bands:
+            raise ValueError("NEAR_DUP_BANDS must divide NEAR_DUP_PERMUTATIONS")
+        self.path = path
+        self.threshold = threshold
+        self.bands = bands
+        self.rows = permutations // bands
+        self.hasher = MinHasher(permutations)
+        self._local = threading.local()
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript("""
+                CREATE TABLE IF NOT EXISTS docs (
+                    url TEXT PRIMARY KEY, seed TEXT, exact TEXT NOT NULL, sig BLOB NOT NULL);
+                CREATE INDEX IF NOT EXISTS docs_exact ON docs(exact);
+                CREATE TABLE IF NOT EXISTS bands (
+                    band INTEGER NOT NULL, bucket INTEGER NOT NULL, url TEXT NOT NULL);
+                CREATE INDEX IF NOT EXISTS bands_bucket ON bands(band, bucket);
+                CREATE INDEX IF NOT EXISTS bands_url ON bands(url);
+            """)
+            self._local.conn = conn
+        return conn
+
+    def _fingerprint(self, text: str) -> Tuple[str, np.ndarray]:
+        norm = normalize(text)
+        if not norm:
+            return "", np.zeros(0, dtype=np.uint64)
+        exact = hashlib.sha256(norm.encode("utf-8")).hexdigest()
+        return exact, self.hasher.signature(norm)
+
+    def _buckets(self, sig: np.ndarray) -> List[Tuple[int, int]]:
+        # SQLite integers are signed 64-bit: keep 63 bits of each band hash
+        return [
+            (b, _h64(sig[b * self.rows:(b + 1) * self.rows].tobytes().hex()) >> 1)
+            for b in range(self.bands)
+        ]
+
+    def lookup(self, url: str, text: str, seed: Optional[str] = None,
+               stats: Optional[Dict[str, int]] = None) -> Optional[Tuple[str, str, float]]:
+        """
+        Classify `text` at `url`; with `seed`, duplicates are searched among that seed's
+        documents only. `stats` (the caller's dict, e.g. one per run) receives the
+        exact / near / embedded counts.
+        """
+        def done(match, exact: bool = False):
+            if stats is not None:
+                key = "embedded" if match is None else "exact" if exact else "near"
+                stats[key] = stats.get(key, 0) + 1
+            return match
+
+        exact, sig = self._fingerprint(text)
+        if not exact:
+            return done(None)  # no text to compare
+        conn = self._conn()
+
+        own = conn.execute("SELECT exact, sig FROM docs WHERE url = ?", (url,)).fetchone()
+        if own:
+            if own[0] == exact:
+                return done(("unchanged", url, 1.0), exact=True)
+            sim = jaccard_estimate(sig, np.frombuffer(own[1], dtype=np.uint64))
+            if sim >= self.threshold:
+                return done(("unchanged", url, sim))
+
+        row = conn.execute(
+            "SELECT url FROM docs WHERE exact = ? AND url != ? AND (? IS NULL OR seed = ?) LIMIT 1",
+            (exact, url, seed, seed),
+        ).fetchone()
+        if row:
+            return done(("duplicate", row[0], 1.0), exact=True)
+
+        best: Optional[Tuple[str, float]] = None
+        candidates: Set[str] = set()
+        for band, bucket in self._buckets(sig):
+            candidates.update(u for (u,) in conn.execute(
+                "SELECT url FROM bands WHERE band = ? AND bucket = ?", (band, bucket)))
+        candidates.discard(url)
+        for other in candidates:
+            blob, other_seed = conn.execute("SELECT sig, seed FROM docs WHERE url = ?", (other,)).fetchone()
+            if seed is not None and other_seed != seed:
+                continue
+            sim = jaccard_estimate(sig, np.frombuffer(blob, dtype=np.uint64))
+            if sim >= self.threshold and (best is None or sim > best[1]):
+                best = (other, sim)
+        if best:
+            return done(("duplicate", best[0], best[1]))
+
+        return done(None)
+
+    def add(self, url: str, text: str, seed: Optional[str] = None) -> None:
+        """Record the stored version of a document (call after an insert/update)."""
+        exact, sig = self._fingerprint(text)
+        if not exact:
+            return
+        conn = self._conn()
+        conn.execute("DELETE FROM bands WHERE url = ?", (url,))
+        conn.execute("INSERT OR REPLACE INTO docs (url, seed, exact, sig) VALUES (?, ?, ?, ?)",
+                     (url, seed, exact, sig.tobytes()))
+        conn.executemany("INSERT INTO bands (band, bucket, url) VALUES (?, ?, ?)",
+                         [(b, k, url) for b, k in self._buckets(sig)])
+        conn.commit()
+
+
+def report(stats: Dict[str, int]) -> Dict[str, int]:
+    """Savings for the counts gathered by NearDupIndex.lookup(..., stats=...)."""
+    s = {"exact": 0, "near": 0, "embedded": 0, **stats}
+    resolved = s["exact"] + s["near"]
+    s["embed_calls_saved"] = resolved
+    s["db_lookups_saved"] = resolved * DB_LOOKUPS_PER_ITEM
+    return s
+
+
+def format_report(stats: Dict[str, int]) -> str:
+    s = report(stats)
+    return (f"[NEAR-DUP] exact={s['exact']} near={s['near']} embedded={s['embedded']} "
+            f"-> {s['embed_calls_saved']} embedding calls and {s['db_lookups_saved']} DB lookups saved")
+
+
+near_dup_index = NearDupIndex() if NEAR_DUP_ENABLED else None
@@ -3,15 +3,62 @@
 from io import BytesIO
 from typing import Tuple, List
 from bs4 import BeautifulSoup
+from bs4.element import Comment, Doctype, Declaration, ProcessingInstruction
 import fitz  # PyMuPDF
 
+# Elements that start a new visual block; text nodes are grouped by their closest one.
+_BLOCK_TAGS = [
+    "address", "article", "aside", "blockquote", "body", "dd", "details", "div", "dl",
+    "dt", "fieldset", "figcaption", "figure", "footer", "form", "h1", "h2", "h3", "h4",
+    "h5", "h6", "header", "li", "main", "nav", "ol", "p", "pre", "section", "summary",
+    "table", "td", "th", "tr", "ul",
+]
+_SKIP_PARENTS = {"script", "style", "noscript", "template"}
+_SKIP_TYPES = (Comment, Doctype, Declaration, ProcessingInstruction)
 
-def extract_text_and_links(html: str, base_url: str) -> Tuple[str, List[str], str]:
+
+def _text_blocks(soup: BeautifulSoup) -> List[str]:
+    """
+    Group visible text nodes by their nearest block-level ancestor.
+    Joining the blocks with a space gives (nearly) the text of soup.get_text(" ", strip=True).
+    """
+    blocks: List[str] = []
+    current: List[str] = []
+    current_parent = None
+
+    for s in soup.find_all(string=True):
+        if isinstance(s, _SKIP_TYPES) or (s.parent and s.parent.name in _SKIP_PARENTS):
+            continue
+        piece = s.strip()
+        if not piece:
+            continue
+        parent = s.find_parent(_BLOCK_TAGS)
+        if parent is not current_parent and current:
+            blocks.append(" ".join(current))
+            current = []
+        current_parent = parent
+        current.append(piece)
+
+    if current:
+        blocks.append(" ".join(current))
+    return blocks
+
+
+def extract_blocks_and_links(html: str, base_url: str) -> Tuple[List[str], List[str], str]:
+    """
+    Same as extract_text_and_links, but keeps the page text split into blocks
+    (menus, paragraphs, footers...) so site templates can be detected per block.
+    """
     soup = BeautifulSoup(html, "lxml")
-    text = soup.get_text(" ", strip=True)
+    blocks = _text_blocks(soup)
     links = [a.get("href") for a in soup.find_all("a", href=True)]
-    title = soup.title.string.strip() if soup.title else ""
-    return text, links, title
+    title = soup.title.string.strip() if soup.title and soup.title.string else ""
+    return blocks, links, title
+
+
+def extract_text_and_links(html: str, base_url: str) -> Tuple[str, List[str], str]:
+    blocks, links, title = extract_blocks_and_links(html, base_url)
+    return " ".join(blocks), links, title
 
 
 def extract_pdf_text(pdf_bytes: bytes) -> str:
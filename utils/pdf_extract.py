@@ -0,0 +1,119 @@
+# utils/pdf_extract.py
+
+import multiprocessing as mp
+import threading
+import time
+from io import BytesIO
+from typing import List, Optional, Tuple
+
+from config import PDF_BUDGETS, PDF_MEMORY_MB, PDF_PAGES_PER_TASK, PDF_TIMEOUT, PDF_WORKERS
+
+# PDF text extraction out of the crawler thread: PyMuPDF runs in a pool of worker
+# processes (spawned, so no state is inherited from Streamlit or the crawl job), each
+# with an address-space limit. A document that runs past its deadline gets the pool
+# terminated, which kills the stuck worker; the pool is recreated on the next call.
+
+
+class PdfExtractionError(Exception):
+    pass
+
+
+def _limit_memory(memory_mb: int) -> None:
+    """Pool initializer: cap the worker's address space (POSIX only)."""
+    if memory_mb <= 0:
+        return
+    try:
+        import resource
+        limit = memory_mb * 1024 * 1024
+        resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+    except (ImportError, ValueError, OSError):
+        pass
+
+
+def _extract_range(pdf_bytes: bytes, start: int, stop: int) -> Tuple[int, Optional[str], List[str]]:
+    """Worker: (page count, metadata title, text of pages [start, stop))."""
+    import fitz  # PyMuPDF, only loaded in the workers
+
+    with fitz.open(stream=BytesIO(pdf_bytes), filetype="pdf") as doc:
+        stop = min(stop, doc.page_count)
+        title = ((doc.metadata or {}).get("title") or "").strip() or None
+        return doc.page_count, title, [doc[i].get_text("text") for i in range(start, stop)]
+
+
+class PdfExtractor:
+    def __init__(self, workers: int = PDF_WORKERS, timeout: float = PDF_TIMEOUT,
+                 memory_mb: int = PDF_MEMORY_MB, pages_per_task: int = PDF_PAGES_PER_TASK):
+        self.workers = max(1, workers)
+        self.timeout = timeout
+        self.memory_mb = memory_mb
+        self.pages_per_task = max(1, pages_per_task)
+        self._pool = None
+        self._lock = threading.Lock()
+
+    def _get_pool(self):
+        with self._lock:
+            if self._pool is None:
+                self._pool = mp.get_context("spawn").Pool(
+                    self.workers, initializer=_limit_memory, initargs=(self.memory_mb,),
+                    maxtasksperchild=50,  # bounds PyMuPDF leaks
+                )
+            return self._pool
+
+    def _kill(self, pool) -> bool:
+        """Terminate `pool` if it is still the current one; False if another call already did."""
+        with self._lock:
+            if self._pool is not pool:
+                return False
+            self._pool = None
+        pool.terminate()
+        return True
+
+    def extract_pages(self, pdf_bytes: bytes, max_pages: Optional[int] = None) -> List[str]:
+        """Text of the first `max_pages` pages (see extract_document)."""
+        return self.extract_document(pdf_bytes, max_pages)[0]
+
+    def extract_document(self, pdf_bytes: bytes,
+                         max_pages: Optional[int] = None) -> Tuple[List[str], Optional[str]]:
+        """
+        (text of the first `max_pages` pages, metadata title). `max_pages` defaults to
+        the "content" budget. The first range is read first; if the document is longer,
+        the remaining ranges are read in parallel. Raises PdfExtractionError on a parsing
+        error or when the document takes more than `timeout` seconds (the worker is killed).
+        """
+        max_pages = PDF_BUDGETS["content"]["pages"] if max_pages is None else max_pages
+        for attempt in (1, 2):
+            pool = self._get_pool()
+            deadline = time.monotonic() + self.timeout
+            try:
+                first = min(self.pages_per_task, max_pages)
+                page_count, title, pages = pool.apply_async(_extract_range, (pdf_bytes, 0, first)).get(self.timeout)
+                ranges = [(s, min(s + self.pages_per_task, max_pages, page_count))
+                          for s in range(first, min(max_pages, page_count), self.pages_per_task)]
+                pending = [pool.apply_async(_extract_range, (pdf_bytes, s, e)) for s, e in ranges]
+                for res in pending:
+                    pages.extend(res.get(max(0.0, deadline - time.monotonic()))[2])
+                return pages, title
+            except mp.TimeoutError:
+                if self._kill(pool) or attempt == 2:
+                    raise PdfExtractionError(f"timeout after {self.timeout:.0f}s")
+                # the pool was killed for another document: retry once on a fresh one
+            except PdfExtractionError:
+                raise
+            except Exception as e:  # parsing error or MemoryError raised in the worker
+                raise PdfExtractionError(repr(e)) from e
+        raise PdfExtractionError("no result")
+
+    def close(self) -> None:
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.terminate()
+
+
+def stage_text(pages: List[str], stage: str) -> str:
+    """Text of a stage: its PDF_BUDGETS pages, joined, cut at its character budget."""
+    budget = PDF_BUDGETS[stage]
+    return " ".join(pages[:budget["pages"]]).strip()[:budget["chars"]]
+
+
+pdf_extractor = PdfExtractor()
@@ -1,12 +1,12 @@
 # utils/pdf_title_utils.py
 
 from typing import List, Optional
-from langchain_openai import ChatOpenAI
+from utils.llm import chat_model
 from langchain.schema import HumanMessage
-from langchain.text_splitter import RecursiveCharacterTextSplitter
-import streamlit as st
 import re
 
+from utils.token_budget import truncate_text
+
 try:
     # pypdf >= 3.x
     from pypdf import PdfReader
@@ -16,11 +16,7 @@ except Exception:
 
 
 # LLM initialization for title extraction (French)
-llm_title_extractor = ChatOpenAI(
-    model="gpt-4o-mini",
-    temperature=0,
-    api_key=st.secrets["OPENAI_API_KEY"]
-)
+llm_title_extractor = chat_model(model="gpt-4o-mini", temperature=0, task="title")
 
 
 def _clean_lines(text: str) -> List[str]:
@@ -128,12 +124,15 @@ def _get_title_from_metadata(reader: PdfReader) -> Optional[str]:
         raw = meta.get("/Title") or meta.get("Title")
         title = str(raw).strip() if raw else None
 
-    if title:
-        # Filter out placeholders like "untitled", "document"
-        if re.fullmatch(r"(?i)untitled|sans\s*titre|document|new document", title):
-            return None
-        return title
-    return None
+    return _usable_metadata_title(title)
+
+
+def _usable_metadata_title(title: Optional[str]) -> Optional[str]:
+    """Metadata title, unless empty or a placeholder like "untitled", "document"."""
+    title = (title or "").strip()
+    if not title or re.fullmatch(r"(?i)untitled|sans\s*titre|document|new document", title):
+        return None
+    return title
 
 
 def _get_title_with_llm(full_text: str) -> Optional[str]:
@@ -152,7 +151,7 @@ Répondez uniquement par le titre exact, sans guillemets, sans majuscules forcé
 Si vous n'êtes pas sûr, répondez exactement : Non trouvé.
 
 Texte des premières pages :
-\"\"\"{full_text[:8000]}\"\"\"
+\"\"\"{truncate_text(full_text, "title")}\"\"\"
 """
     try:
         response = llm_title_extractor.invoke([HumanMessage(content=prompt)])
@@ -201,6 +200,24 @@ def get_title_from_pdf_bytes(pdf_bytes: bytes, max_pages: int = 3) -> str:
     return "Non trouvé"
 
 
+def get_title_from_text(early_text: str, metadata_title: Optional[str] = None) -> str:
+    """
+    Same order of attempts as get_title_from_pdf_bytes, on a document already parsed:
+    `early_text` is the text of its first pages and `metadata_title` its metadata
+    title (both from utils/pdf_extract.py, so the PDF is not parsed again here).
+    Returns a string, or "Non trouvé".
+    """
+    meta_title = _usable_metadata_title(metadata_title)
+    if meta_title:
+        return meta_title
+
+    candidate = _choose_best_candidate(_clean_lines(early_text)[:30])
+    if candidate:
+        return candidate
+
+    return _get_title_with_llm(early_text) or "Non trouvé"
+
+
 def get_title_from_pdf_path(path: str, max_pages: int = 3) -> str:
     """
     Convenience wrapper to open a PDF by path and use the same logic.
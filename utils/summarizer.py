@@ -1,27 +1,20 @@
 # utils/summarize.py
 
-import streamlit as st
 import re
 from typing import List
-from langchain_openai import ChatOpenAI, OpenAIEmbeddings
+from utils.llm import chat_model
 from langchain.schema import SystemMessage, HumanMessage
 from langchain.vectorstores import FAISS
-from langchain.text_splitter import RecursiveCharacterTextSplitter
-from utils.ai_relevance import text_splitter  # re-use splitter
+from utils.token_budget import chunk_text, fit_to_budget
+from utils.embeddings import ChunkEmbeddings
 
 # ------------------------------------------------------------------------------
 # LLM initialization (separate instance for summarization)
 # ------------------------------------------------------------------------------
-llm_summarizer = ChatOpenAI(
-    model="gpt-4o-mini",
-    temperature=0,
-    api_key=st.secrets["OPENAI_API_KEY"]
-)
+llm_summarizer = chat_model(model="gpt-4o-mini", temperature=0, task="summary")
 
-embeddings = OpenAIEmbeddings(
-    model="text-embedding-3-small",
-    api_key=st.secrets["OPENAI_API_KEY"]
-)
+# Shared batched embedding backend (pooled client, batched requests)
+embeddings = ChunkEmbeddings()
 
 # ------------------------------------------------------------------------------
 
@@ -68,7 +61,7 @@ def extract_financial_sentences(text: str) -> list[str]:
 # ------------------------------------------------------------------------------
 def preprocess_text(text: str) -> List[str]:
     text = re.sub(r"\s+", " ", text).strip()
-    return text_splitter.split_text(text)
+    return chunk_text(text, "summary")
 
 # ------------------------------------------------------------------------------
 # Build FAISS retriever
@@ -141,7 +134,7 @@ def summarize_content(text: str) -> str:
     user_prompt = HumanMessage(
         content=f"""
         Résume le contenu suivant en suivant les consignes ci-dessus:
-        {chr(10).join([d.page_content for d in docs])}
+        {chr(10).join(fit_to_budget([d.page_content for d in docs], "summary"))}
         """
     )
 
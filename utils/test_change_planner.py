@@ -0,0 +1,95 @@
+# utils/test_change_planner.py
+#
+#   python -m pytest utils/test_change_planner.py
+
+from utils.change_planner import execute_plan, plan_work
+
+SEED = "https://example.com"
+
+
+def _page(url, parents):
+    return {"seed": SEED, "url": url, "title": url, "content": f"text of {url}",
+            "pdf_source": {"pdf_url": "", "parent_urls": parents}}
+
+
+def _pdf(url, parents, text="annual report"):
+    return {"seed": SEED, "url": url, "title": "report", "content": text,
+            "pdf_source": {"pdf_url": url, "parent_urls": parents}}
+
+
+def _crawl_graph():
+    """
+    seed -> /news, /investors ; both link to /report.pdf, reached through
+    three URL variants, and /news is also found as /news/ (trailing slash).
+    """
+    news, investors = f"{SEED}/news", f"{SEED}/investors"
+    return [
+        _page(news, [news]),
+        _page(investors, [investors]),
+        _pdf(f"{SEED}/report.pdf", [SEED, news]),
+        _pdf(f"{SEED}/report.pdf#page=2", [SEED, investors]),
+        _pdf("HTTPS://EXAMPLE.COM:443/report.pdf", [SEED, news, investors]),
+        _page(f"{SEED}/news/", [f"{SEED}/news/"]),
+        _pdf(f"{SEED}/other.pdf", [SEED, investors], text="press release"),
+    ]
+
+
+class FakeStorage:
+    def __init__(self):
+        self.batches, self.aliases = [], []
+
+    def upsert_by_similarity_batch(self, work):
+        self.batches.append(work)
+        return [("inserted", None) for _ in work]
+
+    def add_alias_urls(self, pairs):
+        self.aliases.extend(pairs)
+
+
+class FakeFingerprints:
+    def __init__(self, known=None):
+        self.known = dict(known or {})
+
+    def is_unchanged(self, url, content_hash):
+        return self.known.get(url) == content_hash
+
+    def record(self, url, content_hash, etag=None, last_modified=None):
+        self.known[url] = content_hash
+
+
+def _run(resources, fingerprints):
+    calls = []
+    storage = FakeStorage()
+    plan = plan_work(resources, is_unchanged=lambda r: fingerprints.is_unchanged(r["url"], r["content_hash"]))
+    execute_plan(plan, storage=storage, embed=lambda text: calls.append(text) or [0.0],
+                 fingerprints=fingerprints)
+    return plan, calls, storage
+
+
+def test_one_embed_per_unique_changed_resource():
+    plan, calls, storage = _run(_crawl_graph(), FakeFingerprints())
+
+    assert sorted(r["url"] for r in plan) == sorted([
+        f"{SEED}/news", f"{SEED}/investors", f"{SEED}/report.pdf", f"{SEED}/other.pdf",
+    ])
+    assert len(calls) == len(plan) == 4
+    assert len(storage.batches) == 1 and len(storage.batches[0]) == 4
+
+
+def test_parent_urls_are_merged():
+    plan, _, _ = _run(_crawl_graph(), FakeFingerprints())
+
+    report = next(r for r in plan if r["url"] == f"{SEED}/report.pdf")
+    assert report["pdf_source"]["parent_urls"] == [SEED, f"{SEED}/news", f"{SEED}/investors"]
+
+
+def test_unchanged_resources_are_not_embedded():
+    fingerprints = FakeFingerprints()
+    _run(_crawl_graph(), fingerprints)
+
+    resources = _crawl_graph()
+    resources[-1]["content"] = "press release, corrected"
+    plan, calls, _ = _run(resources, fingerprints)
+
+    assert [r["url"] for r in plan] == [f"{SEED}/other.pdf"]
+    assert calls == ["press release, corrected"]
@@ -0,0 +1,25 @@
+# utils/test_near_dup.py
+#
+#   python -m pytest utils/test_near_dup.py
+
+import numpy as np
+
+from utils.near_dup import MinHasher, normalize
+
+
+def _text(words):
+    rng = np.random.default_rng(7)
+    return normalize(" ".join(f"mot{i}" for i in rng.integers(0, 5000, words)))
+
+
+def test_signature_does_not_depend_on_batch_size():
+    hasher = MinHasher(permutations=64, shingle=5)
+    text = _text(10_000)
+    expected = hasher.signature(text, batch=10**9)  # every shingle in one step
+    for batch in (1, 7, 1000, 2048):
+        assert np.array_equal(hasher.signature(text, batch=batch), expected)
+
+
+def test_short_text_has_one_shingle():
+    hasher = MinHasher(permutations=64, shingle=5)
+    assert np.array_equal(hasher.signature("deux mots", batch=1), hasher.signature("deux mots"))
@@ -0,0 +1,221 @@
+# utils/token_budget.py
+"""
+Tokenizer-aware chunking and prompt budgeting shared by the AI modules.
+
+All sizes are expressed in tokens (see TOKEN_BUDGETS in config.py), so the cost
+of each LLM / embedding call is bounded and predictable whatever the document.
+Tokenized documents are cached, so the relevance, date, summary and embedding
+steps only tokenize a given text once.
+"""
+
+import hashlib
+import os
+import re
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Sequence
+
+from config import TOKEN_BUDGETS, TOKENIZER_ENCODING
+
+# --- Tokenizer: tiktoken when available, else a reversible ~4 chars/token approximation ---
+try:
+    import tiktoken
+    _encoding = tiktoken.get_encoding(TOKENIZER_ENCODING)
+except Exception:
+    _encoding = None
+
+_APPROX_PIECE = re.compile(r"\s*\S{1,4}|\s+")
+
+
+def _encode(text: str) -> list:
+    if _encoding is not None:
+        return _encoding.encode(text, disallowed_special=())
+    return _APPROX_PIECE.findall(text)
+
+
+def _decode(tokens: Sequence) -> str:
+    if _encoding is not None:
+        return _encoding.decode(list(tokens))
+    return "".join(tokens)
+
+
+# --- Per-document token cache ---
+_CACHE_SIZE = 128
+_cache: "OrderedDict[str, list]" = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def tokenize(text: str) -> list:
+    """Return the tokens of `text`, cached by content hash (LRU)."""
+    key = hashlib.sha1(text.encode("utf-8")).hexdigest()
+    with _cache_lock:
+        tokens = _cache.get(key)
+        if tokens is not None:
+            _cache.move_to_end(key)
+            return tokens
+    tokens = _encode(text)
+    with _cache_lock:
+        _cache[key] = tokens
+        if len(_cache) > _CACHE_SIZE:
+            _cache.popitem(last=False)
+    return tokens
+
+
+def count_tokens(text: str) -> int:
+    return len(tokenize(text or ""))
+
+
+# --- Budgets: prefer Streamlit secrets, then env, then config defaults ---
+def _read_setting(name: str):
+    try:
+        import streamlit as st  # only used to read secrets
+        value = st.secrets.get(name)
+        if value is not None:
+            return value
+    except Exception:
+        pass
+    return os.getenv(name)
+
+
+_budgets: Dict[str, Dict[str, int]] = {}
+
+
+def get_budget(task: str) -> Dict[str, int]:
+    """Token budget for a task ("relevance", "summary", "date", "title", "embedding")."""
+    if task in _budgets:
+        return _budgets[task]
+    if task not in TOKEN_BUDGETS:
+        raise KeyError(f"Unknown token budget task: {task}")
+
+    budget = dict(TOKEN_BUDGETS[task])
+    for key, default in TOKEN_BUDGETS[task].items():
+        raw = _read_setting(f"TOKEN_BUDGET_{task.upper()}_{key.upper()}")
+        try:
+            budget[key] = int(raw) if raw is not None else default
+        except (TypeError, ValueError):
+            budget[key] = default
+
+    # Safety: ensure sane values
+    if budget["chunk"] <= 0:
+        budget["chunk"] = TOKEN_BUDGETS[task]["chunk"]
+    if budget["overlap"] < 0:
+        budget["overlap"] = 0
+    if budget["overlap"] >= budget["chunk"]:
+        budget["overlap"] = budget["chunk"] // 2
+
+    _budgets[task] = budget
+    return budget
+
+
+# --- Chunking / truncation ---
+def chunk_text(text: str, task: str) -> List[str]:
+    """
+    Split text into overlapping windows of `chunk` tokens for the given task,
+    limited to `max_chunks` windows when the budget sets one.
+    """
+    text = text or ""
+    if not text.strip():
+        return []
+    budget = get_budget(task)
+    size, overlap, max_chunks = budget["chunk"], budget["overlap"], budget["max_chunks"]
+
+    tokens = tokenize(text)
+    if len(tokens) <= size:
+        return [text]
+
+    chunks: List[str] = []
+    step = max(1, size - overlap)
+    start = 0
+    while start < len(tokens):
+        end = min(len(tokens), start + size)
+        chunks.append(_decode(tokens[start:end]))
+        if end == len(tokens) or (max_chunks and len(chunks) >= max_chunks):
+            break
+        start += step
+    return chunks
+
+
+def truncate_text(text: str, task: str) -> str:
+    """Cut text to the task's `prompt` token budget."""
+    text = text or ""
+    limit = get_budget(task)["prompt"]
+    tokens = tokenize(text)
+    if len(tokens) <= limit:
+        return text
+    return _decode(tokens[:limit])
+
+
+def fit_to_budget(parts: Sequence[str], task: str) -> List[str]:
+    """
+    Keep parts (e.g. retrieved chunks, in rank order) while they fit in the task's
+    `prompt` budget; the first part that overflows is truncated to the remainder.
+    """
+    remaining = get_budget(task)["prompt"]
+    kept: List[str] = []
+    for part in parts:
+        if remaining <= 0:
+            break
+        tokens = tokenize(part)
+        if len(tokens) <= remaining:
+            kept.append(part)
+            remaining -= len(tokens)
+        else:
+            kept.append(_decode(tokens[:remaining]))
+            remaining = 0
+    return kept
+
+
+_SENTENCE_END = re.compile(r"(?<=[.!?;:])\s+|\n+")
+
+
+def stable_chunks(text: str, task: str) -> List[str]:
+    """
+    Content-defined chunking: sentences are packed into chunks of at most `chunk`
+    tokens, and a chunk may also end after any sentence whose hash falls on a
+    boundary once it holds half the budget. Boundaries therefore depend on the
+    local content only, so an edit in one place leaves the other chunks
+    byte-identical (which makes per-chunk caching effective). Each chunk after the
+    first starts with the last `overlap` tokens of the previous one, so only the
+    chunk following an edit changes through its overlap.
+    """
+    text = (text or "").strip()
+    if not text:
+        return []
+    budget = get_budget(task)
+    size, overlap = budget["chunk"], budget["overlap"]
+    if count_tokens(text) <= size:
+        return [text]
+
+    chunks: List[str] = []
+    current: List[str] = []
+    current_tokens = 0
+
+    def flush():
+        nonlocal current, current_tokens
+        if current:
+            chunks.append(" ".join(current))
+        current, current_tokens = [], 0
+
+    for sentence in _SENTENCE_END.split(text):
+        sentence = sentence.strip()
+        if not sentence:
+            continue
+        n = len(_encode(sentence))
+        if n > size:
+            # Oversized sentence: flush, then cut it into fixed windows
+            flush()
+            tokens = _encode(sentence)
+            chunks.extend(_decode(tokens[i:i + size]) for i in range(0, len(tokens), size))
+            continue
+        if current_tokens + n > size:
+            flush()
+        current.append(sentence)
+        current_tokens += n
+        digest = hashlib.blake2b(sentence.encode("utf-8"), digest_size=2).digest()
+        if current_tokens >= size // 2 and digest[0] % 4 == 0:
+            flush()
+    flush()
+    if overlap:
+        chunks = chunks[:1] + [_decode(_encode(prev)[-overlap:]).strip() + " " + cur
+                               for prev, cur in zip(chunks, chunks[1:])]
+    return chunks
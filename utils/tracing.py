@@ -0,0 +1,162 @@
+# utils/tracing.py
+"""
+Per-resource trace spans: each crawled URL gets a span tree (robots, fetch, parse,
+relevance, date, title, summary) with timings and attributes; storing the results
+adds a "store" span per run with the embed and upsert spans. The current span and
+the current run are kept in contextvars, so nesting follows the call stack in each
+thread and runs of several seeds in parallel threads do not mix.
+
+Spans are exported in the Chrome trace-event format (JSON "complete" events, with
+span_id / parent_id in their args), which chrome://tracing and
+https://ui.perfetto.dev open offline: one file per check_for_change run in
+TRACE_DIR (see Tracer.run). Tracing is off unless TRACING=on; when off,
+tracer.span() returns a shared no-op object.
+"""
+
+import atexit
+import itertools
+import json
+import os
+import re
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, List, Optional
+
+from config import CACHE_DIR
+
+ENABLED = os.getenv("TRACING", "off").lower() in {"1", "true", "yes", "on"}
+TRACE_DIR = os.getenv("TRACE_DIR", os.path.join(CACHE_DIR, "traces"))
+
+
+class _NoopSpan:
+    """Returned by span() when tracing is disabled: no clock read, no allocation."""
+
+    def set(self, **attrs: Any) -> None:
+        pass
+
+    def __enter__(self) -> "_NoopSpan":
+        return self
+
+    def __exit__(self, *exc) -> bool:
+        return False
+
+
+_NOOP = _NoopSpan()
+_current: ContextVar[Optional["Span"]] = ContextVar("veille_span", default=None)
+_run: ContextVar[Optional[int]] = ContextVar("veille_trace_run", default=None)
+_ids = itertools.count(1)  # span and run ids, unique in the process
+
+
+class Span:
+    __slots__ = ("tracer", "name", "attrs", "id", "parent", "_start_us", "_t0", "_token")
+
+    def __init__(self, tracer: "Tracer", name: str, attrs: Dict[str, Any]):
+        self.tracer = tracer
+        self.name = name
+        self.attrs = attrs
+        self.id = next(_ids)
+
+    def set(self, **attrs: Any) -> None:
+        self.attrs.update(attrs)
+
+    def __enter__(self) -> "Span":
+        self.parent = _current.get()
+        self._token = _current.set(self)
+        self._start_us = time.time_ns() // 1000
+        self._t0 = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        dur_us = (time.perf_counter_ns() - self._t0) / 1000
+        _current.reset(self._token)
+        if exc_type is not None:
+            self.attrs["error"] = repr(exc)
+        self.tracer._record(self, dur_us)
+        return False
+
+
+class Tracer:
+    def __init__(self, enabled: bool = ENABLED, directory: str = TRACE_DIR):
+        self.enabled = enabled
+        self.directory = directory
+        self._events: Dict[Optional[int], List[Dict[str, Any]]] = {}  # run id -> events
+        self._threads: Dict[int, str] = {}
+        self._lock = threading.Lock()
+
+    def span(self, name: str, **attrs: Any):
+        """Context manager timing `name` as a child of the current span."""
+        if not self.enabled:
+            return _NOOP
+        return Span(self, name, attrs)
+
+    def current(self) -> Optional[Span]:
+        return _current.get()
+
+    @contextmanager
+    def run(self, label: str = ""):
+        """
+        Scope of one trace file: spans recorded in this context (this thread, below this
+        call) belong to the run, and are written to a file named after `label` on exit.
+        """
+        if not self.enabled:
+            yield
+            return
+        run_id = next(_ids)
+        token = _run.set(run_id)
+        try:
+            yield
+        finally:
+            _run.reset(token)
+            self.flush(label, run=run_id)
+
+    def _record(self, span: Span, dur_us: float) -> None:
+        tid = threading.get_ident()
+        args = {k: v if isinstance(v, (int, float, bool, str)) or v is None else str(v)
+                for k, v in span.attrs.items()}
+        args["span_id"] = span.id
+        if span.parent is not None:
+            args["parent_id"] = span.parent.id
+            args["parent"] = span.parent.name
+        event = {"name": span.name, "cat": "veille", "ph": "X", "ts": span._start_us,
+                 "dur": round(dur_us, 1), "pid": os.getpid(), "tid": tid, "args": args}
+        with self._lock:
+            if tid not in self._threads:
+                self._threads[tid] = threading.current_thread().name
+            self._events.setdefault(_run.get(), []).append(event)
+
+    def flush(self, label: str = "", run: Optional[int] = None) -> Optional[str]:
+        """
+        Write the spans of `run` recorded so far (spans outside any run by default) to a
+        trace file and forget them; returns its path.
+        """
+        with self._lock:
+            events = self._events.pop(run, [])
+            threads = dict(self._threads)
+        if not events:
+            return None
+        tids = {e["tid"] for e in events}
+        meta = [{"name": "thread_name", "ph": "M", "pid": os.getpid(), "tid": tid, "args": {"name": name}}
+                for tid, name in threads.items() if tid in tids]
+        os.makedirs(self.directory, exist_ok=True)
+        slug = re.sub(r"[^A-Za-z0-9]+", "-", label).strip("-")[:60]
+        name = (f"trace-{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}"
+                + (f"-{run}" if run is not None else "") + (f"-{slug}" if slug else ""))
+        path = os.path.join(self.directory, name + ".json")
+        with open(path, "w") as f:
+            json.dump({"traceEvents": meta + events, "displayTimeUnit": "ms"}, f)
+        print(f"[TRACE] {len(events)} spans written to {path}")
+        return path
+
+    def flush_all(self) -> None:
+        """Write every run still buffered (at exit: runs cut short, spans outside any run)."""
+        with self._lock:
+            runs = list(self._events)
+        for run in runs:
+            self.flush(run=run)
+
+
+tracer = Tracer()
+if tracer.enabled:
+    atexit.register(tracer.flush_all)
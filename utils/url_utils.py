@@ -1,4 +1,4 @@
-from urllib.parse import urlparse
+from urllib.parse import urlparse, urlunparse
 
 def normalize_url(u: str) -> str:
     u = str(u or "").strip()
@@ -9,6 +9,19 @@ def normalize_url(u: str) -> str:
         u = "http://" + u
     return u
 
+def canonicalize_url(u: str) -> str:
+    """
+    Key under which URL variants of the same resource collapse: lower-case scheme
+    and host, no default port, no fragment, no trailing slash on the path.
+    """
+    p = urlparse(normalize_url(u))
+    scheme = p.scheme.lower()
+    netloc = p.netloc.lower()
+    if (scheme, netloc.rpartition(":")[2]) in (("http", "80"), ("https", "443")):
+        netloc = netloc.rpartition(":")[0]
+    path = p.path.rstrip("/") or "/"
+    return urlunparse((scheme, netloc, path, p.params, p.query, ""))
+
 def same_domain(a: str, b: str) -> bool:
     na = urlparse(a).netloc.lower().lstrip("www.")
     nb = urlparse(b).netloc.lower().lstrip("www.")